@@ -0,0 +1,101 @@
+"""
+Check that concurrent first logins of the same new Google account create a
+single user (repository.user_repository.UserRepository.upsert_user_google).
+
+Each round, N sessions hold an open transaction, then all call
+upsert_user_google for the same new email at once, as parallel logins from
+several tabs or devices would. The round passes if every call succeeds (no
+IntegrityError on the unique email), every call returns the same user_id, and
+the table holds exactly one row for the email. Uses the configured database,
+MySQL or SQLite (DATABASE.URL); the scratch users are deleted at the end.
+
+Usage (from the backend directory):
+    python -m benchmark.concurrent_first_login_check --logins 20 --rounds 10
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.exc import IntegrityError
+
+from database import UnitOfWork, engine, init_db
+from model.user import User
+from service.user_service import UserService
+
+EMAIL_DOMAIN = "first-login-check.example.com"
+
+
+async def login(email: str, index: int, gate: asyncio.Event):
+    async with UnitOfWork() as uow:
+        # Check out a connection first, so that the upserts start together
+        await uow.session.execute(text("SELECT 1"))
+        await gate.wait()
+        user = await UserService(uow).upsert_user_google(
+            email=email, first_name="First", last_name=f"Login {index}", avatar_url="")
+        return user.user_id
+
+
+async def run_round(logins: int) -> list:
+    """Problems found in one round, empty if it passed."""
+    email = f"{uuid.uuid4().hex}@{EMAIL_DOMAIN}"
+    gate = asyncio.Event()
+    tasks = [asyncio.create_task(login(email, index, gate)) for index in range(logins)]
+    # Let every task reach the gate
+    await asyncio.sleep(0.1)
+    gate.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    problems = []
+    errors = [result for result in results if isinstance(result, BaseException)]
+    integrity_errors = sum(1 for error in errors if isinstance(error, IntegrityError))
+    if integrity_errors:
+        problems.append(f"{integrity_errors} IntegrityError(s)")
+    for error in errors:
+        if not isinstance(error, IntegrityError):
+            problems.append(f"{type(error).__name__}: {error}")
+    user_ids = {result for result in results if not isinstance(result, BaseException)}
+    if len(user_ids) > 1:
+        problems.append(f"{len(user_ids)} different user_ids returned")
+
+    async with UnitOfWork() as uow:
+        rows = (await uow.session.execute(select(func.count()).select_from(User).where(User.email == email))).scalar()
+    if rows != 1:
+        problems.append(f"{rows} rows for the email")
+    return problems
+
+
+async def run(logins: int, rounds: int) -> bool:
+    print(f"{rounds} rounds of {logins} concurrent first logins on {engine.dialect.name}")
+    failed = 0
+    try:
+        await init_db()
+        for number in range(1, rounds + 1):
+            problems = await run_round(logins)
+            if problems:
+                failed += 1
+                print(f"round {number}: FAILED: {'; '.join(problems)}")
+        async with UnitOfWork() as uow:
+            await uow.session.execute(delete(User).where(User.email.like(f"%@{EMAIL_DOMAIN}")))
+            await uow.commit()
+    finally:
+        await engine.dispose()
+
+    if failed:
+        print(f"FAILED: {failed} of {rounds} rounds")
+    else:
+        print("ok: one user per email, same user_id for every login, no IntegrityError")
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=20, help="Concurrent logins per round")
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.logins, args.rounds)) else 1)
+
+
+if __name__ == "__main__":
+    main()
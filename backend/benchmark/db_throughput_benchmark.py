@@ -0,0 +1,114 @@
+"""
+Compare request throughput of the previous synchronous data-access layer
+(blocking Session calls inside ``async def`` routes) against the asyncio
+engine, with N concurrent clients sharing one event loop like a uvicorn worker.
+
+Each simulated request looks a user up by email, the query TokenMiddleware's
+legacy path and most user routes issue. The database is the one configured in
+settings.yaml (DATABASE.URL or DATABASE.MYSQL); pass --url to override it.
+Against MySQL, --latency-ms adds a server-side SLEEP to each query to mimic a
+remote database. SQLite has no network round trip to overlap, so on aiosqlite
+the async engine only shows its extra per-query overhead.
+
+Usage (from the backend directory):
+    python -m benchmark.db_throughput_benchmark --clients 1 10 50 --requests 2000
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import SQLALCHEMY_DATABASE_URL, init_db
+from model.user import User
+
+BENCH_EMAIL = "db-benchmark@example.com"
+
+# Blocking driver matching each async driver
+SYNC_DRIVERS = {"aiomysql": "pymysql", "aiosqlite": "pysqlite"}
+
+
+def sync_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    backend, _, driver = scheme.partition("+")
+    return f"{backend}+{SYNC_DRIVERS.get(driver, driver)}://{rest}"
+
+
+def build_query(backend: str, latency_ms: float):
+    if latency_ms and backend == "mysql":
+        return text("SELECT SLEEP(:s), user_id FROM user WHERE email = :email").bindparams(s=latency_ms / 1000)
+    return select(User.user_id).filter(User.email == BENCH_EMAIL)
+
+
+async def run_sync(url: str, query, clients: int, per_client: int) -> float:
+    engine = create_engine(url, pool_size=clients, max_overflow=0) if not url.startswith("sqlite") else create_engine(url)
+    Session = sessionmaker(bind=engine)
+
+    async def client():
+        for _ in range(per_client):
+            # The event loop is blocked for the whole round trip
+            with Session() as db:
+                db.execute(query, {"email": BENCH_EMAIL}).first()
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    engine.dispose()
+    return elapsed
+
+
+async def run_async(url: str, query, clients: int, per_client: int) -> float:
+    engine = create_async_engine(url, pool_size=clients, max_overflow=0) if not url.startswith("sqlite") else create_async_engine(url)
+    Session = async_sessionmaker(bind=engine)
+
+    async def client():
+        for _ in range(per_client):
+            async with Session() as db:
+                (await db.execute(query, {"email": BENCH_EMAIL})).first()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+    return elapsed
+
+
+async def seed():
+    from database import SessionLocal, engine
+    await init_db()
+    async with SessionLocal() as db:
+        exists = (await db.execute(select(User.user_id).filter(User.email == BENCH_EMAIL))).first()
+        if not exists:
+            db.add(User(email=BENCH_EMAIL, first_name="Bench", last_name="Mark"))
+            await db.commit()
+    # The application engine is bound to this event loop
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=SQLALCHEMY_DATABASE_URL, help="async SQLAlchemy URL")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=2000, help="total requests per run")
+    parser.add_argument("--latency-ms", type=float, default=0, help="extra per-query latency (MySQL only)")
+    args = parser.parse_args()
+
+    if args.url == SQLALCHEMY_DATABASE_URL:
+        asyncio.run(seed())
+    query = build_query(args.url.split("+", 1)[0].split(":", 1)[0], args.latency_ms)
+
+    print(f"{'clients':>8} {'sync req/s':>12} {'async req/s':>12} {'speedup':>8}")
+    for clients in args.clients:
+        per_client = max(1, args.requests // clients)
+        total = per_client * clients
+        sync_elapsed = asyncio.run(run_sync(sync_url(args.url), query, clients, per_client))
+        async_elapsed = asyncio.run(run_async(args.url, query, clients, per_client))
+        print(f"{clients:>8} {total / sync_elapsed:>12.0f} {total / async_elapsed:>12.0f} "
+              f"{sync_elapsed / async_elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Run EXPLAIN on the hot queries of SheetService / AuthService and check that
+each of them uses the index it was designed for (see migrations/0003).
+
+The statements are captured from the repository methods themselves, so what
+is explained is exactly what the application sends. MySQL's optimizer may
+prefer a table scan on near-empty tables: run against a database with
+representative data, or pass --seed N to insert N synthetic sheets first
+(scratch databases only).
+
+Usage (from the backend directory):
+    python -m benchmark.explain_hot_queries [--seed 5000]
+"""
+import argparse
+import asyncio
+import re
+import sys
+import uuid
+
+from sqlalchemy import desc, event, insert, text
+
+from database import UnitOfWork, engine, init_db
+from model.sheet import Sheet
+from model.user import User
+from model.user_sheet import UserSheet
+from repository.sheet_repository import SheetRepository
+from repository.user_repository import UserRepository
+from repository.user_sheet_repository import UserSheetRepository
+from utils.sheet_link import spreadsheet_key
+
+SEED_EMAIL = "explain-seed@example.com"
+SQLITE_PLAN = re.compile(r"(?:SEARCH|SCAN) (\w+)(?: AS (\w+))?(?: USING (?:COVERING )?INDEX (\w+)| USING (?:INTEGER )?PRIMARY KEY)?")
+
+
+async def capture(call):
+    """Run ``call(uow)`` and return the (statement, parameters) it executed."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        async with UnitOfWork() as uow:
+            await call(uow)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    return [(statement, parameters) for statement, parameters in statements if statement.lstrip().upper().startswith("SELECT")]
+
+
+async def explain(statement: str, parameters) -> dict:
+    """Return {table: index used} for the statement (PRIMARY for the primary key, None for a scan)."""
+    plan = {}
+    async with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            for row in result:
+                match = SQLITE_PLAN.search(row[-1])
+                if match:
+                    table, alias, index = match.groups()
+                    if (index is None and "PRIMARY KEY" in row[-1]) or (index or "").startswith("sqlite_autoindex_"):
+                        index = "PRIMARY"
+                    plan[alias or table] = index
+        else:
+            result = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+            for row in result.mappings():
+                plan[row["table"]] = row["key"]
+    return plan
+
+
+async def seed(count: int):
+    async with UnitOfWork() as uow:
+        db = uow.session
+        user_id = str(uuid.uuid4())
+        await db.execute(insert(User).values(user_id=user_id, email=f"{uuid.uuid4()}-{SEED_EMAIL}",
+                                             first_name="Explain", last_name="Seed", token_version=1))
+        links = [f"https://docs.google.com/spreadsheets/d/{uuid.uuid4().hex}/edit" for _ in range(count)]
+        sheets = [dict(sheet_id=str(uuid.uuid4()), link=link, spreadsheet_key=spreadsheet_key(link),
+                       creator_id=user_id) for link in links]
+        await db.execute(insert(Sheet), sheets)
+        await db.execute(insert(UserSheet), [
+            dict(user_id=user_id, sheet_id=sheet["sheet_id"], encrypted_sheet_key="k",
+                 role=("owner", "editor", "viewer")[i % 3], is_favorite=i % 7 == 0)
+            for i, sheet in enumerate(sheets)
+        ])
+        await uow.commit()
+
+
+async def sample_ids():
+    async with engine.connect() as conn:
+        row = (await conn.execute(text(
+            "SELECT us.user_id, us.sheet_id, s.link FROM user_sheet us JOIN sheet s ON s.sheet_id = us.sheet_id LIMIT 1"
+        ))).first()
+    if row is None:
+        raise SystemExit("No sheets in the database, run with --seed N")
+    return row
+
+
+def hot_queries(user_id: str, sheet_id: str, link: str):
+    """(name, repository call, {table: acceptable indexes})"""
+    filter_index = {"user_sheet": {"idx_usersheet_user_fav_role_accessed"}}
+    return [
+        ("filter sheets (favorite + role)",
+         lambda uow: UserSheetRepository(uow).filter_sheets_of_user(
+             user_id, True, "owner", [desc(UserSheet.last_accessed_at)], 0, 100),
+         filter_index),
+        ("count sheets (favorite + role)",
+         lambda uow: UserSheetRepository(uow).count_sheets_of_user(user_id, True, "owner"),
+         filter_index),
+        ("filter sheets (all)",
+         lambda uow: UserSheetRepository(uow).filter_sheets_of_user(
+             user_id, None, None, [desc(Sheet.created_at)], 0, 100),
+         # user_id alone is also a prefix of the primary key
+         {"user_sheet": {"idx_usersheet_user_fav_role_accessed", "PRIMARY"}}),
+        ("membership check",
+         lambda uow: UserSheetRepository(uow).get_user_sheet_by_user_id_and_sheet_id(user_id, sheet_id),
+         {"user_sheet": {"PRIMARY"}, "sheet": {"PRIMARY"}}),
+        ("members of sheet",
+         lambda uow: UserSheetRepository(uow).get_user_in_sheet(sheet_id),
+         {"user_sheet": {"idx_usersheet_sheet_role"}}),
+        ("sheet by link",
+         lambda uow: SheetRepository(uow).get_sheet_by_link(link),
+         {"sheet": {"uq_sheet_spreadsheet_key"}}),
+        ("membership by link",
+         lambda uow: UserSheetRepository(uow).get_user_sheet_by_link(user_id, link),
+         # Either side may drive the join, as long as neither is scanned
+         {"sheet": {"uq_sheet_spreadsheet_key", "PRIMARY"},
+          "user_sheet": {"PRIMARY", "idx_usersheet_user_fav_role_accessed"}}),
+        ("deleted sheets to purge",
+         lambda uow: SheetRepository(uow).get_sheet_ids_to_purge(limit=100),
+         {"sheet": {"idx_sheet_deleted_at"}}),
+        ("revoked token versions",
+         lambda uow: UserRepository(uow).get_revoked_token_versions(),
+         {"user": {"idx_user_token_version"}}),
+    ]
+
+
+async def run(seed_count: int) -> bool:
+    await init_db()
+    if seed_count:
+        await seed(seed_count)
+    if engine.dialect.name == "mysql":
+        async with engine.connect() as conn:
+            for table in ("user", "sheet", "user_sheet"):
+                await conn.exec_driver_sql(f"ANALYZE TABLE `{table}`")
+
+    user_id, sheet_id, link = await sample_ids()
+    ok = True
+    for name, call, expected in hot_queries(user_id, sheet_id, link):
+        for statement, parameters in await capture(call):
+            plan = await explain(statement, parameters)
+            for table, indexes in expected.items():
+                used = plan.get(table)
+                passed = used in indexes
+                ok &= passed
+                print(f"[{'ok' if passed else 'FAIL'}] {name:<32} {table:<11} {used} (expected {' or '.join(sorted(indexes))})")
+    await engine.dispose()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="insert N synthetic sheets before explaining")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.seed)) else 1)
+
+
+if __name__ == "__main__":
+    main()
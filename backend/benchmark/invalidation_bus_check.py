@@ -0,0 +1,133 @@
+"""
+Check that a cache invalidation made by one worker reaches another one through
+the Unix socket invalidation bus (utils.invalidation_bus).
+
+Worker B (a child process) caches a member's role, then polls it. Worker A
+(this process) changes the role. The time until B sees the new role is
+reported; without the bus, B would keep the old role until the
+CACHE.MEMBERSHIP TTL expires. Uses the configured database (scratch users and
+sheet, left in place) and a temporary socket directory.
+
+Usage (from the backend directory):
+    python -m benchmark.invalidation_bus_check --rounds 20
+"""
+import argparse
+import asyncio
+import base64
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+from database import UnitOfWork, engine, init_db
+from dto.request.sheet.update_sheet_access_request import UpdateSheetAccessRequest
+from model.user import User
+from repository.membership_cache import membership_cache
+from service.sheet_service import SheetService
+from utils.invalidation_bus import UnixSocketInvalidationBus
+
+ROLES = ("viewer", "editor")
+
+
+async def get_role(user_id: str, sheet_id: str):
+    async with UnitOfWork() as uow:
+        return await SheetService(uow).get_user_role_in_sheet(user_id, sheet_id)
+
+
+async def watch(socket_dir: str, user_id: str, sheet_id: str, rounds: int, timeout: float, ready, changes, seen):
+    """Worker B: for each round, cache the role, then report when the change made by A shows up."""
+    bus = UnixSocketInvalidationBus(SOCKET_DIR=socket_dir)
+    await bus.start()
+    try:
+        for _ in range(rounds):
+            role = await get_role(user_id, sheet_id)
+            ready.put(role)
+            changed_at = await asyncio.to_thread(changes.get)
+            while await get_role(user_id, sheet_id) == role:
+                if time.time() - changed_at > timeout:
+                    seen.put(None)
+                    break
+                await asyncio.sleep(0.001)
+            else:
+                seen.put(time.time() - changed_at)
+        print(f"worker B: {membership_cache.stats()['hits']} cache hits, bus {bus.stats()}")
+    finally:
+        await bus.stop()
+        await engine.dispose()
+
+
+def watcher_main(*args):
+    asyncio.run(watch(*args))
+
+
+async def setup():
+    """Owner and member of a scratch sheet: (owner_id, member_id, sheet_id)."""
+    await init_db()
+    key = base64.b64encode(os.urandom(256)).decode()
+    owner_id, member_id = str(uuid.uuid4()), str(uuid.uuid4())
+    async with UnitOfWork() as uow:
+        for user_id in (owner_id, member_id):
+            uow.session.add(User(user_id=user_id, email=f"{user_id}@bus-check.example.com", first_name="Bus",
+                                 last_name="Check", avatar_url="", public_key=key))
+        await uow.commit()
+    async with UnitOfWork() as uow:
+        sheet = await SheetService(uow).create_sheet(
+            f"https://docs.google.com/spreadsheets/d/{uuid.uuid4().hex}/edit", owner_id, [member_id], [key], key)
+    return owner_id, member_id, sheet.sheet_id
+
+
+async def run(rounds: int, timeout: float) -> bool:
+    try:
+        owner_id, member_id, sheet_id = await setup()
+    finally:
+        await engine.dispose()
+
+    socket_dir = tempfile.mkdtemp(prefix="invalidation-bus-check-")
+    context = multiprocessing.get_context("spawn")
+    ready, changes, seen = context.Queue(), context.Queue(), context.Queue()
+    watcher = context.Process(target=watcher_main,
+                              args=(socket_dir, member_id, sheet_id, rounds, timeout, ready, changes, seen))
+    watcher.start()
+
+    bus = UnixSocketInvalidationBus(SOCKET_DIR=socket_dir)
+    await bus.start()
+    delays = []
+    try:
+        for _ in range(rounds):
+            role = await asyncio.to_thread(ready.get)
+            new_role = ROLES[1] if role == ROLES[0] else ROLES[0]
+            async with UnitOfWork() as uow:
+                await SheetService(uow).update_user_sheet_access(
+                    owner_id, member_id, sheet_id, UpdateSheetAccessRequest(role=new_role))
+            changes.put(time.time())
+            delays.append(await asyncio.to_thread(seen.get))
+    finally:
+        await bus.stop()
+        await engine.dispose()
+        watcher.join()
+        os.rmdir(socket_dir)
+
+    missed = sum(1 for delay in delays if delay is None)
+    delays = sorted(delay for delay in delays if delay is not None)
+    if delays:
+        print(f"role change seen by worker B after: median {statistics.median(delays) * 1e3:.1f} ms, "
+              f"max {delays[-1] * 1e3:.1f} ms ({len(delays)} rounds)")
+    print(f"worker A: bus {bus.stats()}")
+    if missed:
+        print(f"FAILED: {missed} change(s) not seen within {timeout}s")
+    return not missed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=1.0, help="Longest acceptable delay, in seconds")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.rounds, args.timeout)) else 1)
+
+
+if __name__ == "__main__":
+    main()
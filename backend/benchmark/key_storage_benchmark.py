@@ -0,0 +1,119 @@
+"""
+Compare wrapped sheet keys stored as base64 TEXT (the previous schema) with
+VARBINARY (utils.base64_binary.Base64Binary) on a table shaped like user_sheet.
+
+Reports data / index size (MySQL, from information_schema after ANALYZE
+TABLE) and the time of the sheet list query: one user's memberships filtered
+by role, sorted by last access (not covered by an index, so the rows, keys
+included, go through the sort). Keys are random RSA-2048 sized values. Uses two
+scratch tables in the configured database (DATABASE.URL or DATABASE.MYSQL),
+dropped at the end.
+
+Usage (from the backend directory):
+    python -m benchmark.key_storage_benchmark --rows 200000 --queries 500
+"""
+import argparse
+import asyncio
+import base64
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, DateTime, Enum, Index, MetaData, Table, Text, insert, select, text
+
+from database import engine
+from utils.base64_binary import Base64Binary
+from utils.binary_uuid import BinaryUUID, uuid7
+
+BATCH_SIZE = 1000
+KEY_BYTES = 256
+ROLES = ("owner", "editor", "viewer")
+
+metadata = MetaData()
+
+
+def membership_table(name: str, key_type) -> Table:
+    return Table(name, metadata,
+                 Column("user_id", BinaryUUID, primary_key=True),
+                 Column("sheet_id", BinaryUUID, primary_key=True),
+                 Column("role", Enum(*ROLES, name="bench_role"), nullable=False),
+                 Column("encrypted_sheet_key", key_type, nullable=False),
+                 Column("last_accessed_at", DateTime),
+                 Index(f"idx_{name}_user_role", "user_id", "role"))
+
+
+VARIANTS = {
+    "TEXT (base64)": membership_table("bench_key_text", Text),
+    "VARBINARY": membership_table("bench_key_binary", Base64Binary(1024)),
+}
+
+
+async def table_size(conn, table: Table):
+    """(data bytes, index bytes), None off MySQL."""
+    if engine.dialect.name != "mysql":
+        return None
+    await conn.exec_driver_sql(f"ANALYZE TABLE `{table.name}`")
+    row = (await conn.execute(text(
+        "SELECT data_length, index_length FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND table_name = :name"
+    ), {"name": table.name})).one()
+    return row.data_length, row.index_length
+
+
+async def run_variant(table: Table, rows: list, users: list, queries: int) -> dict:
+    async with engine.begin() as conn:
+        await conn.run_sync(table.drop, checkfirst=True)
+        await conn.run_sync(table.create)
+
+    for offset in range(0, len(rows), BATCH_SIZE):
+        async with engine.begin() as conn:
+            await conn.execute(insert(table), rows[offset:offset + BATCH_SIZE])
+
+    async with engine.connect() as conn:
+        size = await table_size(conn, table)
+        start = time.perf_counter()
+        for _ in range(queries):
+            query = (select(table.c.sheet_id, table.c.encrypted_sheet_key, table.c.last_accessed_at)
+                     .where(table.c.user_id == random.choice(users), table.c.role == random.choice(ROLES))
+                     .order_by(table.c.last_accessed_at.desc())
+                     .limit(20))
+            (await conn.execute(query)).all()
+        query_time = time.perf_counter() - start
+
+    async with engine.begin() as conn:
+        await conn.run_sync(table.drop)
+    return {"size": size, "query": query_time / queries}
+
+
+async def run(rows: int, queries: int):
+    print(f"{rows} rows, {queries} sheet list queries on {engine.dialect.name}")
+    # Few users with many sheets each, so the sort has work to do
+    users = [uuid7() for _ in range(max(1, rows // 2000))]
+    now = datetime.utcnow()
+    data = [
+        {"user_id": random.choice(users), "sheet_id": uuid7(), "role": random.choice(ROLES),
+         "encrypted_sheet_key": base64.b64encode(os.urandom(KEY_BYTES)).decode("ascii"),
+         "last_accessed_at": now - timedelta(seconds=random.randrange(10 ** 7))}
+        for _ in range(rows)
+    ]
+    try:
+        for name, table in VARIANTS.items():
+            result = await run_variant(table, data, users, queries)
+            size = "n/a (MySQL only)" if result["size"] is None else \
+                f"data {result['size'][0] / 2 ** 20:.1f} MiB, indexes {result['size'][1] / 2 ** 20:.1f} MiB"
+            print(f"{name:<15} {size}   sheet list {result['query'] * 1e3:.2f} ms")
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.queries))
+
+
+if __name__ == "__main__":
+    main()
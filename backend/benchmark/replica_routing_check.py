@@ -0,0 +1,107 @@
+"""
+Show which database serves each statement of a few read-only and write paths,
+to check the primary / read replica routing configured in settings.yaml
+(DATABASE.URL or MYSQL for the primary, DATABASE.REPLICAS for the replicas).
+
+The replicas do not have to replicate anything for this check: two local
+database instances with the same schema are enough (reads on the replica
+then simply find nothing). Writes go to the primary only, scratch databases only.
+
+Usage (from the backend directory):
+    python -m benchmark.replica_routing_check
+"""
+import asyncio
+import sys
+import uuid
+
+from sqlalchemy import event
+
+from database import UnitOfWork, engine, init_db, replicas, request_user
+from dto.request.sheet.filter_sheet_request import FilterSheetRequest
+from service.sheet_service import SheetService
+from service.user_service import UserService
+
+
+async def capture(call):
+    """Run ``call(uow)`` and return the name of the database of every statement it issued."""
+    served = []
+    listeners = []
+    for name, target in [("primary", engine), *((f"replica {i + 1}", r) for i, r in enumerate(replicas.engines))]:
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany, name=name):
+            served.append((name, statement.split(None, 1)[0].upper()))
+        event.listen(target.sync_engine, "before_cursor_execute", before_cursor_execute)
+        listeners.append((target, before_cursor_execute))
+    try:
+        async with UnitOfWork() as uow:
+            await call(uow)
+    finally:
+        for target, listener in listeners:
+            event.remove(target.sync_engine, "before_cursor_execute", listener)
+    return served
+
+
+def as_user(user_id: str, call):
+    """``call`` made by an authenticated request of ``user_id`` (as set by TokenMiddleware)."""
+    async def wrapper(uow):
+        token = request_user.set(user_id)
+        try:
+            await call(uow)
+        finally:
+            request_user.reset(token)
+    return wrapper
+
+
+async def run() -> bool:
+    try:
+        return await check()
+    finally:
+        await replicas.stop()
+        await engine.dispose()
+
+
+async def check() -> bool:
+    await init_db()
+    await replicas.start()
+    if not replicas.engines:
+        print("No DATABASE.REPLICAS configured: everything goes to the primary")
+
+    email = f"{uuid.uuid4()}@replica-check.example.com"
+    async with UnitOfWork() as uow:
+        user = await UserService(uow).upsert_user_google(email, "Replica", "Check", "")
+    user_id = user.user_id
+    sheet_id = str(uuid.uuid4())
+
+    async def update_then_read(uow):
+        await UserService(uow).upsert_user_google(email, "Replica", "Check", "")
+        # Same request as the write: must read from the primary
+        await SheetService(uow).get_user_role_in_sheet(user_id, sheet_id)
+
+    paths = [
+        ("filter sheets", lambda uow: SheetService(uow).get_sheets_by_filter(
+            FilterSheetRequest(page=1, page_size=10, user_id=user_id)), True),
+        # Membership cache misses are read from the primary (see UserSheetRepository.get_membership)
+        ("sheet role", lambda uow: SheetService(uow).get_user_role_in_sheet(user_id, sheet_id), False),
+        ("permission", lambda uow: SheetService(uow).check_user_permission(user_id, sheet_id), False),
+        ("user lookup", lambda uow: UserService(uow).get_user(user_id), True),
+        ("write, then read", update_then_read, False),
+        # The user logged in (wrote) moments ago: its next requests stay on the primary, others' do not
+        ("own next request", as_user(user_id, lambda uow: UserService(uow).get_user(user_id)), False),
+        ("other user", as_user(str(uuid.uuid4()), lambda uow: UserService(uow).get_user(user_id)), True),
+    ]
+    ok = True
+    for name, call, expect_replica in paths:
+        served = await capture(call)
+        on_replica = any(database != "primary" for database, _ in served)
+        writes_on_replica = any(database != "primary" and verb != "SELECT" for database, verb in served)
+        passed = not writes_on_replica and (on_replica == (expect_replica and bool(replicas.choose())))
+        ok &= passed
+        print(f"[{'ok' if passed else 'FAIL'}] {name:<18} " + ", ".join(f"{verb}@{database}" for database, verb in served))
+    return ok
+
+
+def main():
+    sys.exit(0 if asyncio.run(run()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Compare the pure ASGI TokenMiddleware against the previous
+BaseHTTPMiddleware-based implementation.
+
+Both middlewares wrap the same trivial endpoint and use a stub auth service,
+so the numbers only reflect the cost of the auth layer itself.
+
+Usage (from the backend directory):
+    python -m benchmark.token_middleware_benchmark --requests 20000
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import HTTPException, Request, status
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from exception.global_exception_handler import get_http_exception_response
+from middleware.token_middleware import TokenMiddleware
+
+
+PRINCIPAL = {"user_id": "bench-user", "email": "bench@example.com"}
+
+
+class StubAuthService:
+    async def check_token(self, token: str):
+        if token != "valid-token":
+            raise ValueError("invalid token")
+        return PRINCIPAL
+
+
+class LegacyTokenMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation TokenMiddleware replaced."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.auth_service = StubAuthService()
+
+    async def dispatch(self, request: Request, call_next):
+        if request.method == "OPTIONS":
+            return await call_next(request)
+        WHITE_LIST_API = ["/api/login/google", "/test", "/docs", "/openapi.json"]
+
+        if request.url.path in WHITE_LIST_API:
+            return await call_next(request)
+
+        token = request.cookies.get("access_token")
+        if not token:
+            auth_header = request.headers.get("Authorization")
+            if auth_header and auth_header.startswith("Bearer "):
+                token = auth_header.split(" ", 1)[1].strip()
+
+        if not token:
+            return get_http_exception_response(HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token missing"))
+
+        try:
+            request.state.user = await self.auth_service.check_token(token)
+        except Exception:
+            return get_http_exception_response(HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token"))
+
+        return await call_next(request)
+
+
+async def whoami(request: Request):
+    return JSONResponse({"user_id": request.state.user["user_id"]})
+
+
+def build_app(middleware_class):
+    app = Starlette(routes=[Route("/api/user/me", whoami)])
+    wrapped = middleware_class(app)
+    wrapped.auth_service = StubAuthService()
+    return wrapped
+
+
+def build_scope():
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/user/me",
+        "raw_path": b"/api/user/me",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"localhost"),
+            (b"cookie", b"access_token=valid-token"),
+        ],
+        "client": ("127.0.0.1", 12345),
+        "server": ("localhost", 9990),
+    }
+
+
+async def call(app):
+    status_code = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+
+    await app(build_scope(), receive, send)
+    return status_code
+
+
+async def run(app, total: int, concurrency: int) -> float:
+    assert await call(app) == 200
+
+    async def worker(count: int):
+        for _ in range(count):
+            await call(app)
+
+    per_worker = total // concurrency
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(per_worker) for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    total = args.requests - args.requests % args.concurrency
+    for name, middleware_class in (("BaseHTTPMiddleware", LegacyTokenMiddleware), ("pure ASGI", TokenMiddleware)):
+        elapsed = asyncio.run(run(build_app(middleware_class), total, args.concurrency))
+        print(f"{name:<20} {total / elapsed:>10.0f} req/s  {elapsed / total * 1e6:>8.1f} us/req")
+
+
+if __name__ == "__main__":
+    main()
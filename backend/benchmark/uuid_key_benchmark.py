@@ -0,0 +1,109 @@
+"""
+Compare text UUID keys (CHAR(36), random UUIDv4, the previous schema) with
+BINARY(16) keys (UUIDv7, see utils.binary_uuid) on a table shaped like
+user_sheet: (user_id, sheet_id) primary key plus a secondary index on sheet_id.
+
+Reports insert time, data / index size (MySQL, from information_schema after
+ANALYZE TABLE) and the time of random primary key lookups. Uses two scratch
+tables in the configured database (DATABASE.URL or DATABASE.MYSQL), dropped
+at the end.
+
+Usage (from the backend directory):
+    python -m benchmark.uuid_key_benchmark --rows 200000 --lookups 5000
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from sqlalchemy import CHAR, Column, Index, MetaData, Table, and_, insert, select, text
+
+from database import engine
+from utils.binary_uuid import BinaryUUID, uuid7
+
+BATCH_SIZE = 1000
+
+metadata = MetaData()
+VARIANTS = {
+    "CHAR(36) / UUIDv4": (
+        Table("bench_uuid_char", metadata,
+              Column("user_id", CHAR(36), primary_key=True),
+              Column("sheet_id", CHAR(36), primary_key=True),
+              Index("idx_bench_uuid_char_sheet", "sheet_id")),
+        lambda: str(uuid.uuid4()),
+    ),
+    "BINARY(16) / UUIDv7": (
+        Table("bench_uuid_binary", metadata,
+              Column("user_id", BinaryUUID, primary_key=True),
+              Column("sheet_id", BinaryUUID, primary_key=True),
+              Index("idx_bench_uuid_binary_sheet", "sheet_id")),
+        uuid7,
+    ),
+}
+
+
+async def table_size(conn, table: Table):
+    """(data bytes, index bytes), None off MySQL."""
+    if engine.dialect.name != "mysql":
+        return None
+    await conn.exec_driver_sql(f"ANALYZE TABLE `{table.name}`")
+    row = (await conn.execute(text(
+        "SELECT data_length, index_length FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND table_name = :name"
+    ), {"name": table.name})).one()
+    return row.data_length, row.index_length
+
+
+async def run_variant(table: Table, new_id, rows: int, lookups: int) -> dict:
+    # A few sheets per user, like real memberships
+    users = [new_id() for _ in range(max(1, rows // 5))]
+    keys = [(random.choice(users), new_id()) for _ in range(rows)]
+
+    async with engine.begin() as conn:
+        await conn.run_sync(table.drop, checkfirst=True)
+        await conn.run_sync(table.create)
+
+    start = time.perf_counter()
+    for offset in range(0, rows, BATCH_SIZE):
+        async with engine.begin() as conn:
+            await conn.execute(insert(table), [
+                {"user_id": user_id, "sheet_id": sheet_id} for user_id, sheet_id in keys[offset:offset + BATCH_SIZE]])
+    insert_time = time.perf_counter() - start
+
+    async with engine.connect() as conn:
+        size = await table_size(conn, table)
+        sample = random.sample(keys, min(lookups, rows))
+        start = time.perf_counter()
+        for user_id, sheet_id in sample:
+            await conn.execute(select(table.c.user_id).where(
+                and_(table.c.user_id == user_id, table.c.sheet_id == sheet_id)))
+        lookup_time = time.perf_counter() - start
+
+    async with engine.begin() as conn:
+        await conn.run_sync(table.drop)
+    return {"insert": insert_time, "size": size, "lookup": lookup_time / len(sample)}
+
+
+async def run(rows: int, lookups: int):
+    print(f"{rows} rows, {lookups} primary key lookups on {engine.dialect.name}")
+    try:
+        for name, (table, new_id) in VARIANTS.items():
+            result = await run_variant(table, new_id, rows, lookups)
+            size = "n/a (MySQL only)" if result["size"] is None else \
+                f"data {result['size'][0] / 2 ** 20:.1f} MiB, indexes {result['size'][1] / 2 ** 20:.1f} MiB"
+            print(f"{name:<20} insert {result['insert']:.2f}s   {size}   lookup {result['lookup'] * 1e6:.0f} us")
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.lookups))
+
+
+if __name__ == "__main__":
+    main()
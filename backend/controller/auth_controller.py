@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends, Response
 from dto.response.success_response import SuccessResponse
 from dto.request.auth.google_login_request import GoogleLoginRequest
 from service.auth_service import AuthService
+from utils.utils import get_current_user, set_access_token_cookie
 
 auth_router = APIRouter()
 
@@ -52,7 +53,7 @@ auth_router = APIRouter()
     },
     tags=["🔐 Authentication"],
 )
-def login_with_google(
+async def login_with_google(
     response: Response, 
     data: GoogleLoginRequest, 
     auth_service: AuthService = Depends(AuthService)
@@ -73,15 +74,10 @@ def login_with_google(
     """
     try:
         response.delete_cookie("access_token")
-        user = auth_service.verify_google_access_token(data.token)
-        access_token = auth_service.create_token(data={"sub": user.email})
+        user = await auth_service.verify_google_access_token(data.token)
+        access_token = auth_service.create_user_token(user)
         # Set cookie
-        response.set_cookie(
-            key="access_token",
-            value=f"{access_token}",
-            httponly=True,
-            secure=True,
-            samesite='lax')
+        set_access_token_cookie(response, access_token)
 
         return SuccessResponse(result=access_token)
 
@@ -89,3 +85,52 @@ def login_with_google(
         raise HTTPException(status_code=400, detail="Invalid Google token")
 
 
+@auth_router.post(
+    "/logout",
+    summary="Logout (Revoke All Sessions)",
+    description="""
+    **Revoke every access token issued to the current user**
+
+    Access tokens are self-contained, so logging out bumps the user's token
+    version: every token carrying an older version is rejected from then on,
+    on all devices. The access_token cookie is cleared as well.
+    """,
+    response_description="Confirmation of revoked sessions",
+    responses={
+        200: {
+            "description": "Logged out successfully",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "code": 0,
+                        "message": "successfully",
+                        "result": True
+                    }
+                }
+            }
+        },
+        401: {
+            "description": "Authentication required"
+        }
+    },
+    tags=["🔐 Authentication"],
+)
+async def logout(
+    response: Response,
+    current_user=Depends(get_current_user),
+    auth_service: AuthService = Depends(AuthService)
+):
+    """
+    Revoke all access tokens of the authenticated user.
+
+    Args:
+        response: FastAPI Response object for clearing the cookie
+        current_user: Currently authenticated user
+        auth_service: Injected authentication service
+
+    Returns:
+        SuccessResponse with True once tokens are revoked
+    """
+    await auth_service.revoke_user_tokens(current_user.user_id)
+    response.delete_cookie("access_token")
+    return SuccessResponse(result=True)
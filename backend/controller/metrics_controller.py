@@ -0,0 +1,227 @@
+from fastapi import APIRouter
+from dto.response.success_response import SuccessResponse
+from utils.cache import cache_registry
+from utils.password_hasher import password_hasher
+from service.last_accessed_buffer import last_accessed_buffer
+from database import replicas
+from utils.invalidation_bus import invalidation_bus
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get(
+    "/caches",
+    summary="In-Process Cache Statistics",
+    description="""
+    **Report size and hit/miss counters of this worker's in-process caches**
+
+    Counters are per worker process and reset on restart.
+    """,
+    response_description="Statistics for every registered cache, keyed by cache name",
+    responses={
+        200: {
+            "description": "Cache statistics",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "code": 0,
+                        "message": "successfully",
+                        "result": {
+                            "principal": {
+                                "size": 42,
+                                "maxsize": 10000,
+                                "ttl": 60.0,
+                                "hits": 1250,
+                                "misses": 42,
+                                "hit_ratio": 0.9675,
+                                "invalidations": 3
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+)
+async def get_cache_stats():
+    """
+    Get statistics for all in-process caches.
+
+    Returns:
+        SuccessResponse containing per-cache statistics
+    """
+    return SuccessResponse(result={name: cache.stats() for name, cache in cache_registry.items()})
+
+
+@metrics_router.get(
+    "/password-hasher",
+    summary="PIN Hashing Pool Statistics",
+    description="""
+    **Report queue wait and bcrypt time of this worker's PIN hashing pool**
+
+    Times are in seconds. `rejected` counts operations that gave up after
+    waiting longer than the queue timeout for a free slot.
+    """,
+    response_description="Password hasher metrics",
+    responses={
+        200: {
+            "description": "Password hasher metrics",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "code": 0,
+                        "message": "successfully",
+                        "result": {
+                            "completed": 120,
+                            "rejected": 2,
+                            "in_flight": 1,
+                            "queue_wait_total": 3.52,
+                            "queue_wait_max": 1.31,
+                            "queue_wait_avg": 0.029,
+                            "hash_time_total": 29.8,
+                            "hash_time_max": 0.31,
+                            "hash_time_avg": 0.248,
+                            "max_workers": 2,
+                            "max_concurrency": 4,
+                            "queue_timeout": 2.0
+                        }
+                    }
+                }
+            }
+        }
+    }
+)
+async def get_password_hasher_stats():
+    """
+    Get PIN hashing pool metrics.
+
+    Returns:
+        SuccessResponse containing queue wait and hash time metrics
+    """
+    return SuccessResponse(result=password_hasher.stats())
+
+
+@metrics_router.get(
+    "/last-accessed",
+    summary="Last Access Write-Behind Buffer Statistics",
+    description="""
+    **Report the state of this worker's last_accessed_at write-behind buffer**
+
+    `pending` access times are waiting for the next flush; `recorded` counts
+    calls, `flushed` counts rows sent to the database (after coalescing).
+    """,
+    response_description="Last access buffer metrics",
+    responses={
+        200: {
+            "description": "Last access buffer metrics",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "code": 0,
+                        "message": "successfully",
+                        "result": {
+                            "pending": 12,
+                            "recorded": 5400,
+                            "flushed": 830,
+                            "flushes": 120,
+                            "errors": 0,
+                            "flush_interval": 5.0,
+                            "max_pending": 10000
+                        }
+                    }
+                }
+            }
+        }
+    }
+)
+async def get_last_accessed_stats():
+    """
+    Get last access write-behind buffer metrics.
+
+    Returns:
+        SuccessResponse containing buffer size and flush counters
+    """
+    return SuccessResponse(result=last_accessed_buffer.stats())
+
+
+@metrics_router.get(
+    "/replicas",
+    summary="Read Replica Health",
+    description="""
+    **List the configured read replicas and whether reads are sent to them**
+
+    Replicas failing their health check (or lagging more than
+    `DATABASE.REPLICA_MAX_LAG_SECONDS`) are skipped until they recover.
+    An empty list means every query goes to the primary.
+    """,
+    response_description="Read replica health",
+    responses={
+        200: {
+            "description": "Read replica health",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "code": 0,
+                        "message": "successfully",
+                        "result": [
+                            {"host": "replica-1", "port": 3306, "database": "e2ee_sheets", "healthy": True},
+                            {"host": "replica-2", "port": 3306, "database": "e2ee_sheets", "healthy": False}
+                        ]
+                    }
+                }
+            }
+        }
+    }
+)
+async def get_replica_stats():
+    """
+    Get read replica health.
+
+    Returns:
+        SuccessResponse containing one entry per configured replica
+    """
+    return SuccessResponse(result=replicas.stats())
+
+
+@metrics_router.get(
+    "/invalidation-bus",
+    summary="Cache Invalidation Bus Statistics",
+    description="""
+    **Report the cache invalidations this worker exchanged with the other workers**
+
+    `published` counts messages sent, `received` messages applied from other
+    workers, `dropped` messages that could not be delivered (the entries then
+    expire with their TTL). The Unix socket bus also reports how many other
+    workers (`peers`) are listening.
+    """,
+    response_description="Invalidation bus metrics",
+    responses={
+        200: {
+            "description": "Invalidation bus metrics",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "code": 0,
+                        "message": "successfully",
+                        "result": {
+                            "backend": "UnixSocketInvalidationBus",
+                            "published": 310,
+                            "received": 925,
+                            "dropped": 0,
+                            "socket_dir": "/tmp/e2ee-sheets-invalidation",
+                            "peers": 3
+                        }
+                    }
+                }
+            }
+        }
+    }
+)
+async def get_invalidation_bus_stats():
+    """
+    Get cache invalidation bus metrics.
+
+    Returns:
+        SuccessResponse containing message counters
+    """
+    return SuccessResponse(result=invalidation_bus.stats())
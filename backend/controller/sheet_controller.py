@@ -35,6 +35,10 @@ sheet_router = APIRouter()
     - Include member_ids to add users during creation
     - Provide encrypted_sheet_keys array (one per member)
     - Members must have completed PIN/key setup to be added
+    
+    **Uniqueness:**
+    - A spreadsheet can only be registered once, whatever URL variant is used
+      (returns SHEET_ALREADY_EXISTS otherwise)
     """,
     response_description="Created sheet information with access details",
     responses={
@@ -50,7 +54,10 @@ sheet_router = APIRouter()
                             "link": "https://docs.google.com/spreadsheets/d/abc123",
                             "creator_id": "user_123",
                             "created_at": "2024-01-15T10:30:00Z",
-                            "member_count": 3
+                            "member_count": 3,
+                            "owner_count": 1,
+                            "editor_count": 1,
+                            "viewer_count": 1
                         }
                     }
                 }
@@ -80,7 +87,7 @@ async def create_sheet(
     Returns:
         SuccessResponse containing created sheet information
     """
-    result = sheet_service.create_sheet(
+    result = await sheet_service.create_sheet(
         link=create_sheet_request.link,
         creator_id=current_user.user_id,
         member_ids=create_sheet_request.member_ids,
@@ -127,7 +134,10 @@ async def create_sheet(
                             "user_role": "owner",
                             "is_favorite": False,
                             "last_accessed": "2024-01-15T14:20:00Z",
-                            "member_count": 3
+                            "member_count": 3,
+                            "owner_count": 1,
+                            "editor_count": 1,
+                            "viewer_count": 1
                         }
                     }
                 }
@@ -157,7 +167,7 @@ async def get_sheet_by_id(
     Returns:
         SuccessResponse containing sheet details and user's access info
     """
-    result = sheet_service.get_sheet_by_id(sheet_id, current_user.user_id)
+    result = await sheet_service.get_sheet_by_id(sheet_id, current_user.user_id)
     return SuccessResponse(result=result)
 
 @sheet_router.post(
@@ -176,14 +186,25 @@ async def get_sheet_by_id(
     - **Pagination**: Page-based results with configurable page size
     - **Sorting**: By creation date, last accessed, or alphabetical
     
+    **Cursor Pagination:**
+    - Send `pagination: "cursor"` for the first page, then pass the returned
+      `next_cursor` back as `cursor` until it is null
+    - Cursors are only valid for the sorting they were issued with
+    - Pages stay fast however deep the user scrolls (no OFFSET)
+    - `total` is only returned with `include_total: true` and may be a few seconds stale
+    
     **Response includes:**
     - Sheet metadata and access information
     - User's role and permissions for each sheet
     - Favorite status and last access times
-    - Total count for pagination
+    - Total count for pagination (optional, see `include_total`)
+    - `next_cursor` in cursor mode
+    - `encrypted_sheet_key` only with `include_keys: true` (otherwise null;
+      `GET /api/sheet/sheet-key` returns it when a sheet is opened)
     
     **Performance Notes:**
-    - Results are cached for frequently accessed filters
+    - Sheets and their creators are loaded by a single query per page,
+      reading only the columns of the response
     - Large sheet lists are automatically paginated
     """,
     response_description="Paginated list of filtered sheets with access details",
@@ -207,7 +228,8 @@ async def get_sheet_by_id(
                             ],
                             "total_count": 15,
                             "page": 1,
-                            "page_size": 10
+                            "page_size": 10,
+                            "next_cursor": None
                         }
                     }
                 }
@@ -235,7 +257,7 @@ async def get_sheets_filter(
         SuccessResponse containing filtered sheet list with pagination info
     """
     request.user_id = current_user.user_id
-    result = sheet_service.get_sheets_by_filter(request)
+    result = await sheet_service.get_sheets_by_filter(request)
     return SuccessResponse(result=result)
 
 @sheet_router.post(
@@ -262,8 +284,14 @@ async def get_sheets_filter(
     - `viewer`: Read-only access to decrypted data
     - `editor`: Can modify sheet content
     - `owner`: Full administrative control (transfer only)
+    
+    **Bulk Behaviour:**
+    - All users and keys are validated before anything is written
+      (INVALID_SHEET_MEMBERS if any user is unknown, has no key setup, or has no key)
+    - Members are inserted in a single transaction with multi-row statements
+    - Users who already are members are skipped and reported in `skipped_user_ids`
     """,
-    response_description="Confirmation of users added with their access details",
+    response_description="IDs of the users added and of the users skipped (already members)",
     responses={
         200: {
             "description": "Users added successfully",
@@ -273,15 +301,8 @@ async def get_sheets_filter(
                         "code": 0,
                         "message": "successfully",
                         "result": {
-                            "added_users": [
-                                {
-                                    "user_id": "user_456",
-                                    "email": "newuser@example.com",
-                                    "role": "editor",
-                                    "added_at": "2024-01-15T15:30:00Z"
-                                }
-                            ],
-                            "total_members": 4
+                            "added_user_ids": ["user_456", "user_789"],
+                            "skipped_user_ids": ["user_123"]
                         }
                     }
                 }
@@ -311,9 +332,9 @@ async def add_users_to_sheet(
         current_user: Currently authenticated user (must have add permissions)
         
     Returns:
-        SuccessResponse containing details of added users
+        SuccessResponse containing the added and skipped user IDs
     """
-    result = sheet_service.add_users_to_sheet(current_user.user_id, sheet_id, request)
+    result = await sheet_service.add_users_to_sheet(current_user.user_id, sheet_id, request)
     return SuccessResponse(result=result)
 
 @sheet_router.post(
@@ -393,7 +414,7 @@ async def remove_users_from_sheet(
     Returns:
         SuccessResponse containing details of removed users
     """
-    result = sheet_service.remove_users_from_sheet(current_user.user_id, sheet_id, request)
+    result = await sheet_service.remove_users_from_sheet(current_user.user_id, sheet_id, request)
     return SuccessResponse(result=result)
 
 @sheet_router.post(
@@ -467,7 +488,7 @@ async def leave_sheet(
     Returns:
         SuccessResponse containing confirmation of departure
     """
-    result = sheet_service.leave_sheet(current_user.user_id, sheet_id)
+    result = await sheet_service.leave_sheet(current_user.user_id, sheet_id)
     return SuccessResponse(result=result)
 
 @sheet_router.delete(
@@ -482,9 +503,11 @@ async def leave_sheet(
     
     **Deletion Process:**
     1. **Ownership Verification**: Confirm user is sheet owner
-    2. **Access Revocation**: Remove all member access immediately
+    2. **Access Revocation**: The sheet is marked deleted and disappears
+       from every read (listing, by-link, role, sheet key) immediately
     3. **Key Destruction**: Invalidate all encrypted sheet keys
-    4. **Record Cleanup**: Remove sheet metadata and history
+    4. **Record Cleanup**: Memberships and the sheet record are removed in
+       the background, in batches; follow it with `GET /api/sheet/deletion-status`
     
     **⚠️ WARNING: This operation is irreversible!**
     - All encrypted data becomes permanently inaccessible
@@ -511,8 +534,9 @@ async def leave_sheet(
                         "message": "successfully",
                         "result": {
                             "sheet_id": "sheet_789",
+                            "status": "deleting",
                             "deleted_at": "2024-01-15T18:00:00Z",
-                            "affected_members": 3
+                            "remaining_members": 3
                         }
                     }
                 }
@@ -542,7 +566,65 @@ async def delete_sheet(
     Returns:
         SuccessResponse containing deletion confirmation
     """
-    result = sheet_service.delete_sheet(current_user.user_id, sheet_id)
+    result = await sheet_service.delete_sheet(current_user.user_id, sheet_id)
+    return SuccessResponse(result=result)
+
+@sheet_router.get(
+    "/deletion-status",
+    summary="Sheet Deletion Status",
+    description="""
+    **Follow the background removal of a deleted sheet**
+    
+    A deleted sheet is gone for every read at once; its memberships and
+    record are then removed in batches. Only the user who deleted the sheet
+    can follow the progress.
+    
+    **Statuses:**
+    - **deleting**: Memberships are being removed (`remaining_members` left)
+    - **deleted**: Everything is removed (answered for
+      SHEET_PURGE.RECORD_RETENTION_DAYS after the removal)
+    """,
+    response_description="Deletion progress of the sheet",
+    responses={
+        200: {
+            "description": "Deletion status retrieved successfully",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "code": 0,
+                        "message": "successfully",
+                        "result": {
+                            "sheet_id": "sheet_789",
+                            "status": "deleting",
+                            "deleted_at": "2024-01-15T18:00:00Z",
+                            "remaining_members": 1200
+                        }
+                    }
+                }
+            }
+        },
+        404: {
+            "description": "Sheet unknown, not deleted, or deleted by someone else"
+        }
+    }
+)
+async def get_deletion_status(
+    sheet_id: str,
+    sheet_service: SheetService = Depends(SheetService),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the deletion progress of a sheet.
+    
+    Args:
+        sheet_id: ID of the deleted sheet
+        sheet_service: Injected sheet service
+        current_user: Currently authenticated user (must have deleted the sheet)
+        
+    Returns:
+        SuccessResponse containing the deletion status
+    """
+    result = await sheet_service.get_deletion_status(current_user.user_id, sheet_id)
     return SuccessResponse(result=result)
 
 @sheet_router.put(
@@ -622,7 +704,7 @@ async def update_sheet_access(
     Returns:
         SuccessResponse containing updated access information
     """
-    result = sheet_service.update_user_sheet_access(
+    result = await sheet_service.update_user_sheet_access(
         current_user.user_id, 
         target_user_id, 
         sheet_id, 
@@ -700,7 +782,7 @@ async def toggle_favorite(
         SuccessResponse containing updated favorite status
     """
     request = UpdateSheetAccessRequest(is_favorite=is_favorite)
-    result = sheet_service.update_user_sheet_access(
+    result = await sheet_service.update_user_sheet_access(
         current_user.user_id, 
         current_user.user_id, 
         sheet_id, 
@@ -793,7 +875,7 @@ async def get_users_in_sheet(
     Returns:
         SuccessResponse containing list of sheet members
     """
-    result = sheet_service.get_users_in_sheet(current_user.user_id, sheet_id)
+    result = await sheet_service.get_users_in_sheet(current_user.user_id, sheet_id)
     return SuccessResponse(result=result)
 
 @sheet_router.get(
@@ -866,7 +948,7 @@ async def get_encrypted_sheet_key(
     Returns:
         SuccessResponse containing encrypted sheet key
     """
-    result = sheet_service.get_encrypted_sheet_key(current_user.user_id, sheet_id)
+    result = await sheet_service.get_encrypted_sheet_key(current_user.user_id, sheet_id)
     return SuccessResponse(result=result)
 
 @sheet_router.get(
@@ -950,7 +1032,7 @@ async def get_user_role(
     Returns:
         SuccessResponse containing user's role and permissions
     """
-    result = sheet_service.get_user_role_in_sheet(current_user.user_id, sheet_id)
+    result = await sheet_service.get_user_role_in_sheet(current_user.user_id, sheet_id)
     return SuccessResponse(result=result)
 
 @sheet_router.get(
@@ -1048,7 +1130,7 @@ async def check_permission(
     Returns:
         SuccessResponse containing permission check result
     """
-    result = sheet_service.check_user_permission(current_user.user_id, sheet_id, required_role)
+    result = await sheet_service.check_user_permission(current_user.user_id, sheet_id, required_role)
     return SuccessResponse(result=result)
 
 @sheet_router.put(
@@ -1081,7 +1163,10 @@ async def check_permission(
     **Automatic vs Manual Updates:**
     - Can be called automatically when sheet is opened
     - Manual calls for specific activity tracking
-    - Batch updates for performance optimization
+    - Batch updates for performance optimization: access times are buffered
+      in memory (latest per user and sheet) and written in bulk every few
+      seconds, so `last_accessed_at` (in sheet details and listings, and for
+      sorting) reflects them after the next flush
     
     **Privacy Notes:**
     - Access times are visible to sheet owners
@@ -1097,12 +1182,7 @@ async def check_permission(
                     "example": {
                         "code": 0,
                         "message": "successfully",
-                        "result": {
-                            "sheet_id": "sheet_789",
-                            "user_id": "user_123",
-                            "last_accessed": "2024-01-15T21:45:00Z",
-                            "access_count": 47
-                        }
+                        "result": True
                     }
                 }
             }
@@ -1128,7 +1208,7 @@ async def update_last_accessed(
     Returns:
         SuccessResponse containing updated access information
     """
-    result = sheet_service.update_last_accessed(current_user.user_id, sheet_id)
+    result = await sheet_service.update_last_accessed(current_user.user_id, sheet_id)
     return SuccessResponse(result=result)
 
 @sheet_router.get(
@@ -1149,7 +1229,8 @@ async def update_last_accessed(
     
     **Process:**
     1. **URL Validation**: Verify the provided link is a valid Google Sheets URL
-    2. **Sheet Lookup**: Find the corresponding encrypted sheet record
+    2. **Sheet Lookup**: Find the corresponding encrypted sheet record by spreadsheet ID
+       (any URL variant works: `/edit`, `/view`, `#gid=...`, query strings)
     3. **Access Check**: Verify current user has access to the sheet
     4. **Data Return**: Return sheet details with user's access information
     
@@ -1213,5 +1294,5 @@ async def get_sheet_by_link(
     Returns:
         SuccessResponse containing sheet details for the provided URL
     """
-    result = sheet_service.get_sheet_by_link(link, current_user.user_id)
+    result = await sheet_service.get_sheet_by_link(link, current_user.user_id)
     return SuccessResponse(result=result)
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Response
 from dto.request.auth.create_pin_request import Create_Pin_Request
 from dto.request.auth.restore_private_key_request import Restore_Private_Key_Request
+from dto.request.user.public_keys_request import PublicKeysRequest
 from service.user_service import UserService
+from service.auth_service import AuthService
 from dto.response.success_response import SuccessResponse
-from utils.utils import get_current_user
+from utils.utils import get_current_user, set_access_token_cookie
 user_router = APIRouter()
 
 @user_router.get(
@@ -58,7 +60,7 @@ async def get_user(user_id: str, user_service: UserService = Depends(UserService
     Returns:
         SuccessResponse containing user information
     """
-    user = user_service.get_user(user_id)
+    user = await user_service.get_user(user_id)
     return SuccessResponse(result=user)
 
 @user_router.post(
@@ -91,7 +93,7 @@ async def get_me(current_user=Depends(get_current_user), user_service: UserServi
     Returns:
         SuccessResponse containing current user's profile
     """  
-    current_user = user_service.get_user_by_email(current_user.email)
+    current_user = await user_service.get_user_by_email(current_user.email)
     return SuccessResponse(result=current_user)
 
 @user_router.post(
@@ -106,6 +108,7 @@ async def get_me(current_user=Depends(get_current_user), user_service: UserServi
     1. **Client-side key generation**: RSA key pair generated in browser
     2. **PIN encryption**: Private key encrypted with user's PIN
     3. **Secure storage**: Only encrypted private key stored on server
+    4. **Token refresh**: A new access token (with key setup flag) is set as cookie
     
     **Security Features:**
     - PIN never transmitted in plain text
@@ -143,25 +146,29 @@ async def get_me(current_user=Depends(get_current_user), user_service: UserServi
 )
 async def set_pin_and_key(
     request: Create_Pin_Request,
+    response: Response,
     current_user=Depends(get_current_user),
-    user_service: UserService = Depends(UserService)
+    user_service: UserService = Depends(UserService),
+    auth_service: AuthService = Depends(AuthService)
 ):
     """
     Setup user's PIN and RSA encryption keys.
     
     Args:
         request: PIN and key setup request
+        response: FastAPI Response object for refreshing the access token cookie
         current_user: Currently authenticated user
         user_service: Injected user service
+        auth_service: Injected authentication service
         
     Returns:
         SuccessResponse with updated user information
     """
-    print("hi")
-    print(current_user.user_id)
-    print(request.pin)
-    user_service.create_pin(current_user.user_id, request.pin, request.public_key, request.encrypted_private_key)
-    return SuccessResponse(result=current_user)
+    await user_service.create_pin(current_user.user_id, request.pin, request.public_key, request.encrypted_private_key)
+    user = await user_service.get_user(current_user.user_id)
+    # The key setup flag is part of the token claims, so issue a fresh token
+    set_access_token_cookie(response, auth_service.create_user_token(user))
+    return SuccessResponse(result=user)
 
 @user_router.post(
     "/restore-private-key",
@@ -225,7 +232,7 @@ async def restore_private_key(
     Returns:
         SuccessResponse containing decrypted private key
     """
-    return SuccessResponse(result=user_service.restore_priave_key(current_user.user_id, 
+    return SuccessResponse(result=await user_service.restore_priave_key(current_user.user_id, 
      request.pin))
 
 @user_router.get(
@@ -282,5 +289,72 @@ async def get_user_by_email(email: str, user_service: UserService = Depends(User
     Returns:
         SuccessResponse containing user information if found
     """
-    user = user_service.get_user_by_email(email)
+    user = await user_service.get_user_by_email(email)
     return SuccessResponse(result=user)
+
+@user_router.post(
+    "/public-keys",
+    summary="Get Public Keys of Several Users",
+    description="""
+    **Fetch the RSA public keys needed to share a sheet, in one round trip**
+    
+    To share a sheet, the client wraps the sheet key with each recipient's
+    public key. This endpoint returns the keys of up to 100 users, looked up
+    by ID and/or email.
+    
+    **Returned per user:**
+    - `user_id` and `email`
+    - `public_key` (as sent at key setup)
+    - `fingerprint`: SHA-256 of the key (`SHA256:<base64>`), for display and comparison
+    
+    **Notes:**
+    - Users that do not exist or have not completed their key setup are left out
+    - A user requested by both ID and email is returned once
+    - Served from an in-process cache, refreshed when the user sets up new keys
+    """,
+    response_description="Public key directory entries of the requested users",
+    responses={
+        200: {
+            "description": "Public keys retrieved successfully",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "code": 0,
+                        "message": "successfully",
+                        "result": [
+                            {
+                                "user_id": "0199a0c4-5f1e-7a3b-9c2d-4e5f6a7b8c9d",
+                                "email": "collaborator@example.com",
+                                "public_key": "MIIBIjANBgkqhkiG9w0BAQEFAAOCAQ8AMIIBCgKCAQEA...",
+                                "fingerprint": "SHA256:47DEQpj8HBSa+/TImW+5JCeuQeRkm5NMpJWZG3hSuFU"
+                            }
+                        ]
+                    }
+                }
+            }
+        },
+        401: {
+            "description": "Authentication required"
+        },
+        422: {
+            "description": "No user given, or more than 100 users"
+        }
+    }
+)
+async def get_public_keys(
+    request: PublicKeysRequest,
+    current_user=Depends(get_current_user),
+    user_service: UserService = Depends(UserService)
+):
+    """
+    Get the public keys of several users.
+    
+    Args:
+        request: IDs and/or emails of the users
+        current_user: Currently authenticated user
+        user_service: Injected user service
+        
+    Returns:
+        SuccessResponse containing one entry per user with a public key
+    """
+    return SuccessResponse(result=await user_service.get_public_keys(request.user_ids, request.emails))
@@ -1,7 +1,14 @@
-from sqlalchemy import create_engine
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session
 from config import app_config
+from utils.recent_writers import RecentWriters
+from utils.replica_set import ReplicaSet
+from utils.sql_instrumentation import sql_instrumentation
 
 host = app_config["DATABASE"]["MYSQL"]["HOST"]
 port = app_config["DATABASE"]["MYSQL"]["PORT"]
@@ -10,33 +17,185 @@ password = app_config["DATABASE"]["MYSQL"]["PASSWORD"]
 database = app_config["DATABASE"]["MYSQL"]["DATABASE"]
 
 # Database connection URI (replace with your actual MySQL credentials)
-SQLALCHEMY_DATABASE_URL = "mysql+mysqlconnector://{0}:{1}@{2}:{3}/{4}".format(username, password, host, port, database)
-
-# Create an engine that will interact with the MySQL database
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    echo=True,
-    pool_size=50,
-    max_overflow=20,
-    pool_timeout=30,
-    pool_recycle=300,
-    pool_pre_ping=True,
-    query_cache_size=0
+# DATABASE.URL overrides it, e.g. "sqlite+aiosqlite:///./local.db" for local testing
+SQLALCHEMY_DATABASE_URL = app_config["DATABASE"].get("URL") or \
+    "mysql+aiomysql://{0}:{1}@{2}:{3}/{4}".format(username, password, host, port, database)
+
+# Log every statement only when asked to (slow, prefer SQL_INSTRUMENTATION)
+echo = app_config["DATABASE"].get("ECHO", False)
+
+
+def build_engine(url: str):
+    if url.startswith("sqlite"):
+        return create_async_engine(url, echo=echo)
+    return create_async_engine(
+        url,
+        echo=echo,
+        pool_size=50,
+        max_overflow=20,
+        pool_timeout=30,
+        pool_recycle=300,
+        pool_pre_ping=True,
+        query_cache_size=0
+    )
+
+
+def replica_url(replica: dict) -> str:
+    """URL of a DATABASE.REPLICAS entry: its URL, or MYSQL settings overridden by its own keys."""
+    if replica.get("URL"):
+        return replica["URL"]
+    mysql = {**app_config["DATABASE"]["MYSQL"], **replica}
+    return "mysql+aiomysql://{0}:{1}@{2}:{3}/{4}".format(
+        mysql["USERNAME"], mysql["PASSWORD"], mysql["HOST"], mysql["PORT"], mysql["DATABASE"])
+
+
+# Create an engine that will interact with the MySQL database (the primary: all writes go here)
+engine = build_engine(SQLALCHEMY_DATABASE_URL)
+
+# Optional read replicas, used by @read_only service methods
+replicas = ReplicaSet(
+    [build_engine(replica_url(replica)) for replica in app_config["DATABASE"].get("REPLICAS") or []],
+    check_interval=float(app_config["DATABASE"].get("REPLICA_CHECK_INTERVAL_SECONDS", 5)),
+    max_lag=app_config["DATABASE"].get("REPLICA_MAX_LAG_SECONDS"),
 )
 
+# Users whose reads stay on the primary for a while after they wrote (all workers, over the
+# invalidation bus): later requests of a user see its own writes despite the replication lag
+recent_writers = RecentWriters(window=float(app_config["DATABASE"].get(
+    "REPLICA_STICKINESS_SECONDS", app_config["DATABASE"].get("REPLICA_MAX_LAG_SECONDS") or 5)))
+
+# Per-request statement counts, DB time and N+1 detection
+for _engine in [engine, *replicas.engines]:
+    sql_instrumentation.instrument(_engine.sync_engine)
+
+_read_only: ContextVar[bool] = ContextVar("read_only", default=False)
+# Authenticated user of the request (set by TokenMiddleware)
+request_user: ContextVar[Optional[str]] = ContextVar("request_user", default=None)
+
+
+def read_only(method):
+    """
+    Let the SELECTs issued by ``method`` go to a read replica.
+
+    Only for methods that never write and can live with replication lag. Once
+    the session has written, every later statement of the request stays on the
+    primary, and so do the reads of that user for a few seconds after the commit
+    (see recent_writers), so a user always reads its own writes. Writes made by
+    other users may still show up a replication lag later.
+    """
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+    return wrapper
+
+
+@contextmanager
+def on_primary():
+    """
+    Keep the statements of the block on the primary, even inside a @read_only method.
+
+    For reads whose result gets cached: a lagging replica would otherwise put a
+    row that was just changed (and invalidated) back in the cache until its TTL.
+    """
+    token = _read_only.set(False)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+class RoutingSession(Session):
+    """
+    Sends writes to the primary and the reads of @read_only methods to a replica,
+    unless the session or (recently) its user wrote.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or (clause is not None and not clause.is_select):
+            self.info["wrote"] = True
+        elif (clause is not None and _read_only.get() and not self.info.get("wrote")
+              and request_user.get() not in recent_writers):
+            replica = replicas.choose()
+            if replica is not None:
+                return replica.sync_engine
+        return engine.sync_engine
+
+
 # Create a base class for our models
 Base = declarative_base()
 
 # SessionLocal: A session that interacts with the database
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=True)
+# (objects stay usable after commit without being reloaded)
+SessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, sync_session_class=RoutingSession,
+                                  autoflush=False, expire_on_commit=False)
+
 
-Base.metadata.create_all(bind=engine)  # Add DDL here
+async def init_db():
+    """Bring the schema up to date (called on application startup)."""
+    import model.user, model.sheet, model.user_sheet, model.sheet_purge  # noqa: F401  register the models on Base
+    from migrate import MigrationRunner
+    runner = MigrationRunner(engine)
+    if engine.dialect.name == "sqlite":
+        # Migrations are written for MySQL: local SQLite databases are created from the models
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await runner.baseline()
+    else:
+        # Add DDL in migrations/
+        await runner.migrate()
 
 
 # Dependency to get the database session in FastAPI
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+class UnitOfWork:
+    """
+    One session and one transaction shared by every repository of a request.
+
+    Repositories only flush; the service decides when to commit, so several
+    writes can be batched into a single commit. Whatever is not committed is
+    rolled back when the unit of work is closed.
+    """
+
+    def __init__(self):
+        self.session = SessionLocal()
+        self._after_commit = []
+
+    def after_commit(self, callback) -> None:
+        """Run callback (e.g. a cache invalidation) once the current transaction is committed."""
+        self._after_commit.append(callback)
+
+    async def commit(self):
+        await self.session.commit()
+        if replicas.engines and self.session.sync_session.info.get("wrote"):
+            recent_writers.add(request_user.get())
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            callback()
+
+    async def rollback(self):
+        await self.session.rollback()
+        self._after_commit = []
+
+    async def close(self):
+        await self.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+# Dependency to get the request-scoped unit of work in FastAPI
+# (FastAPI caches it per request, so all services of a request share it)
+async def get_uow():
+    async with UnitOfWork() as uow:
+        yield uow
@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Literal, Optional, List
 
 from fastapi import Query
 from pydantic import BaseModel
@@ -10,3 +10,8 @@ class BasePageRequest(BaseModel):
     # sort_by: Optional[str] = Query(None)
     sorts_by: Optional[List[str]] = Query(None)
     sorts_dir: Optional[List[str]] = Query(None)
+    # "cursor": keyset pagination, pass the previous next_cursor back as cursor (page is ignored)
+    pagination: Literal["page", "cursor"] = Query(default="page")
+    cursor: Optional[str] = Query(None)
+    # Defaults to True in page mode and False in cursor mode (where it may be up to a few seconds stale)
+    include_total: Optional[bool] = Query(None)
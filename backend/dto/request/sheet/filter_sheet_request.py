@@ -7,6 +7,8 @@ class FilterSheetRequest(BasePageRequest):
     user_id: Optional[str] = None
     is_favorite: Optional[bool] = Query(None)
     role: Optional[str] = Query(None)  # owner, editor, viewer
+    # Wrapped sheet keys are left out of the list unless asked for (GET /sheet/sheet-key gives one when a sheet is opened)
+    include_keys: bool = Query(False)
 
     class Config:
         from_attributes = True
@@ -0,0 +1,37 @@
+from typing import List
+from pydantic import BaseModel, Field, model_validator
+
+# Users looked up by one request (user_ids and emails together)
+MAX_PUBLIC_KEY_LOOKUPS = 100
+
+
+class PublicKeysRequest(BaseModel):
+    """Request model for fetching the public keys of the recipients of a sheet"""
+
+    user_ids: List[str] = Field(
+        default=[],
+        description="IDs of the users whose public keys are needed",
+        example=["0199a0c4-5f1e-7a3b-9c2d-4e5f6a7b8c9d"]
+    )
+    emails: List[str] = Field(
+        default=[],
+        description="Emails of the users whose public keys are needed",
+        example=["collaborator@example.com"]
+    )
+
+    @model_validator(mode="after")
+    def check_size(self):
+        if not self.user_ids and not self.emails:
+            raise ValueError("user_ids or emails is required")
+        if len(self.user_ids) + len(self.emails) > MAX_PUBLIC_KEY_LOOKUPS:
+            raise ValueError(f"At most {MAX_PUBLIC_KEY_LOOKUPS} users per request")
+        return self
+
+    class Config:
+        from_attributes = True
+        json_schema_extra = {
+            "example": {
+                "user_ids": ["0199a0c4-5f1e-7a3b-9c2d-4e5f6a7b8c9d"],
+                "emails": ["collaborator@example.com"]
+            }
+        }
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+
+# Authenticated user as recovered from the access token claims (stored in request.state.user)
+class AuthPrincipal(BaseModel):
+    user_id: str
+    email: str
+    has_key_setup: bool = False
+    token_version: int = 0
+
+    class Config:
+        from_attributes = True
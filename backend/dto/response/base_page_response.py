@@ -1,11 +1,13 @@
-from typing import List, Any
+from typing import List, Any, Optional
 
 from pydantic import BaseModel
 
 
 class BasePageResponse(BaseModel):
     items: List[Any]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     page_size: int
-    total_pages: int
\ No newline at end of file
+    total_pages: Optional[int] = None
+    # Only in cursor mode, None on the last page
+    next_cursor: Optional[str] = None
\ No newline at end of file
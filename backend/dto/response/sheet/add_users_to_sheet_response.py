@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class AddUsersToSheetResponse(BaseModel):
+    added_user_ids: List[str] = []
+    # Already members of the sheet (their role and key are left unchanged)
+    skipped_user_ids: List[str] = []
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+
+class SheetDeletionStatusResponse(BaseModel):
+    sheet_id: str
+    # "deleting" while memberships are being purged, then "deleted"
+    status: str
+    deleted_at: Optional[datetime] = None
+    remaining_members: int = 0
+
+    class Config:
+        from_attributes = True
@@ -14,6 +14,54 @@ class SheetResponse(BaseModel):
     is_favorite: Optional[bool] = None
     last_accessed_at: Optional[datetime] = None
     creator: Optional[UserResponse] = None
+    member_count: Optional[int] = None
+    owner_count: Optional[int] = None
+    editor_count: Optional[int] = None
+    viewer_count: Optional[int] = None
+
+    @classmethod
+    def fromUserSheetModel(cls, user_sheet):
+        """Build from a UserSheet whose sheet and sheet creator are loaded"""
+        sheet = user_sheet.sheet
+        return cls(sheet_id=sheet.sheet_id,
+                   link=sheet.link,
+                   creator_id=sheet.creator_id,
+                   created_at=sheet.created_at,
+                   role=user_sheet.role,
+                   encrypted_sheet_key=user_sheet.encrypted_sheet_key,
+                   is_favorite=user_sheet.is_favorite,
+                   last_accessed_at=user_sheet.last_accessed_at,
+                   creator=UserResponse.fromUserModel(sheet.creator) if sheet.creator else None,
+                   member_count=sheet.member_count,
+                   owner_count=sheet.owner_count,
+                   editor_count=sheet.editor_count,
+                   viewer_count=sheet.viewer_count
+                   )
+
+    @classmethod
+    def fromDashboardRow(cls, row):
+        """Build from a sheet list row (DASHBOARD_COLUMNS of the user_sheet repository, maybe with encrypted_sheet_key)"""
+        creator = None
+        if row.creator_email is not None:
+            creator = UserResponse(user_id=row.creator_id,
+                                   email=row.creator_email,
+                                   first_name=row.creator_first_name,
+                                   last_name=row.creator_last_name,
+                                   avatar_url=row.creator_avatar_url)
+        return cls(sheet_id=row.sheet_id,
+                   link=row.link,
+                   creator_id=row.creator_id,
+                   created_at=row.created_at,
+                   role=row.role,
+                   encrypted_sheet_key=row._mapping.get("encrypted_sheet_key"),
+                   is_favorite=row.is_favorite,
+                   last_accessed_at=row.last_accessed_at,
+                   creator=creator,
+                   member_count=row.member_count,
+                   owner_count=row.owner_count,
+                   editor_count=row.editor_count,
+                   viewer_count=row.viewer_count
+                   )
     
     class Config:
         from_attributes = True
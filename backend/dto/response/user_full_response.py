@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from model.user import User
 
 # Get Full Info of user (include use_2fa_login and two_factor_secret)
@@ -12,6 +12,8 @@ class UserFullResponse(BaseModel):
     avatar_url: str
     public_key: str | None
     encrypted_private_key: str | None
+    # Signed into new access tokens ("ver"), not part of the response
+    token_version: int = Field(0, exclude=True)
 
     @classmethod
     def fromUserModel(cls, user_model: User):
@@ -21,7 +23,8 @@ class UserFullResponse(BaseModel):
                    last_name = user_model.last_name,
                    avatar_url = user_model.avatar_url,
                    public_key = user_model.public_key,
-                   encrypted_private_key = user_model.encrypted_private_key
+                   encrypted_private_key = user_model.encrypted_private_key,
+                   token_version = user_model.token_version
                    )
 
     class Config:
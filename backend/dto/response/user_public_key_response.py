@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from utils.key_fingerprint import key_fingerprint
+
+
+# Public key directory entry: what a client needs to wrap a sheet key for the user
+class UserPublicKeyResponse(BaseModel):
+    user_id: str
+    email: str
+    public_key: str
+    fingerprint: str
+
+    @classmethod
+    def fromRow(cls, row):
+        return cls(user_id=row.user_id,
+                   email=row.email,
+                   public_key=row.public_key,
+                   fingerprint=key_fingerprint(row.public_key)
+                   )
+
+    class Config:
+        from_attributes = True
@@ -5,8 +5,14 @@ class ErrorCode(Enum):
     USER_NOT_FOUND = (1002, "User not found")
     INVALID_GOOGLE_TOKEN = (1013, "Invalid Google Token")
     PIN_INVALID = (1015, "Pin is invalid")
+    PASSWORD_HASHER_BUSY = (1016, "Too many PIN operations in progress, please retry")
+    INVALID_KEY = (1017, "Key is empty or too large")
     SHEET_NOT_FOUND = (2001, "Sheet not found")
     EDIT_SHEET_NOT_PERMISSION = (2002, "Edit sheet not permission")
+    INVALID_CURSOR = (2003, "Invalid or expired page cursor")
+    SHEET_ALREADY_EXISTS = (2004, "Sheet already exists")
+    INVALID_SHEET_MEMBERS = (2005, "Members must have completed key setup and be given a sheet key and a valid role")
+    QUERY_BUDGET_EXCEEDED = (9001, "Request exceeded its SQL query budget")
 
     def __init__(self, code: int, error_message: str):
         self.code = code
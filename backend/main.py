@@ -1,4 +1,6 @@
+from contextlib import asynccontextmanager
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 import uvicorn
 import os
 from fastapi import FastAPI, HTTPException, Depends, Request
@@ -6,15 +8,50 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, APIKeyCoo
 from controller.auth_controller import auth_router
 from controller.user_controller import user_router
 from controller.sheet_controller import sheet_router
+from controller.metrics_controller import metrics_router
 from exception.app_exception import AppException
 from exception.global_exception_handler import app_exception_handler, http_exception_handler
 from middleware.token_middleware import TokenMiddleware
+from middleware.query_stats_middleware import QueryStatsMiddleware
 from utils.token import verify_token
 from fastapi.middleware.cors import CORSMiddleware
+from utils.google_certs import google_cert_store
+from utils.http_client import http_client
+from utils.password_hasher import password_hasher
+from database import engine, init_db, replicas
+from service.token_version_table import token_versions
+from service.last_accessed_buffer import last_accessed_buffer
+from service.sheet_purge_worker import sheet_purge_worker
+from utils.invalidation_bus import invalidation_bus
 
 if not os.path.exists("bucket"):
     os.makedirs("bucket")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the Google signing certs so logins never wait on a fetch
+    await run_in_threadpool(google_cert_store.start)
+    await init_db()
+    # Cache invalidations reach the other workers from now on
+    await invalidation_bus.start()
+    await replicas.start()
+    await token_versions.start()
+    await last_accessed_buffer.start()
+    await sheet_purge_worker.start()
+    yield
+    await sheet_purge_worker.stop()
+    # Drain buffered access times before the engine goes away
+    await last_accessed_buffer.stop()
+    await token_versions.stop()
+    await replicas.stop()
+    await invalidation_bus.stop()
+    google_cert_store.stop()
+    await http_client.aclose()
+    password_hasher.shutdown()
+    await engine.dispose()
+
+
 app = FastAPI(
     title="E2EE Google Sheets API",
     description="""
@@ -66,7 +103,8 @@ app = FastAPI(
     ],
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
 # Define Security Schemes for Swagger UI
@@ -112,6 +150,7 @@ app.add_exception_handler(HTTPException, http_exception_handler)
 
 # Add Middleware
 app.add_middleware(TokenMiddleware,)
+app.add_middleware(QueryStatsMiddleware)
 
 
 # Add cors
@@ -159,6 +198,15 @@ app.include_router(
     }
 )
 
+app.include_router(
+    metrics_router,
+    prefix="/api/metrics",
+    tags=["📈 Metrics"],
+    responses={
+        401: {"description": "Unauthorized access"}
+    }
+)
+
 app.mount("/api/bucket", StaticFiles(directory="bucket"), name="bucket")
 
 
@@ -0,0 +1,35 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils.sql_instrumentation import sql_instrumentation
+
+
+class QueryStatsMiddleware:
+    """
+    Pure ASGI middleware recording the SQL statements issued by each request.
+
+    The statement count and DB time are added as X-DB-Query-Count and
+    X-DB-Time-Ms response headers; budget overruns and repeated statements
+    are logged once the request is done.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not sql_instrumentation.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = sql_instrumentation.begin(f'{scope["method"]} {scope["path"]}')
+
+        async def send_with_stats(message: Message):
+            if message["type"] == "http.response.start" and sql_instrumentation.headers:
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.count)
+                headers["X-DB-Time-Ms"] = f"{stats.total_time * 1000:.1f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            sql_instrumentation.end(stats, token)
@@ -1,43 +1,59 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import HTTPException, Request, status
+from fastapi import HTTPException, status
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Receive, Scope, Send
+from database import request_user
 from service.auth_service import AuthService
 from exception.global_exception_handler import get_http_exception_response
 
+# Ignore token check for specific APIs
+WHITE_LIST_API = frozenset(["/api/login/google", "/test", "/docs", "/openapi.json"])
 
-class TokenMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app):
-        super().__init__(app)
-        self.auth_service = AuthService()
 
-    async def dispatch(self, request: Request, call_next):
-        if request.method == "OPTIONS":
-            return await call_next(request)
-        # Ignore token check for specific APIs
-        WHITE_LIST_API = ["/api/login/google", "/test", "/docs", "/openapi.json"]
+class TokenMiddleware:
+    """
+    Pure ASGI authentication middleware.
 
-        if request.url.path in WHITE_LIST_API:
-            response = await call_next(request)
-            return response
-        
+    The token is checked before the downstream app is called, and ``send`` is
+    handed through untouched, so the response stream is never wrapped.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.auth_service = AuthService(uow=None)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in WHITE_LIST_API:
+            await self.app(scope, receive, send)
+            return
+
+        conn = HTTPConnection(scope)
         # Get the token from cookies
-        token = request.cookies.get("access_token")
+        token = conn.cookies.get("access_token")
         if not token:
-            auth_header = request.headers.get("Authorization")
+            auth_header = conn.headers.get("Authorization")
             if auth_header and auth_header.startswith("Bearer "):
                 token = auth_header.split(" ", 1)[1].strip()
 
         if not token:
-            return get_http_exception_response(HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token missing"))
+            response = get_http_exception_response(HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token missing"))
+            await response(scope, receive, send)
+            return
 
         try:
             # Validate the token
-            result = self.auth_service.check_token(token)
-            # Store the decoded token in request state
-            request.state.user = result
+            result = await self.auth_service.check_token(token)
         except Exception as e:
             print("error: ", e)
-            return get_http_exception_response(HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token"))
+            response = get_http_exception_response(HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token"))
+            await response(scope, receive, send)
+            return
 
-        # Process the request further
-        response = await call_next(request)
-        return response
+        # Store the principal in request state (read back as request.state.user)
+        conn.state.user = result
+
+        # Process the request further (reads follow the user's own writes, see database.recent_writers)
+        token = request_user.set(result.user_id)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_user.reset(token)
@@ -0,0 +1,187 @@
+"""
+Versioned schema migrations.
+
+Migrations live in ``migrations/`` as ``<version>_<name>.sql`` or
+``<version>_<name>.py`` (the latter defining ``async def upgrade(conn)``) and
+are applied in version order. Applied versions are recorded in the
+``schema_migrations`` table, so every migration runs once per database.
+
+Usage (from the backend directory):
+    python migrate.py                  # apply pending migrations
+    python migrate.py --status         # list applied / pending migrations
+    python migrate.py --baseline 2     # mark 1..2 as applied without running them
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Set
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.(sql|py)$")
+LOCK_NAME = "schema_migrations"
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP")),
+)
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    path: str
+
+    @property
+    def kind(self) -> str:
+        return self.path.rsplit(".", 1)[1]
+
+
+def split_sql(script: str) -> List[str]:
+    """Split a SQL script into statements (no ';' inside literals in our migrations)."""
+    lines = [line for line in script.splitlines() if not line.strip().startswith("--")]
+    return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+
+class MigrationRunner:
+    def __init__(self, engine: AsyncEngine, directory: str = MIGRATIONS_DIR):
+        self.engine = engine
+        self.directory = directory
+
+    def discover(self) -> List[Migration]:
+        migrations = []
+        for filename in os.listdir(self.directory):
+            match = MIGRATION_FILE.match(filename)
+            if match:
+                migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(self.directory, filename)))
+        migrations.sort(key=lambda migration: migration.version)
+        versions = [migration.version for migration in migrations]
+        if len(versions) != len(set(versions)):
+            raise RuntimeError(f"Duplicate migration versions in {self.directory}")
+        return migrations
+
+    async def applied(self, conn: AsyncConnection) -> Set[int]:
+        await conn.run_sync(schema_migrations.create, checkfirst=True)
+        result = await conn.execute(select(schema_migrations.c.version))
+        return {row.version for row in result}
+
+    async def migrate(self, target: Optional[int] = None) -> List[Migration]:
+        """Apply pending migrations up to ``target`` (all by default) and return them."""
+        done = []
+        async with self.engine.connect() as conn:
+            await self._lock(conn)
+            try:
+                applied = await self.applied(conn)
+                if not applied:
+                    applied = await self._baseline_legacy_schema(conn)
+                for migration in self.discover():
+                    if migration.version in applied or (target is not None and migration.version > target):
+                        continue
+                    print(f"Applying migration {migration.version:04d}_{migration.name}")
+                    await self._apply(conn, migration)
+                    await self._record(conn, migration)
+                    done.append(migration)
+            finally:
+                await self._unlock(conn)
+        return done
+
+    async def baseline(self, version: Optional[int] = None) -> None:
+        """Record migrations up to ``version`` (all by default) as applied without running them."""
+        async with self.engine.connect() as conn:
+            applied = await self.applied(conn)
+            for migration in self.discover():
+                if (version is None or migration.version <= version) and migration.version not in applied:
+                    await self._record(conn, migration)
+
+    async def status(self) -> List[tuple]:
+        async with self.engine.connect() as conn:
+            applied = await self.applied(conn)
+            await conn.commit()
+        return [(migration, migration.version in applied) for migration in self.discover()]
+
+    async def _apply(self, conn: AsyncConnection, migration: Migration) -> None:
+        if migration.kind == "sql":
+            with open(migration.path, "r") as file:
+                statements = split_sql(file.read())
+            for statement in statements:
+                await conn.execute(text(statement))
+        else:
+            spec = importlib.util.spec_from_file_location(f"migration_{migration.version}", migration.path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            await module.upgrade(conn)
+        await conn.commit()
+
+    async def _record(self, conn: AsyncConnection, migration: Migration) -> None:
+        await conn.execute(insert(schema_migrations).values(version=migration.version, name=migration.name))
+        await conn.commit()
+
+    async def _baseline_legacy_schema(self, conn: AsyncConnection) -> Set[int]:
+        """
+        Databases created before the runner existed (migration_v1/v2.sql run by hand,
+        or create_all) already contain migrations 1 and 2: record them instead of failing.
+        """
+        def existing_schema(sync_conn):
+            inspector = inspect(sync_conn)
+            if not inspector.has_table("user"):
+                return set()
+            columns = {column["name"] for column in inspector.get_columns("user")}
+            return {1, 2} if "token_version" in columns else {1}
+
+        versions = await conn.run_sync(existing_schema)
+        for migration in self.discover():
+            if migration.version in versions:
+                print(f"Recording existing schema as migration {migration.version:04d}_{migration.name}")
+                await self._record(conn, migration)
+        return versions
+
+    async def _lock(self, conn: AsyncConnection) -> None:
+        # Several workers may start at once; only one of them migrates at a time
+        if conn.dialect.name == "mysql":
+            result = await conn.execute(text("SELECT GET_LOCK(:name, 60)"), {"name": LOCK_NAME})
+            if result.scalar() != 1:
+                raise RuntimeError("Timed out waiting for the schema migration lock")
+
+    async def _unlock(self, conn: AsyncConnection) -> None:
+        if conn.dialect.name == "mysql":
+            await conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": LOCK_NAME})
+
+
+def main():
+    from database import engine
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--status", action="store_true", help="list applied and pending migrations")
+    parser.add_argument("--baseline", type=int, help="mark migrations up to this version as applied")
+    parser.add_argument("--target", type=int, help="only apply migrations up to this version")
+    args = parser.parse_args()
+
+    runner = MigrationRunner(engine)
+
+    async def run():
+        try:
+            if args.status:
+                for migration, applied in await runner.status():
+                    print(f"[{'x' if applied else ' '}] {migration.version:04d}_{migration.name}.{migration.kind}")
+            elif args.baseline is not None:
+                await runner.baseline(args.baseline)
+            else:
+                done = await runner.migrate(args.target)
+                print(f"{len(done)} migration(s) applied")
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
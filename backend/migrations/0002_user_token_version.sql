@@ -0,0 +1,3 @@
+-- Per-user token version (self-contained JWT claims / revocation)
+ALTER TABLE `user`
+   ADD COLUMN token_version INT NOT NULL DEFAULT 0;
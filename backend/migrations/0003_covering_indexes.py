@@ -0,0 +1,42 @@
+"""
+Indexes matching the SheetService / AuthService hot queries.
+
+Written in Python because databases created by create_all (instead of
+0001_initial_schema.sql) do not have the single-column indexes replaced here.
+"""
+from sqlalchemy import inspect, text
+
+INDEXES = [
+    # /api/sheet/filter: WHERE user_id = ? [AND is_favorite = ?] [AND role = ?] ORDER BY last_accessed_at
+    # (InnoDB appends the primary key, so sheet_id for the join to sheet comes from the index too)
+    ("user_sheet", "idx_usersheet_user_fav_role_accessed",
+     "CREATE INDEX idx_usersheet_user_fav_role_accessed ON user_sheet (user_id, is_favorite, role, last_accessed_at)"),
+    # Members / owner of a sheet: WHERE sheet_id = ? [AND role = ?]
+    ("user_sheet", "idx_usersheet_sheet_role",
+     "CREATE INDEX idx_usersheet_sheet_role ON user_sheet (sheet_id, role)"),
+    # /api/sheet/by-link: WHERE link = ?
+    ("sheet", "idx_sheet_link",
+     "CREATE INDEX idx_sheet_link ON sheet (link(255))"),
+    # Token version reload: WHERE token_version > 0 (only revoked users)
+    ("user", "idx_user_token_version",
+     "CREATE INDEX idx_user_token_version ON `user` (token_version)"),
+]
+
+# Prefixes of the indexes above (user_id also of the primary key)
+DROPPED_INDEXES = [
+    ("user_sheet", "idx_usersheet_sheet"),
+    ("user_sheet", "idx_usersheet_user"),
+]
+
+
+def existing_indexes(sync_conn, table: str) -> set:
+    return {index["name"] for index in inspect(sync_conn).get_indexes(table)}
+
+
+async def upgrade(conn):
+    for table, name, ddl in INDEXES:
+        if name not in await conn.run_sync(existing_indexes, table):
+            await conn.execute(text(ddl))
+    for table, name in DROPPED_INDEXES:
+        if name in await conn.run_sync(existing_indexes, table):
+            await conn.execute(text(f"DROP INDEX {name} ON {table}"))
@@ -0,0 +1,63 @@
+"""
+Canonical spreadsheet key on sheet, unique and indexed, replacing lookups on
+the unindexable link column.
+
+Existing rows are backfilled from their link. When several sheets already
+point to the same spreadsheet, the oldest one keeps the plain key and the
+others get "<key>:<sheet_id>", which stays unique and is still found by
+prefix on the same index (see SheetRepository.get_sheet_by_link).
+"""
+from sqlalchemy import bindparam, inspect, text
+
+from utils.sheet_link import spreadsheet_key
+
+BATCH_SIZE = 1000
+
+
+def sheet_columns(sync_conn) -> set:
+    return {column["name"] for column in inspect(sync_conn).get_columns("sheet")}
+
+
+def sheet_indexes(sync_conn) -> set:
+    return {index["name"] for index in inspect(sync_conn).get_indexes("sheet")}
+
+
+async def upgrade(conn):
+    if "spreadsheet_key" not in await conn.run_sync(sheet_columns):
+        # Spreadsheet IDs are case-sensitive ASCII
+        await conn.execute(text(
+            "ALTER TABLE sheet ADD COLUMN spreadsheet_key VARCHAR(128) CHARACTER SET ascii COLLATE ascii_bin NULL"))
+
+    update = text("UPDATE sheet SET spreadsheet_key = :key WHERE sheet_id = :sheet_id").bindparams(
+        bindparam("key"), bindparam("sheet_id"))
+    seen = set()
+    last_created_at, last_sheet_id = None, ""
+    while True:
+        # Oldest first, so that the first sheet of a spreadsheet keeps the plain key
+        rows = (await conn.execute(text(
+            "SELECT sheet_id, link, created_at FROM sheet "
+            "WHERE :last_created_at IS NULL OR created_at > :last_created_at "
+            "OR (created_at = :last_created_at AND sheet_id > :last_sheet_id) "
+            "ORDER BY created_at, sheet_id LIMIT :limit"
+        ), {"last_created_at": last_created_at, "last_sheet_id": last_sheet_id, "limit": BATCH_SIZE})).all()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            key = spreadsheet_key(row.link)
+            if key in seen:
+                print(f"Sheet {row.sheet_id} duplicates spreadsheet {key}")
+                key = f"{key}:{row.sheet_id}"
+            seen.add(key)
+            updates.append({"key": key, "sheet_id": row.sheet_id})
+        await conn.execute(update, updates)
+        last_created_at, last_sheet_id = rows[-1].created_at, rows[-1].sheet_id
+
+    await conn.execute(text(
+        "ALTER TABLE sheet MODIFY spreadsheet_key VARCHAR(128) CHARACTER SET ascii COLLATE ascii_bin NOT NULL"))
+    indexes = await conn.run_sync(sheet_indexes)
+    if "uq_sheet_spreadsheet_key" not in indexes:
+        await conn.execute(text("CREATE UNIQUE INDEX uq_sheet_spreadsheet_key ON sheet (spreadsheet_key)"))
+    # Lookups by link go through spreadsheet_key now
+    if "idx_sheet_link" in indexes:
+        await conn.execute(text("DROP INDEX idx_sheet_link ON sheet"))
@@ -0,0 +1,40 @@
+"""
+Denormalized member counters on sheet (member_count and one per role), kept
+up to date by SheetService. Existing sheets are backfilled from user_sheet in
+batches of sheets, each counted on idx_usersheet_sheet_role.
+"""
+from sqlalchemy import bindparam, inspect, text
+
+BATCH_SIZE = 1000
+COUNTERS = ["member_count", "owner_count", "editor_count", "viewer_count"]
+
+
+def sheet_columns(sync_conn) -> set:
+    return {column["name"] for column in inspect(sync_conn).get_columns("sheet")}
+
+
+async def upgrade(conn):
+    columns = await conn.run_sync(sheet_columns)
+    for counter in COUNTERS:
+        if counter not in columns:
+            await conn.execute(text(f"ALTER TABLE sheet ADD COLUMN {counter} INT NOT NULL DEFAULT 0"))
+
+    backfill = text(
+        "UPDATE sheet SET "
+        "member_count = (SELECT COUNT(*) FROM user_sheet us WHERE us.sheet_id = sheet.sheet_id), "
+        "owner_count = (SELECT COUNT(*) FROM user_sheet us WHERE us.sheet_id = sheet.sheet_id AND us.role = 'owner'), "
+        "editor_count = (SELECT COUNT(*) FROM user_sheet us WHERE us.sheet_id = sheet.sheet_id AND us.role = 'editor'), "
+        "viewer_count = (SELECT COUNT(*) FROM user_sheet us WHERE us.sheet_id = sheet.sheet_id AND us.role = 'viewer') "
+        "WHERE sheet_id IN :sheet_ids"
+    ).bindparams(bindparam("sheet_ids", expanding=True))
+    last_sheet_id = ""
+    while True:
+        sheet_ids = (await conn.execute(text(
+            "SELECT sheet_id FROM sheet WHERE sheet_id > :last_sheet_id ORDER BY sheet_id LIMIT :limit"
+        ), {"last_sheet_id": last_sheet_id, "limit": BATCH_SIZE})).scalars().all()
+        if not sheet_ids:
+            break
+        await conn.execute(backfill, {"sheet_ids": list(sheet_ids)})
+        # Short transactions on a live table; recounting is idempotent if interrupted
+        await conn.commit()
+        last_sheet_id = sheet_ids[-1]
@@ -0,0 +1,24 @@
+"""
+Tombstone columns on sheet: deleting a sheet sets deleted_at (and deleted_by),
+the memberships and the sheet row are then purged in the background.
+idx_sheet_deleted_at lets the purge worker find pending deletions.
+"""
+from sqlalchemy import inspect, text
+
+
+def sheet_columns(sync_conn) -> set:
+    return {column["name"] for column in inspect(sync_conn).get_columns("sheet")}
+
+
+def sheet_indexes(sync_conn) -> set:
+    return {index["name"] for index in inspect(sync_conn).get_indexes("sheet")}
+
+
+async def upgrade(conn):
+    columns = await conn.run_sync(sheet_columns)
+    if "deleted_at" not in columns:
+        await conn.execute(text("ALTER TABLE sheet ADD COLUMN deleted_at DATETIME NULL"))
+    if "deleted_by" not in columns:
+        await conn.execute(text("ALTER TABLE sheet ADD COLUMN deleted_by CHAR(36) NULL"))
+    if "idx_sheet_deleted_at" not in await conn.run_sync(sheet_indexes):
+        await conn.execute(text("CREATE INDEX idx_sheet_deleted_at ON sheet (deleted_at)"))
@@ -0,0 +1,67 @@
+"""
+UUID keys stored as BINARY(16) instead of CHAR(36) / VARCHAR(36) (see
+utils.binary_uuid.BinaryUUID): user.user_id, sheet.sheet_id / creator_id /
+deleted_by and the user_sheet primary key.
+
+Each column goes through VARBINARY(36) so that the text can be converted in
+place with UNHEX. MySQL rebuilds the three tables: run it in a maintenance
+window. It can be re-run after a failure (converted columns are skipped).
+"""
+from sqlalchemy import inspect, text
+
+# (table, column, nullable)
+UUID_COLUMNS = [
+    ("user", "user_id", False),
+    ("sheet", "sheet_id", False),
+    ("sheet", "creator_id", False),
+    ("sheet", "deleted_by", True),
+    ("user_sheet", "user_id", False),
+    ("user_sheet", "sheet_id", False),
+]
+
+# (table, column, referred table, on delete), all ON UPDATE CASCADE
+FOREIGN_KEYS = [
+    ("sheet", "creator_id", "user", "RESTRICT"),
+    ("user_sheet", "user_id", "user", "CASCADE"),
+    ("user_sheet", "sheet_id", "sheet", "CASCADE"),
+]
+
+
+def column_type(sync_conn, table: str, column: str) -> str:
+    types = {c["name"]: c["type"] for c in inspect(sync_conn).get_columns(table)}
+    return str(types[column]).upper()
+
+
+def foreign_key_names(sync_conn, table: str) -> list:
+    return [fk["name"] for fk in inspect(sync_conn).get_foreign_keys(table)]
+
+
+def index_names(sync_conn, table: str) -> set:
+    return {index["name"] for index in inspect(sync_conn).get_indexes(table)}
+
+
+async def upgrade(conn):
+    # Both sides of a foreign key must have the same type: drop them during the conversion
+    for table, _, _, _ in FOREIGN_KEYS:
+        for name in await conn.run_sync(foreign_key_names, table):
+            await conn.execute(text(f"ALTER TABLE `{table}` DROP FOREIGN KEY `{name}`"))
+
+    for table, column, nullable in UUID_COLUMNS:
+        if await conn.run_sync(column_type, table, column) == "BINARY(16)":
+            continue
+        null = "NULL" if nullable else "NOT NULL"
+        await conn.execute(text(f"ALTER TABLE `{table}` MODIFY `{column}` VARBINARY(36) {null}"))
+        await conn.execute(text(
+            f"UPDATE `{table}` SET `{column}` = UNHEX(REPLACE(`{column}`, '-', '')) WHERE LENGTH(`{column}`) = 36"))
+        # Fails (strict mode) if a value was not a UUID, rather than truncating it
+        await conn.execute(text(f"ALTER TABLE `{table}` MODIFY `{column}` BINARY(16) {null}"))
+
+    for table, column, referred, on_delete in FOREIGN_KEYS:
+        referred_column = f"{referred}_id"
+        await conn.execute(text(
+            f"ALTER TABLE `{table}` ADD CONSTRAINT `fk_{table}_{column}` FOREIGN KEY (`{column}`) "
+            f"REFERENCES `{referred}` (`{referred_column}`) ON UPDATE CASCADE ON DELETE {on_delete}"))
+
+    # Duplicate of the primary key, created by create_all from an old model
+    if "ix_user_user_id" in await conn.run_sync(index_names, "user"):
+        await conn.execute(text("DROP INDEX ix_user_user_id ON `user`"))
@@ -0,0 +1,76 @@
+"""
+Key material stored as VARBINARY instead of TEXT (see
+utils.base64_binary.Base64Binary): user.public_key, user.encrypted_private_key
+and user_sheet.encrypted_sheet_key.
+
+Each column goes through BLOB (the text bytes, unchanged), the values are
+rewritten in batches to their stored form (base64 decoded to raw bytes, other
+text kept verbatim behind a marker byte), then the column gets its final
+VARBINARY type. The rewrite is done here rather than with FROM_BASE64 so that
+it matches the application exactly. It can be re-run after a failure
+(converted columns and rows are skipped).
+"""
+from sqlalchemy import inspect, text
+
+from utils.base64_binary import RAW, TEXT, encode_key
+
+BATCH_SIZE = 1000
+
+# (table, column, length, nullable, primary key)
+KEY_COLUMNS = [
+    ("user", "public_key", 2048, True, ("user_id",)),
+    ("user", "encrypted_private_key", 8192, True, ("user_id",)),
+    ("user_sheet", "encrypted_sheet_key", 1024, False, ("user_id", "sheet_id")),
+]
+
+
+def column_type(sync_conn, table: str, column: str) -> str:
+    types = {c["name"]: c["type"] for c in inspect(sync_conn).get_columns(table)}
+    return str(types[column]).upper()
+
+
+async def convert_rows(conn, table: str, column: str, key: tuple) -> None:
+    key_columns = ", ".join(f"`{name}`" for name in key)
+    placeholders = ", ".join(f":k{i}" for i in range(len(key)))
+    first_batch = text(
+        f"SELECT {key_columns}, `{column}` FROM `{table}` ORDER BY {key_columns} LIMIT :limit")
+    next_batch = text(
+        f"SELECT {key_columns}, `{column}` FROM `{table}` WHERE ({key_columns}) > ({placeholders}) "
+        f"ORDER BY {key_columns} LIMIT :limit")
+    update = text(
+        f"UPDATE `{table}` SET `{column}` = :value WHERE "
+        + " AND ".join(f"`{name}` = :k{i}" for i, name in enumerate(key)))
+
+    last_key = None
+    while True:
+        if last_key is None:
+            rows = (await conn.execute(first_batch, {"limit": BATCH_SIZE})).all()
+        else:
+            rows = (await conn.execute(next_batch, {**last_key, "limit": BATCH_SIZE})).all()
+        if not rows:
+            break
+        # Stored values start with a marker byte, which base64 or PEM text never does
+        params = [
+            {"value": encode_key(bytes(row[-1]).decode("utf-8")),
+             **{f"k{i}": value for i, value in enumerate(row[:-1])}}
+            for row in rows
+            if row[-1] is not None and bytes(row[-1])[:1] not in (RAW, TEXT)
+        ]
+        if params:
+            await conn.execute(update, params)
+        # Short transactions on a live table
+        await conn.commit()
+        last_key = {f"k{i}": value for i, value in enumerate(rows[-1][:-1])}
+
+
+async def upgrade(conn):
+    for table, column, length, nullable, key in KEY_COLUMNS:
+        current = await conn.run_sync(column_type, table, column)
+        if current.startswith("VARBINARY"):
+            continue
+        null = "NULL" if nullable else "NOT NULL"
+        if current != "BLOB":
+            await conn.execute(text(f"ALTER TABLE `{table}` MODIFY `{column}` BLOB {null}"))
+        await convert_rows(conn, table, column, key)
+        # Fails (strict mode) if a value is too large, rather than truncating it
+        await conn.execute(text(f"ALTER TABLE `{table}` MODIFY `{column}` VARBINARY({length}) {null}"))
@@ -0,0 +1,25 @@
+"""
+sheet_purge: one row per purged sheet with the user who deleted it, so that
+the deletion status answers "deleted" to that user only (and "not found" for
+ids that never existed). Old rows are removed by the purge worker, using
+idx_sheet_purge_purged_at.
+"""
+from sqlalchemy import inspect, text
+
+
+def table_names(sync_conn) -> set:
+    return set(inspect(sync_conn).get_table_names())
+
+
+async def upgrade(conn):
+    if "sheet_purge" in await conn.run_sync(table_names):
+        return
+    await conn.execute(text(
+        "CREATE TABLE sheet_purge ("
+        "sheet_id BINARY(16) NOT NULL, "
+        "deleted_by BINARY(16) NOT NULL, "
+        "deleted_at DATETIME NOT NULL, "
+        "purged_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+        "PRIMARY KEY (sheet_id), "
+        "INDEX idx_sheet_purge_purged_at (purged_at))"
+    ))
@@ -1,19 +1,38 @@
-import uuid
-
-from sqlalchemy import Column, String, ForeignKey, DateTime, text
-from sqlalchemy.dialects.mysql import CHAR
+from sqlalchemy import Column, String, ForeignKey, DateTime, Index, Integer, text
+from sqlalchemy.orm import relationship
 from database import Base
+from utils.binary_uuid import BinaryUUID, uuid7
 
 class Sheet(Base):
     __tablename__ = "sheet"
+    __table_args__ = (
+        Index("uq_sheet_spreadsheet_key", "spreadsheet_key", unique=True),
+        Index("idx_sheet_deleted_at", "deleted_at"),
+    )
 
-    sheet_id = Column(CHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()), nullable=False)
+    sheet_id = Column(BinaryUUID, primary_key=True, default=uuid7, nullable=False)
     link = Column(String(1000), nullable=False)
-    creator_id = Column(CHAR(36),ForeignKey("user.user_id", onupdate="CASCADE", ondelete="RESTRICT"),
+    # Google spreadsheet ID extracted from link (see utils.sheet_link), the key for lookups by link
+    spreadsheet_key = Column(String(128), nullable=False)
+    creator_id = Column(BinaryUUID, ForeignKey("user.user_id", onupdate="CASCADE", ondelete="RESTRICT"),
         nullable=False
     )
     created_at = Column(
         DateTime,
         nullable=False,
         server_default=text("CURRENT_TIMESTAMP")
-    )
\ No newline at end of file
+    )
+    # Denormalized from user_sheet, kept up to date by every membership write of SheetService
+    # (under the sheet row lock, see SheetRepository.lock_sheet)
+    member_count = Column(Integer, nullable=False, server_default=text("0"))
+    owner_count = Column(Integer, nullable=False, server_default=text("0"))
+    editor_count = Column(Integer, nullable=False, server_default=text("0"))
+    viewer_count = Column(Integer, nullable=False, server_default=text("0"))
+    # Tombstone: a deleted sheet is gone for every read at once, its rows are purged
+    # in the background (see service/sheet_purge_worker.py)
+    deleted_at = Column(DateTime, nullable=True)
+    deleted_by = Column(BinaryUUID, nullable=True)
+
+    # lazy="raise": async sessions cannot lazy load, relations must be loaded explicitly
+    creator = relationship("User", lazy="raise")
+    members = relationship("UserSheet", back_populates="sheet", lazy="raise", passive_deletes=True)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, DateTime, Index, text
+from database import Base
+from utils.binary_uuid import BinaryUUID
+
+
+class SheetPurge(Base):
+    """
+    A purged sheet and who deleted it, so that the deletion status can still answer
+    that user once the sheet row is gone. Removed after SHEET_PURGE.RECORD_RETENTION_DAYS.
+    """
+    __tablename__ = "sheet_purge"
+    # Kept in sync with migrations/0009_sheet_purge.py
+    __table_args__ = (
+        Index("idx_sheet_purge_purged_at", "purged_at"),
+    )
+
+    sheet_id = Column(BinaryUUID, primary_key=True, nullable=False)
+    deleted_by = Column(BinaryUUID, nullable=False)
+    deleted_at = Column(DateTime, nullable=False)
+    purged_at = Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
@@ -1,15 +1,27 @@
-import uuid
-from sqlalchemy import Column, String, Text
+from sqlalchemy import Column, Index, Integer, String, Text
+from sqlalchemy.orm import deferred, relationship
 from database import Base
+from utils.base64_binary import Base64Binary
+from utils.binary_uuid import BinaryUUID, uuid7
 
 class User(Base):
     __tablename__ = "user"
+    __table_args__ = (
+        Index("idx_user_token_version", "token_version"),
+    )
     
-    user_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    user_id = Column(BinaryUUID, primary_key=True, default=uuid7)
     email = Column(String(255), unique=True, index=True) 
     first_name = Column(String(100), unique=False)
     last_name = Column(String(100), unique=False)
     avatar_url = Column(String(500))
-    pin = Column(Text())
-    public_key = Column(Text())
-    encrypted_private_key = Column(Text())
+    # Large / secret columns are only loaded on request (undefer or a projection);
+    # reading them otherwise raises instead of querying again
+    pin = deferred(Column(Text()), raiseload=True)
+    # Sized for RSA-4096 (SPKI public key, PKCS#8 private key wrapped with the PIN)
+    public_key = deferred(Column(Base64Binary(2048)), group="keys", raiseload=True)
+    encrypted_private_key = deferred(Column(Base64Binary(8192)), group="keys", raiseload=True)
+    # Tokens carrying an older version are rejected (bumped on logout / forced revocation)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+
+    user_sheets = relationship("UserSheet", back_populates="user", lazy="raise", passive_deletes=True)
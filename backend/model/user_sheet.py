@@ -1,19 +1,26 @@
-from sqlalchemy import Column, Enum, Text, Boolean, DateTime, ForeignKey
-from sqlalchemy.dialects.mysql import CHAR
+from sqlalchemy import Column, Enum, Boolean, DateTime, ForeignKey, Index, false
+from sqlalchemy.orm import deferred, relationship
 from database import Base
+from utils.base64_binary import Base64Binary
+from utils.binary_uuid import BinaryUUID
 
 
 class UserSheet(Base):
     __tablename__ = "user_sheet"
+    # Kept in sync with migrations/0003_covering_indexes.py
+    __table_args__ = (
+        Index("idx_usersheet_user_fav_role_accessed", "user_id", "is_favorite", "role", "last_accessed_at"),
+        Index("idx_usersheet_sheet_role", "sheet_id", "role"),
+    )
 
     user_id = Column(
-        CHAR(36),
+        BinaryUUID,
         ForeignKey("user.user_id", onupdate="CASCADE", ondelete="CASCADE"),
         primary_key=True,
         nullable=False
     )
     sheet_id = Column(
-        CHAR(36),
+        BinaryUUID,
         ForeignKey("sheet.sheet_id", onupdate="CASCADE", ondelete="CASCADE"),
         primary_key=True,
         nullable=False
@@ -23,6 +30,11 @@ class UserSheet(Base):
         nullable=False,
         server_default="viewer"
     )
-    encrypted_sheet_key = Column(Text, nullable=False)
-    is_favorite = Column(Boolean, server_default="false", nullable=False)
-    last_accessed_at = Column(DateTime, nullable=True)
\ No newline at end of file
+    # AES key wrapped with the member's RSA key (512 bytes for RSA-4096), loaded on request
+    encrypted_sheet_key = deferred(Column(Base64Binary(1024), nullable=False), raiseload=True)
+    # false() rather than "false": SQLite would store the string, which reads back as True
+    is_favorite = Column(Boolean, server_default=false(), nullable=False)
+    last_accessed_at = Column(DateTime, nullable=True)
+
+    sheet = relationship("Sheet", back_populates="members", lazy="raise")
+    user = relationship("User", back_populates="user_sheets", lazy="raise")
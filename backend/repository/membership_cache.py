@@ -0,0 +1,34 @@
+from typing import Iterable, NamedTuple, Optional
+
+from database import UnitOfWork
+from utils.cache import create_cache
+
+
+class Membership(NamedTuple):
+    role: str
+    encrypted_sheet_key: str
+    is_favorite: bool
+
+
+# (user_id, sheet_id) -> Membership of a live sheet, tagged with sheet_id.
+# Every write to user_sheet (and the deletion of a sheet) goes through forget_memberships
+membership_cache = create_cache("MEMBERSHIP", default_maxsize=100000, default_ttl=60)
+
+
+def forget_memberships(uow: UnitOfWork, sheet_id: str, user_ids: Optional[Iterable[str]] = None) -> None:
+    """
+    Drop the cached memberships of the users (all members without user_ids) of a sheet.
+
+    Done right away and again once the transaction commits: a read running
+    before the commit can still load and cache the old row.
+    """
+    keys = None if user_ids is None else [(user_id, sheet_id) for user_id in user_ids]
+
+    def invalidate():
+        if keys is None:
+            membership_cache.invalidate_tag(sheet_id)
+        else:
+            membership_cache.invalidate_many(keys)
+
+    invalidate()
+    uow.after_commit(invalidate)
@@ -1,32 +1,157 @@
-from typing import Optional
-from sqlalchemy.orm import Session
-from database import SessionLocal
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import and_, delete, func, or_, select, update
+from database import UnitOfWork
 from model.sheet import Sheet
+from model.sheet_purge import SheetPurge
+from utils.sheet_link import spreadsheet_key
+
+# Per-role member counter of a sheet
+ROLE_COUNTERS = {"owner": "owner_count", "editor": "editor_count", "viewer": "viewer_count"}
+
+
+def spreadsheet_key_filter(link: str):
+    """
+    Index lookup of the sheet(s) of the spreadsheet a link points to, whatever the URL variant.
+    Sheets registered twice before keys were unique carry "<key>:<sheet_id>".
+    """
+    key = spreadsheet_key(link)
+    # "<key>:..." as a range (";" follows ":"), which both MySQL and SQLite resolve on the index.
+    # The range can still match deleted sheets: callers filter on deleted_at
+    return or_(
+        Sheet.spreadsheet_key == key,
+        and_(Sheet.spreadsheet_key > key + ":", Sheet.spreadsheet_key < key + ";")
+    )
 
 
 class SheetRepository:
-    def create_sheet(self, link: str, creator_id: str) -> Sheet:
+    def __init__(self, uow: UnitOfWork):
+        self.db = uow.session
+
+    async def create_sheet(self, link: str, creator_id: str, roles: Optional[Dict[str, int]] = None) -> Sheet:
         """
         Create a new sheet and return the persisted entity (with generated sheet_id).
+        ``roles`` ({role: count}) are the members about to be added, for the member counters.
+        """
+        roles = roles or {}
+        sheet = Sheet(link=link, spreadsheet_key=spreadsheet_key(link), creator_id=creator_id,
+                      member_count=sum(roles.values()),
+                      **{counter: roles.get(role, 0) for role, counter in ROLE_COUNTERS.items()})
+        self.db.add(sheet)
+        await self.db.flush()
+        # created_at is generated by the database
+        await self.db.refresh(sheet, ["created_at"])
+        return sheet
+
+    async def get_sheet_by_id(self, sheet_id: str) -> Optional[Sheet]:
+        """
+        Return the sheet entity for a given sheet_id. None if not found or deleted.
+        """
+        result = await self.db.execute(
+            select(Sheet).filter(and_(Sheet.sheet_id == sheet_id, Sheet.deleted_at.is_(None))))
+        return result.scalars().first()
+
+    async def lock_sheet(self, sheet_id: str) -> Optional[Sheet]:
+        """
+        Return the sheet with its row locked until the end of the transaction. Membership
+        writes take this lock first, so they are serialized per sheet and the member
+        counters stay exact. None if not found or deleted.
+        """
+        result = await self.db.execute(
+            select(Sheet).filter(and_(Sheet.sheet_id == sheet_id, Sheet.deleted_at.is_(None))).with_for_update()
+            # Counters as of the lock, even if the sheet was loaded before in this session
+            .execution_options(populate_existing=True))
+        return result.scalars().first()
+
+    async def adjust_member_counts(self, sheet_id: str, deltas: Dict[str, int]) -> None:
+        """
+        Add ``deltas`` ({role: +n / -n}) to the member counters of the sheet, in one UPDATE.
+        """
+        values = {ROLE_COUNTERS[role]: getattr(Sheet, ROLE_COUNTERS[role]) + delta
+                  for role, delta in deltas.items() if delta}
+        total = sum(deltas.values())
+        if total:
+            values["member_count"] = Sheet.member_count + total
+        if values:
+            await self.db.execute(update(Sheet).filter(Sheet.sheet_id == sheet_id).values(**values))
+
+    async def get_link_by_sheet_id(self, sheet_id: str) -> Optional[str]:
+        """
+        Return the sheet link for a given sheet_id. None if not found or deleted.
+        """
+        result = await self.db.execute(
+            select(Sheet.link).filter(and_(Sheet.sheet_id == sheet_id, Sheet.deleted_at.is_(None))))
+        return result.scalar()
+
+    async def get_sheet_by_link(self, link: str) -> Optional[Sheet]:
+        """
+        Return the sheet entity for a given link (any URL variant of the spreadsheet). None if not found or deleted.
+        """
+        result = await self.db.execute(
+            # deleted_at only filters the few rows found by key: wrapped so that no planner
+            # looks them up through idx_sheet_deleted_at, where nearly every sheet is NULL
+            select(Sheet).filter(and_(spreadsheet_key_filter(link), func.coalesce(Sheet.deleted_at, None).is_(None)))
+            .order_by(Sheet.created_at))
+        return result.scalars().first()
+
+    async def exists_by_link(self, link: str) -> bool:
+        result = await self.db.execute(
+            select(Sheet.sheet_id).filter(Sheet.spreadsheet_key == spreadsheet_key(link)))
+        return result.first() is not None
+
+    # --- Deletion (tombstone, then background purge) ---
+    async def tombstone_sheet(self, sheet: Sheet, deleted_by: str) -> None:
+        """
+        Mark the sheet deleted: from now on every read treats it as gone. Its spreadsheet
+        key becomes "#<sheet_id>" (no spreadsheet key starts with "#", and it fits the
+        column whatever the length of the original key), so the spreadsheet can be
+        registered again before the purge is done.
         """
-        with SessionLocal() as db:
-            sheet = Sheet(link=link, creator_id=creator_id)
-            db.add(sheet)
-            db.commit()
-            db.refresh(sheet)
-            return sheet
+        sheet.deleted_at = datetime.utcnow().replace(microsecond=0)
+        sheet.deleted_by = deleted_by
+        sheet.spreadsheet_key = f"#{sheet.sheet_id}"
+        await self.db.flush()
 
-    def get_link_by_sheet_id(self, sheet_id: str) -> Optional[str]:
+    async def get_deleted_sheet(self, sheet_id: str, lock: bool = False) -> Optional[Sheet]:
         """
-        Return the sheet link for a given sheet_id. None if not found.
+        Return the sheet if it is deleted but not purged yet (row-locked with ``lock``). None otherwise.
         """
-        with SessionLocal() as db:  # type: Session
-            row = db.query(Sheet.link).filter(Sheet.sheet_id == sheet_id).first()
-            return row[0] if row else None
+        query = select(Sheet).filter(and_(Sheet.sheet_id == sheet_id, Sheet.deleted_at.is_not(None)))
+        if lock:
+            query = query.with_for_update().execution_options(populate_existing=True)
+        result = await self.db.execute(query)
+        return result.scalars().first()
 
-    def get_sheet_by_link(self, link: str) -> Optional[Sheet]:
+    async def get_sheet_ids_to_purge(self, limit: int) -> List[str]:
         """
-        Return the sheet entity for a given link. None if not found.
+        Deleted sheets waiting for the purge, oldest deletion first.
+        """
+        result = await self.db.execute(
+            select(Sheet.sheet_id).filter(Sheet.deleted_at.is_not(None)).order_by(Sheet.deleted_at).limit(limit))
+        return [row.sheet_id for row in result]
+
+    async def purge_sheet(self, sheet: Sheet) -> None:
         """
-        with SessionLocal() as db:  # type: Session
-            return db.query(Sheet).filter(Sheet.link == link).first()
\ No newline at end of file
+        Delete the row of a deleted sheet (once its memberships are gone), recording
+        who deleted it for the deletion status.
+        """
+        if sheet.deleted_by:
+            self.db.add(SheetPurge(sheet_id=sheet.sheet_id, deleted_by=sheet.deleted_by, deleted_at=sheet.deleted_at))
+            await self.db.flush()
+        await self.db.execute(
+            delete(Sheet).filter(and_(Sheet.sheet_id == sheet.sheet_id, Sheet.deleted_at.is_not(None)))
+            .execution_options(synchronize_session=False)
+        )
+
+    async def get_sheet_purge(self, sheet_id: str) -> Optional[SheetPurge]:
+        """The record of a purged sheet, None if it was never purged (or the record expired)."""
+        result = await self.db.execute(select(SheetPurge).filter(SheetPurge.sheet_id == sheet_id))
+        return result.scalars().first()
+
+    async def delete_sheet_purges(self, purged_before: datetime) -> int:
+        """Drop the records of sheets purged before ``purged_before``; returns how many were removed."""
+        result = await self.db.execute(
+            delete(SheetPurge).filter(SheetPurge.purged_at < purged_before)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
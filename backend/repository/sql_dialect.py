@@ -0,0 +1,36 @@
+from typing import Callable, Dict, List
+
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def dialect_name(db: AsyncSession) -> str:
+    return db.get_bind().dialect.name
+
+
+def upsert(db: AsyncSession, model, values: dict, conflict_columns: List, update: Callable[[object], Dict]):
+    """
+    Build an INSERT that updates the existing row on a unique-key conflict
+    (ON DUPLICATE KEY UPDATE on MySQL, ON CONFLICT DO UPDATE on SQLite).
+
+    ``update`` receives the proposed row (``inserted`` / ``excluded``) and
+    returns the column -> expression mapping to apply on conflict.
+    """
+    if dialect_name(db) == "sqlite":
+        stmt = sqlite.insert(model).values(**values)
+        return stmt.on_conflict_do_update(index_elements=conflict_columns, set_=update(stmt.excluded))
+    stmt = mysql.insert(model).values(**values)
+    return stmt.on_duplicate_key_update(**update(stmt.inserted))
+
+
+def insert_skip_duplicates(db: AsyncSession, model, no_op_column):
+    """
+    Build an INSERT that leaves rows conflicting on a unique key untouched
+    (no-op ON DUPLICATE KEY UPDATE on MySQL, ON CONFLICT DO NOTHING on SQLite).
+
+    Unlike INSERT IGNORE, other errors (foreign keys, truncation) still fail.
+    Add the rows with ``.values([...])`` to send them as one multi-row statement.
+    """
+    if dialect_name(db) == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing()
+    return mysql.insert(model).on_duplicate_key_update({no_op_column.name: no_op_column})
@@ -1,53 +1,138 @@
-from database import SessionLocal
+from utils.binary_uuid import uuid7
+from typing import Optional
+from sqlalchemy import Row, func, or_, select, update
+from sqlalchemy.orm import undefer_group
+from database import UnitOfWork
 from model.user import User
+from repository.sql_dialect import upsert
+
+# Public profile (UserResponse): member lists, sheet creators
+PROFILE_COLUMNS = (User.user_id, User.email, User.first_name, User.last_name, User.avatar_url)
 
 class UserRepository:
+    def __init__(self, uow: UnitOfWork):
+        self.db = uow.session
 
-    def create_user_google(
+    async def create_user_google(
         self,
         email: str,
         first_name: str,
         last_name: str,
         avatar_url: str,
     ) -> User:
-        with SessionLocal() as db:
-            db_user = User(
+        db_user = User(
+            email=email,
+            first_name=first_name,
+            last_name=last_name,
+            avatar_url=avatar_url,
+        )
+        self.db.add(db_user)
+        await self.db.flush()
+        return db_user
+
+    async def upsert_user_google(
+        self,
+        email: str,
+        first_name: str,
+        last_name: str,
+        avatar_url: str,
+    ) -> User:
+        """
+        Create the user or refresh the profile fields of the existing one with a
+        single INSERT ... ON DUPLICATE KEY UPDATE, then return the stored row.
+        Safe against concurrent first logins racing on the unique email.
+        """
+        stmt = upsert(
+            self.db,
+            User,
+            values=dict(
+                user_id=uuid7(),
                 email=email,
                 first_name=first_name,
                 last_name=last_name,
                 avatar_url=avatar_url,
+            ),
+            conflict_columns=[User.email],
+            # Keep the stored value when Google omits a field
+            update=lambda row: dict(
+                first_name=func.coalesce(row.first_name, User.first_name),
+                last_name=func.coalesce(row.last_name, User.last_name),
+                avatar_url=func.coalesce(row.avatar_url, User.avatar_url),
             )
-            db.add(db_user)
-            db.commit()
-            db.refresh(db_user)
-            return db_user
-
-    def get_user_by_id(self, user_id: str) -> User:
-        with SessionLocal() as db:
-            return db.query(User).filter(User.user_id == user_id).first()
-
-    def get_user_by_email(self, email: str) -> User:
-        with SessionLocal() as db:
-            query = db.query(User).filter(User.email == email)
-            db_user = query.first()
-            if db_user:
-                db.refresh(db_user)
-            return db_user
-
-    def check_user_exist_by_email(self, email: str) -> bool:
-        with SessionLocal() as db:
-            query = db.query(User).filter(User.email == email)
-            return query.first() is not None
-
-    def create_pin(self, user_id: str, pin: str, public_key: str, encrypted_private_key: str):
-        with SessionLocal() as db:
-            db_user = db.query(User).filter(User.user_id == user_id).first()
-            if db_user:
-                db_user.pin = pin
-                db_user.public_key = public_key
-                db_user.encrypted_private_key = encrypted_private_key
-                db.commit()
-                db.refresh(db_user)
-                return True
-            return False
+        )
+        await self.db.execute(stmt)
+        result = await self.db.execute(
+            select(User).options(undefer_group("keys")).filter(User.email == email)
+            .execution_options(populate_existing=True))
+        return result.scalars().first()
+
+    async def get_user_by_id(self, user_id: str) -> User:
+        """The user with the key pair loaded (the PIN hash stays deferred)."""
+        result = await self.db.execute(select(User).options(undefer_group("keys")).filter(User.user_id == user_id))
+        return result.scalars().first()
+
+    async def get_user_by_email(self, email: str) -> User:
+        """The user with the key pair loaded (the PIN hash stays deferred)."""
+        result = await self.db.execute(select(User).options(undefer_group("keys")).filter(User.email == email))
+        return result.scalars().first()
+
+    async def get_principal_by_email(self, email: str) -> Optional[Row]:
+        """(user_id, email, has_key_setup) of the user: what authentication needs, without the keys."""
+        result = await self.db.execute(
+            select(User.user_id, User.email, User.public_key.is_not(None).label("has_key_setup"))
+            .filter(User.email == email))
+        return result.first()
+
+    async def get_pin_and_keys(self, user_id: str) -> Optional[Row]:
+        """(pin, public_key, encrypted_private_key) of the user, for key recovery."""
+        result = await self.db.execute(
+            select(User.pin, User.public_key, User.encrypted_private_key).filter(User.user_id == user_id))
+        return result.first()
+
+    async def get_public_keys(self, user_ids: list[str], emails: list[str]) -> list[Row]:
+        """(user_id, email, public_key) of the given users that completed their key setup."""
+        result = await self.db.execute(
+            select(User.user_id, User.email, User.public_key)
+            .filter(or_(User.user_id.in_(user_ids), User.email.in_(emails)), User.public_key.is_not(None)))
+        return list(result.all())
+
+    async def get_user_ids_with_key_setup(self, user_ids: list[str]) -> set:
+        """The subset of user_ids that exist and have completed their key setup."""
+        result = await self.db.execute(
+            select(User.user_id).filter(User.user_id.in_(user_ids), User.public_key.is_not(None)))
+        return {row.user_id for row in result}
+
+    async def check_user_exist_by_email(self, email: str) -> bool:
+        result = await self.db.execute(select(User.user_id).filter(User.email == email))
+        return result.first() is not None
+
+    async def create_pin(self, user_id: str, pin: str, public_key: str, encrypted_private_key: str):
+        # Only written: no need to load the previous keys
+        db_user = await self.db.get(User, user_id)
+        if db_user:
+            db_user.pin = pin
+            db_user.public_key = public_key
+            db_user.encrypted_private_key = encrypted_private_key
+            await self.db.flush()
+            return True
+        return False
+
+    async def get_revoked_token_versions(self) -> dict[str, int]:
+        """
+        Return {user_id: token_version} for every user whose tokens were revoked at least once.
+        """
+        result = await self.db.execute(select(User.user_id, User.token_version).filter(User.token_version > 0))
+        return {row.user_id: row.token_version for row in result}
 
+    async def increment_token_version(self, user_id: str) -> int:
+        """
+        Bump the user's token version and return the new value (0 if the user does not exist).
+        """
+        result = await self.db.execute(
+            update(User).where(User.user_id == user_id)
+            .values(token_version=User.token_version + 1)
+            .execution_options(synchronize_session=False))
+        if not result.rowcount:
+            return 0
+        result = await self.db.execute(select(User.token_version).filter(User.user_id == user_id))
+        return result.scalar()
@@ -1,15 +1,35 @@
-from typing import List, Optional
-from sqlalchemy import and_
-from database import get_db
+from typing import Dict, List, Optional
+from sqlalchemy import Row, and_, bindparam, delete, func, or_, select, update
+from sqlalchemy.orm import aliased, contains_eager, undefer
+from database import UnitOfWork, on_primary
+from model.sheet import Sheet
 from model.user import User
 from model.user_sheet import UserSheet
+from repository.membership_cache import Membership, forget_memberships, membership_cache
+from repository.sheet_repository import spreadsheet_key_filter
+from repository.sql_dialect import insert_skip_duplicates
+from repository.user_repository import PROFILE_COLUMNS
+
+Creator = aliased(User, name="creator")
+# One sheet list (dashboard) row: membership, sheet and creator profile, without the wrapped key
+DASHBOARD_COLUMNS = (
+    Sheet.sheet_id, Sheet.link, Sheet.creator_id, Sheet.created_at,
+    Sheet.member_count, Sheet.owner_count, Sheet.editor_count, Sheet.viewer_count,
+    UserSheet.role, UserSheet.is_favorite, UserSheet.last_accessed_at,
+    Creator.email.label("creator_email"), Creator.first_name.label("creator_first_name"),
+    Creator.last_name.label("creator_last_name"), Creator.avatar_url.label("creator_avatar_url"),
+)
 
 
 class UserSheetRepository:
-    def __init__(self):
-        self.db = next(get_db())
+    # Rows per multi-row INSERT
+    BULK_INSERT_SIZE = 500
+
+    def __init__(self, uow: UnitOfWork):
+        self.uow = uow
+        self.db = uow.session
 
-    def create_user_sheet(
+    async def create_user_sheet(
             self,
             user_id: str,
             sheet_id: str,
@@ -28,103 +48,248 @@ class UserSheetRepository:
             is_favorite=is_favorite
         )
         self.db.add(db_user_sheet)
-        self.db.commit()
-        self.db.refresh(db_user_sheet)
+        await self.db.flush()
+        forget_memberships(self.uow, sheet_id, [user_id])
         return db_user_sheet
 
-    def check_exist_by_user_id_and_sheet_id(self, user_id: str, sheet_id: str) -> bool:
-        return (
-                self.db.query(UserSheet)
-                .filter(and_(UserSheet.user_id == user_id, UserSheet.sheet_id == sheet_id))
-                .first()
-                is not None
+    async def bulk_create_user_sheets(self, sheet_id: str, members: List[dict]) -> None:
+        """
+        Add members ({user_id, encrypted_sheet_key, role}) with multi-row INSERTs,
+        skipping users that are already members of the sheet.
+        """
+        for start in range(0, len(members), self.BULK_INSERT_SIZE):
+            rows = [dict(member, sheet_id=sheet_id, is_favorite=False)
+                    for member in members[start:start + self.BULK_INSERT_SIZE]]
+            await self.db.execute(insert_skip_duplicates(self.db, UserSheet, UserSheet.user_id).values(rows))
+        forget_memberships(self.uow, sheet_id, [member["user_id"] for member in members])
+
+    async def get_member_ids(self, sheet_id: str, user_ids: List[str]) -> set:
+        """The subset of user_ids that are already members of the sheet."""
+        result = await self.db.execute(
+            select(UserSheet.user_id)
+            .filter(and_(UserSheet.sheet_id == sheet_id, UserSheet.user_id.in_(user_ids)))
+        )
+        return {row.user_id for row in result}
+
+    async def get_member_roles(self, sheet_id: str, user_ids: List[str]) -> Dict[str, str]:
+        """{user_id: role} for the users of user_ids that are members of the sheet."""
+        result = await self.db.execute(
+            select(UserSheet.user_id, UserSheet.role)
+            .filter(and_(UserSheet.sheet_id == sheet_id, UserSheet.user_id.in_(user_ids)))
         )
+        return {row.user_id: row.role for row in result}
 
-    def delete_user_sheet_by_user_id_and_sheet_id(self, user_id: str, sheet_id: str) -> None:
-        row = (
-            self.db.query(UserSheet)
-            .filter(and_(UserSheet.user_id == user_id, UserSheet.sheet_id == sheet_id))
-            .first()
+    async def check_exist_by_user_id_and_sheet_id(self, user_id: str, sheet_id: str) -> bool:
+        result = await self.db.execute(
+            select(UserSheet.user_id)
+            .join(UserSheet.sheet)
+            .filter(and_(UserSheet.user_id == user_id, UserSheet.sheet_id == sheet_id, Sheet.deleted_at.is_(None)))
         )
+        return result.first() is not None
+
+    async def delete_user_sheet_by_user_id_and_sheet_id(self, user_id: str, sheet_id: str) -> None:
+        row = await self.get_user_sheet_by_user_id_and_sheet_id(user_id, sheet_id)
         if row:
-            self.db.delete(row)
-            self.db.commit()
+            await self.db.delete(row)
+            await self.db.flush()
+            forget_memberships(self.uow, sheet_id, [user_id])
 
-    def get_user_in_sheet(self, sheet_id: str) -> List[User]:
-        query = self.db.query(User)
-        query = query.join(
+    async def get_user_in_sheet(self, sheet_id: str) -> List[Row]:
+        """Public profiles (PROFILE_COLUMNS) of the members, by email."""
+        query = select(*PROFILE_COLUMNS).join(
             UserSheet,
             and_(User.user_id == UserSheet.user_id, UserSheet.sheet_id == sheet_id)
         )
-        return query.order_by(User.email.asc()).all()
+        result = await self.db.execute(query.order_by(User.email.asc()))
+        return list(result.all())
 
-    def get_sheet_of_user(self, user_id: str) -> List[str]:
-        rows = self.db.query(UserSheet.sheet_id).filter(UserSheet.user_id == user_id).all()
-        return [row.sheet_id for row in rows]
+    async def get_sheet_of_user(self, user_id: str) -> List[str]:
+        result = await self.db.execute(select(UserSheet.sheet_id).filter(UserSheet.user_id == user_id))
+        return [row.sheet_id for row in result]
 
-    def delete_user_sheet_by_sheet_id(self, sheet_id: str) -> None:
-        self.db.query(UserSheet).filter(UserSheet.sheet_id == sheet_id).delete()
-        self.db.commit()
+    async def delete_user_sheet_by_sheet_id(self, sheet_id: str) -> None:
+        await self.db.execute(
+            delete(UserSheet).filter(UserSheet.sheet_id == sheet_id)
+            .execution_options(synchronize_session=False)
+        )
+        forget_memberships(self.uow, sheet_id)
 
-    def delete_user_sheet_by_sheet_id_and_list_user_id(self, sheet_id: str, list_user_id: list[str]) -> None:
-        self.db.query(UserSheet).filter(
-            and_(UserSheet.sheet_id == sheet_id, UserSheet.user_id.in_(list_user_id))
-        ).delete(synchronize_session=False)
-        self.db.commit()
+    async def delete_user_sheet_by_sheet_id_and_list_user_id(self, sheet_id: str, list_user_id: list[str]) -> None:
+        await self.db.execute(
+            delete(UserSheet).filter(
+                and_(UserSheet.sheet_id == sheet_id, UserSheet.user_id.in_(list_user_id))
+            ).execution_options(synchronize_session=False)
+        )
+        forget_memberships(self.uow, sheet_id, list_user_id)
 
-    def save_all(self, list_user_sheet: list[UserSheet]) -> None:
+    async def save_all(self, list_user_sheet: list[UserSheet]) -> None:
         for us in list_user_sheet:
             if not us.encrypted_sheet_key or not us.encrypted_sheet_key.strip():
                 raise ValueError("encrypted_sheet_key is required for all UserSheet items")
-        self.db.bulk_save_objects(list_user_sheet)
-        self.db.commit()
-
-    def get_user_sheet_by_user_id_and_sheet_id(self, user_id: str, sheet_id: str) -> Optional[UserSheet]:
-        return (
-            self.db.query(UserSheet)
-            .filter(and_(UserSheet.user_id == user_id, UserSheet.sheet_id == sheet_id))
-            .first()
+        self.db.add_all(list_user_sheet)
+        await self.db.flush()
+        for us in list_user_sheet:
+            forget_memberships(self.uow, us.sheet_id, [us.user_id])
+
+    async def get_user_sheet_by_user_id_and_sheet_id(self, user_id: str, sheet_id: str) -> Optional[UserSheet]:
+        # Memberships of a deleted sheet are gone, even before the purge removes them
+        result = await self.db.execute(
+            select(UserSheet)
+            .join(UserSheet.sheet)
+            .filter(and_(UserSheet.user_id == user_id, UserSheet.sheet_id == sheet_id, Sheet.deleted_at.is_(None)))
+        )
+        return result.scalars().first()
+
+    async def get_membership(self, user_id: str, sheet_id: str) -> Optional[Membership]:
+        """
+        Role, wrapped key and favorite flag of the user in a live sheet (None if not a
+        member), served from the membership cache when possible. Misses are read from
+        the primary, also from @read_only methods: a replica could still hold a removed
+        member or an old role, which would stay cached after the invalidation.
+        """
+        key = (user_id, sheet_id)
+        membership = membership_cache.get(key)
+        if membership is None:
+            with on_primary():
+                result = await self.db.execute(
+                    select(UserSheet.role, UserSheet.encrypted_sheet_key, UserSheet.is_favorite)
+                    .join(UserSheet.sheet)
+                    .filter(and_(UserSheet.user_id == user_id, UserSheet.sheet_id == sheet_id,
+                                 Sheet.deleted_at.is_(None)))
+                )
+            row = result.first()
+            if row is None:
+                return None
+            membership = Membership(*row)
+            membership_cache.set(key, membership, tags=(sheet_id,))
+        return membership
+
+    async def get_member_batch(self, sheet_id: str, limit: int) -> Dict[str, str]:
+        """{user_id: role} for up to ``limit`` members of the sheet (purge of deleted sheets)."""
+        result = await self.db.execute(
+            select(UserSheet.user_id, UserSheet.role).filter(UserSheet.sheet_id == sheet_id).limit(limit)
+        )
+        return {row.user_id: row.role for row in result}
+
+    async def get_user_sheet_with_sheet(self, user_id: str, sheet_id: str) -> Optional[UserSheet]:
+        """
+        Return the user's membership (wrapped key included) with its sheet and the
+        sheet creator loaded, in one query.
+        """
+        result = await self.db.execute(
+            select(UserSheet)
+            .join(UserSheet.sheet)
+            .options(undefer(UserSheet.encrypted_sheet_key), contains_eager(UserSheet.sheet).joinedload(Sheet.creator))
+            .filter(and_(UserSheet.user_id == user_id, UserSheet.sheet_id == sheet_id, Sheet.deleted_at.is_(None)))
         )
+        return result.scalars().first()
+
+    async def get_user_sheet_by_link(self, user_id: str, link: str) -> Optional[UserSheet]:
+        """
+        Same as get_user_sheet_with_sheet, looking the sheet up by link (any URL variant).
+        """
+        result = await self.db.execute(
+            select(UserSheet)
+            .join(UserSheet.sheet)
+            .options(undefer(UserSheet.encrypted_sheet_key), contains_eager(UserSheet.sheet).joinedload(Sheet.creator))
+            .filter(and_(UserSheet.user_id == user_id, spreadsheet_key_filter(link), Sheet.deleted_at.is_(None)))
+        )
+        return result.scalars().first()
+
+    def _filter_sheets_of_user(self, columns, user_id: str, is_favorite: Optional[bool], role: Optional[str]):
+        query = select(*columns).select_from(UserSheet).join(UserSheet.sheet).filter(
+            and_(UserSheet.user_id == user_id, Sheet.deleted_at.is_(None)))
+        if is_favorite is not None:
+            query = query.filter(UserSheet.is_favorite == is_favorite)
+        if role:
+            query = query.filter(UserSheet.role == role)
+        return query
+
+    async def filter_sheets_of_user(
+            self,
+            user_id: str,
+            is_favorite: Optional[bool],
+            role: Optional[str],
+            order_by: list,
+            offset: int,
+            limit: int,
+            after=None,
+            with_keys: bool = False
+    ) -> List[Row]:
+        """
+        One page of the user's memberships as DASHBOARD_COLUMNS rows (plus
+        encrypted_sheet_key with ``with_keys``), creator included, from a single
+        query and without building ORM objects.
+        ``after`` is an optional keyset condition (cursor pagination).
+        """
+        columns = DASHBOARD_COLUMNS + ((UserSheet.encrypted_sheet_key,) if with_keys else ())
+        query = self._filter_sheets_of_user(columns, user_id, is_favorite, role)
+        if after is not None:
+            query = query.filter(after)
+        query = (
+            query
+            .outerjoin(Creator, Creator.user_id == Sheet.creator_id)
+            .order_by(*order_by)
+            .offset(offset)
+            .limit(limit)
+        )
+        result = await self.db.execute(query)
+        return list(result.all())
+
+    async def count_sheets_of_user(self, user_id: str, is_favorite: Optional[bool], role: Optional[str]) -> int:
+        query = self._filter_sheets_of_user((UserSheet.sheet_id,), user_id, is_favorite, role)
+        result = await self.db.execute(select(func.count()).select_from(query.subquery()))
+        return result.scalar()
+
+    async def bulk_update_last_accessed(self, rows: List[dict]) -> None:
+        """
+        Set last_accessed_at for many memberships ({user_id, sheet_id, last_accessed_at})
+        with one executemany UPDATE. Timestamps never move backwards, so flushes from
+        several workers can interleave freely.
+        """
+        table = UserSheet.__table__
+        stmt = (
+            update(table)
+            .where(and_(
+                table.c.user_id == bindparam("b_user_id"),
+                table.c.sheet_id == bindparam("b_sheet_id"),
+                or_(table.c.last_accessed_at.is_(None), table.c.last_accessed_at < bindparam("b_accessed_at"))
+            ))
+            .values(last_accessed_at=bindparam("b_accessed_at"))
+        )
+        await self.db.execute(stmt, [
+            {"b_user_id": row["user_id"], "b_sheet_id": row["sheet_id"], "b_accessed_at": row["last_accessed_at"]}
+            for row in rows
+        ])
 
     # --- Extra helpers ---
-    def update_encrypted_key(self, user_id: str, sheet_id: str, new_encrypted_key: str) -> bool:
+    # (called once the membership was checked: by primary key, served from the session)
+    async def update_encrypted_key(self, user_id: str, sheet_id: str, new_encrypted_key: str) -> bool:
         if not new_encrypted_key or not new_encrypted_key.strip():
             raise ValueError("new_encrypted_key cannot be empty")
 
-        row = (
-            self.db.query(UserSheet)
-            .filter(and_(UserSheet.user_id == user_id, UserSheet.sheet_id == sheet_id))
-            .first()
-        )
+        row = await self.db.get(UserSheet, (user_id, sheet_id))
         if not row:
             return False
         row.encrypted_sheet_key = new_encrypted_key
-        self.db.commit()
-        self.db.refresh(row)
+        await self.db.flush()
+        forget_memberships(self.uow, sheet_id, [user_id])
         return True
 
-    def update_role(self, user_id: str, sheet_id: str, role: str) -> bool:
-        row = (
-            self.db.query(UserSheet)
-            .filter(and_(UserSheet.user_id == user_id, UserSheet.sheet_id == sheet_id))
-            .first()
-        )
+    async def update_role(self, user_id: str, sheet_id: str, role: str) -> bool:
+        row = await self.db.get(UserSheet, (user_id, sheet_id))
         if not row:
             return False
         row.role = role
-        self.db.commit()
-        self.db.refresh(row)
+        await self.db.flush()
+        forget_memberships(self.uow, sheet_id, [user_id])
         return True
 
-    def mark_favorite(self, user_id: str, sheet_id: str, is_favorite: bool) -> bool:
-        row = (
-            self.db.query(UserSheet)
-            .filter(and_(UserSheet.user_id == user_id, UserSheet.sheet_id == sheet_id))
-            .first()
-        )
+    async def mark_favorite(self, user_id: str, sheet_id: str, is_favorite: bool) -> bool:
+        row = await self.db.get(UserSheet, (user_id, sheet_id))
         if not row:
             return False
         row.is_favorite = is_favorite
-        self.db.commit()
-        self.db.refresh(row)
-        return True
\ No newline at end of file
+        await self.db.flush()
+        forget_memberships(self.uow, sheet_id, [user_id])
+        return True
@@ -1,22 +1,38 @@
+import asyncio
+import hashlib
+import time
 from datetime import datetime, timedelta
+import httpx
+from fastapi import Depends
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+from database import UnitOfWork, get_uow
 from service.user_service import UserService
+from service.token_version_table import token_versions
+from dto.response.auth_principal import AuthPrincipal
 from utils.oauth_cookie import OAuth2PasswordBearerWithCookie
 from exception.app_exception import AppException
 from exception.error_code import ErrorCode
-from google.oauth2 import id_token
-from google.auth.transport.requests import Request
+from utils.google_certs import google_cert_store
+from utils.http_client import http_client
+from utils.cache import create_cache
 from config import app_config
-import requests
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearerWithCookie(tokenUrl="login")
 
+GOOGLE_TOKENINFO_URL = "https://www.googleapis.com/oauth2/v1/tokeninfo"
+GOOGLE_USERINFO_URL = "https://www.googleapis.com/oauth2/v2/userinfo"
+
+# Google user info of recently verified access tokens, keyed by token digest
+verified_access_token_cache = create_cache("GOOGLE_ACCESS_TOKEN", default_maxsize=10000, default_ttl=300)
+
 
 class AuthService():
-    def __init__(self):
-        self.user_service = UserService()
+    def __init__(self, uow: UnitOfWork = Depends(get_uow)):
+        # uow may be None when the service is only used for check_token (TokenMiddleware)
+        self.user_service = UserService(uow) if uow is not None else None
 
 
     def create_token(self, data: dict):
@@ -31,75 +47,66 @@ class AuthService():
             algorithm=app_config["AUTHENTICATION"]["ALGORITHM"])
         return encoded_jwt
 
+
+    def create_user_token(self, user) -> str:
+        """
+        Issue an access token whose claims are enough to authenticate the user
+        without a database lookup: sub (email), uid, kst (key setup done) and ver (token version).
+        ``ver`` comes from the user row just loaded, not from this worker's token version table,
+        which may not have seen a revocation made on another worker yet.
+        """
+        return self.create_token(data={
+            "sub": user.email,
+            "uid": user.user_id,
+            "kst": user.public_key is not None,
+            "ver": user.token_version,
+        })
+
+
+    async def revoke_user_tokens(self, user_id: str) -> int:
+        """Reject every token issued to the user so far (logout / forced revocation)"""
+        return await token_versions.revoke(user_id)
+
     
-    def login_or_create_google_user(self, token: str):
+    async def login_or_create_google_user(self, token: str):
         try:
-            idinfo = id_token.verify_oauth2_token(token, Request(), app_config["GOOGLE_AUTHENTICATION"]["CLIENT_ID"])
+            # May fetch the certificates (first use, key rotation): keep it off the event loop
+            idinfo = await run_in_threadpool(google_cert_store.verify_id_token, token,
+                                             app_config["GOOGLE_AUTHENTICATION"]["CLIENT_ID"])
             email = idinfo["email"]
             first_name = idinfo.get("given_name")
             last_name = idinfo.get("family_name")
             avatar_url = idinfo.get("picture")
-            
-            user = self.user_service.get_user_by_email(email)
-            if user:
-                return user
 
-            new_user = self.user_service.create_user_google(email=email, first_name=first_name,
+            return await self.user_service.upsert_user_google(email=email, first_name=first_name,
                             last_name=last_name, avatar_url=avatar_url)
-            return new_user
         except ValueError as e:
             print(e)
             raise AppException(ErrorCode.INVALID_GOOGLE_TOKEN)
 
 
-    def verify_google_access_token(self, access_token: str):
+    async def verify_google_access_token(self, access_token: str):
         """
-        Verify Google access token by calling Google's tokeninfo endpoint
+        Verify Google access token by calling Google's tokeninfo and userinfo endpoints concurrently
         Returns user info if token is valid, raises exception if invalid
         """
         try:
-            # Call Google's tokeninfo endpoint to verify access token
-            response = requests.get(
-                f"https://www.googleapis.com/oauth2/v1/tokeninfo?access_token={access_token}"
-            )
-            if response.status_code != 200:
-                raise AppException(ErrorCode.INVALID_GOOGLE_TOKEN)
-            token_info = response.json()
-            
-            # Check if token is for our application
-            if token_info.get("audience") != app_config["GOOGLE_AUTHENTICATION"]["CLIENT_ID"]:
-                raise AppException(ErrorCode.INVALID_GOOGLE_TOKEN)
-            
-            # Get user info using the access token
-            user_info_response = requests.get(
-                "https://www.googleapis.com/oauth2/v2/userinfo",
-                headers={"Authorization": f"Bearer {access_token}"}
-            )
-            
-            if user_info_response.status_code != 200:
-                raise AppException(ErrorCode.INVALID_GOOGLE_TOKEN)
-            
-            user_info = user_info_response.json()
-            
+            user_info = await self._get_google_user_info(access_token)
+
             email = user_info.get("email")
             first_name = user_info.get("given_name")
             last_name = user_info.get("family_name")
             avatar_url = user_info.get("picture")
-            
-            user = self.user_service.get_user_by_email(email)
-            if user:
-                return user
-            
-            # Create new user if doesn't exist
-            new_user = self.user_service.create_user_google(
+
+            # Create the user on first login, refresh the profile otherwise
+            return await self.user_service.upsert_user_google(
                 email=email, 
                 first_name=first_name,
                 last_name=last_name, 
                 avatar_url=avatar_url
             )
-            return new_user
             
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"Error verifying access token: {e}")
             raise AppException(ErrorCode.INVALID_GOOGLE_TOKEN)
         except Exception as e:
@@ -107,18 +114,73 @@ class AuthService():
             raise AppException(ErrorCode.INVALID_GOOGLE_TOKEN)
 
 
-    def check_token(self, token: str):
+    async def _get_google_user_info(self, access_token: str) -> dict:
+        cache_key = hashlib.sha256(access_token.encode()).hexdigest()
+        cached = verified_access_token_cache.get(cache_key)
+        if cached is not None:
+            user_info, expires_at = cached
+            if time.monotonic() < expires_at:
+                return user_info
+            verified_access_token_cache.invalidate(cache_key)
+
+        # Check the token and fetch the profile at the same time
+        response, user_info_response = await asyncio.gather(
+            http_client.get(GOOGLE_TOKENINFO_URL, params={"access_token": access_token}),
+            http_client.get(GOOGLE_USERINFO_URL, headers={"Authorization": f"Bearer {access_token}"})
+        )
+        if response.status_code != 200:
+            raise AppException(ErrorCode.INVALID_GOOGLE_TOKEN)
+        token_info = response.json()
+
+        # Check if token is for our application
+        if token_info.get("audience") != app_config["GOOGLE_AUTHENTICATION"]["CLIENT_ID"]:
+            raise AppException(ErrorCode.INVALID_GOOGLE_TOKEN)
+
+        if user_info_response.status_code != 200:
+            raise AppException(ErrorCode.INVALID_GOOGLE_TOKEN)
+        user_info = user_info_response.json()
+
+        # Never trust the cached result past the token's own expiry
+        expires_in = float(token_info.get("expires_in", 0))
+        if expires_in > 0:
+            verified_access_token_cache.set(cache_key, (user_info, time.monotonic() + expires_in))
+        return user_info
+
+
+    async def check_token(self, token: str) -> AuthPrincipal:
         try:
             payload = jwt.decode(
                 token, app_config["AUTHENTICATION"]["SECRET_KEY_LOGIN"], algorithms=[
                     app_config["AUTHENTICATION"]["ALGORITHM"]])
-            email = payload["sub"]
+            email = payload.get("sub")
             if email is None:
                 raise AppException(ErrorCode.UNAUTHORIZED)
         except JWTError:
             raise AppException(ErrorCode.UNAUTHORIZED)
 
-        user = self.user_service.get_user_by_email(email)
+        user_id = payload.get("uid")
+        if user_id is None:
+            # Token issued before uid/kst/ver claims existed: resolve the user once
+            return await self._check_legacy_token(email)
+
+        token_version = payload.get("ver", 0)
+        if token_version < token_versions.get(user_id):
+            raise AppException(ErrorCode.UNAUTHORIZED)
+
+        return AuthPrincipal(
+            user_id=user_id,
+            email=email,
+            has_key_setup=payload.get("kst", False),
+            token_version=token_version
+        )
+
+
+    async def _check_legacy_token(self, email: str) -> AuthPrincipal:
+        async with UnitOfWork() as uow:
+            user = await UserService(uow).get_principal_by_email(email)
         if user is None:
             raise AppException(ErrorCode.UNAUTHORIZED)
+        # Legacy tokens are implicitly version 0, so any revocation rejects them
+        if token_versions.get(user.user_id) > 0:
+            raise AppException(ErrorCode.UNAUTHORIZED)
         return user
\ No newline at end of file
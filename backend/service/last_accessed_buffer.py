@@ -0,0 +1,116 @@
+import asyncio
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from config import app_config
+from database import UnitOfWork
+from repository.user_sheet_repository import UserSheetRepository
+
+
+class LastAccessedBuffer:
+    """
+    Write-behind buffer for user_sheet.last_accessed_at.
+
+    Accesses are coalesced in memory (only the latest timestamp per
+    (user_id, sheet_id) is kept) and written by a background task with one bulk
+    UPDATE per flush, instead of one write per page view. The buffer is drained
+    on shutdown; at most one flush interval of accesses is lost if the process dies.
+    """
+
+    def __init__(self, flush_interval: float, max_pending: int):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[Tuple[str, str], datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._recorded = 0
+        self._flushed = 0
+        self._flushes = 0
+        self._errors = 0
+
+    def record(self, user_id: str, sheet_id: str, accessed_at: Optional[datetime] = None) -> None:
+        accessed_at = accessed_at or datetime.utcnow()
+        key = (user_id, sheet_id)
+        if key not in self._pending or self._pending[key] < accessed_at:
+            self._pending[key] = accessed_at
+        self._recorded += 1
+        # Flush early rather than letting the buffer grow without bound
+        if len(self._pending) >= self.max_pending and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """Write every buffered access time and return how many rows were sent."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            rows = [
+                {"user_id": user_id, "sheet_id": sheet_id, "last_accessed_at": accessed_at}
+                for (user_id, sheet_id), accessed_at in batch.items()
+            ]
+            try:
+                async with UnitOfWork() as uow:
+                    await UserSheetRepository(uow).bulk_update_last_accessed(rows)
+                    await uow.commit()
+            except Exception:
+                self._errors += 1
+                # Put the batch back for the next flush, keeping newer accesses recorded meanwhile
+                for key, accessed_at in batch.items():
+                    if key not in self._pending or self._pending[key] < accessed_at:
+                        self._pending[key] = accessed_at
+                raise
+            self._flushes += 1
+            self._flushed += len(rows)
+            return len(rows)
+
+    async def start(self) -> None:
+        """Start the flush task (called from the app lifespan)."""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._flush_loop(), name="last-accessed-flush")
+
+    async def stop(self) -> None:
+        """Stop the flush task and drain the buffer."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "recorded": self._recorded,
+            "flushed": self._flushed,
+            "flushes": self._flushes,
+            "errors": self._errors,
+            "flush_interval": self.flush_interval,
+            "max_pending": self.max_pending,
+        }
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error flushing last accessed times: {e}")
+
+
+_config = app_config.get("LAST_ACCESSED", {})
+last_accessed_buffer = LastAccessedBuffer(
+    flush_interval=float(_config.get("FLUSH_INTERVAL_SECONDS", 5)),
+    max_pending=int(_config.get("MAX_PENDING", 10000)),
+)
@@ -0,0 +1,126 @@
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Optional
+
+from config import app_config
+from database import UnitOfWork
+from repository.sheet_repository import SheetRepository
+from repository.user_sheet_repository import UserSheetRepository
+
+
+class SheetPurgeWorker:
+    """
+    Background removal of deleted (tombstoned) sheets.
+
+    Memberships are deleted ``batch_size`` at a time, each batch in its own short
+    transaction, so deleting a very large sheet never holds long locks on
+    user_sheet. The member counters go down with every batch, which is the
+    progress reported by the deletion status endpoint. The sheet row is
+    removed last, leaving a small sheet_purge record (who deleted it) that is
+    kept for ``record_retention``. Deletions left over by a restart are
+    picked up again.
+    """
+
+    def __init__(self, interval: float, batch_size: int, record_retention: timedelta):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.record_retention = record_retention
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._purged_sheets = 0
+        self._purged_members = 0
+
+    def notify(self) -> None:
+        """Start purging now instead of at the next interval (after a deletion)."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def purge_pending(self) -> int:
+        """Purge every deleted sheet and return how many were removed."""
+        purged = 0
+        while True:
+            async with UnitOfWork() as uow:
+                sheet_ids = await SheetRepository(uow).get_sheet_ids_to_purge(limit=100)
+            if not sheet_ids:
+                return purged
+            for sheet_id in sheet_ids:
+                await self.purge_sheet(sheet_id)
+                purged += 1
+
+    async def purge_sheet(self, sheet_id: str) -> None:
+        while True:
+            async with UnitOfWork() as uow:
+                user_sheet_repository = UserSheetRepository(uow)
+                sheet_repository = SheetRepository(uow)
+                # Other workers may purge the same sheet: batches are serialized on its row
+                sheet = await sheet_repository.get_deleted_sheet(sheet_id, lock=True)
+                if not sheet:
+                    return
+                members = await user_sheet_repository.get_member_batch(sheet_id, self.batch_size)
+                if not members:
+                    await sheet_repository.purge_sheet(sheet)
+                    await uow.commit()
+                    self._purged_sheets += 1
+                    return
+                await user_sheet_repository.delete_user_sheet_by_sheet_id_and_list_user_id(sheet_id, list(members))
+                await sheet_repository.adjust_member_counts(
+                    sheet_id, {role: -count for role, count in Counter(members.values()).items()})
+                await uow.commit()
+                self._purged_members += len(members)
+            # Let requests run between batches
+            await asyncio.sleep(0)
+
+    async def forget_old_purges(self) -> int:
+        """Drop the sheet_purge records older than the retention; returns how many were removed."""
+        async with UnitOfWork() as uow:
+            removed = await SheetRepository(uow).delete_sheet_purges(datetime.utcnow() - self.record_retention)
+            await uow.commit()
+        return removed
+
+    async def start(self) -> None:
+        """Start the purge task (called from the app lifespan)."""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._purge_loop(), name="sheet-purge")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "purged_sheets": self._purged_sheets,
+            "purged_members": self._purged_members,
+            "interval": self.interval,
+            "batch_size": self.batch_size,
+            "record_retention_days": self.record_retention.days,
+        }
+
+    async def _purge_loop(self) -> None:
+        while True:
+            try:
+                await self.purge_pending()
+                await self.forget_old_purges()
+            except Exception as e:
+                print(f"Error purging deleted sheets: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+
+_config = app_config.get("SHEET_PURGE", {})
+sheet_purge_worker = SheetPurgeWorker(
+    interval=float(_config.get("INTERVAL_SECONDS", 30)),
+    batch_size=int(_config.get("BATCH_SIZE", 1000)),
+    record_retention=timedelta(days=float(_config.get("RECORD_RETENTION_DAYS", 30))),
+)
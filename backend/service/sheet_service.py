@@ -1,29 +1,52 @@
+from collections import Counter
 from typing import List, Optional
+from fastapi import Depends
 from dto.request.sheet.filter_sheet_request import FilterSheetRequest
 from dto.request.sheet.add_user_to_sheet_request import AddUserToSheetRequest
 from dto.request.sheet.remove_user_from_sheet_request import RemoveUserFromSheetRequest
 from dto.request.sheet.update_sheet_access_request import UpdateSheetAccessRequest
 from dto.response.base_page_response import BasePageResponse
 from dto.response.sheet.sheet_response import SheetResponse
+from dto.response.sheet.add_users_to_sheet_response import AddUsersToSheetResponse
+from dto.response.sheet.sheet_deletion_status_response import SheetDeletionStatusResponse
 from dto.response.user_response import UserResponse
 from model.sheet import Sheet
 from model.user_sheet import UserSheet
 from repository.sheet_repository import SheetRepository
+from repository.membership_cache import forget_memberships
 from repository.user_sheet_repository import UserSheetRepository
 from repository.user_repository import UserRepository
 from exception.app_exception import AppException
 from exception.error_code import ErrorCode
-from sqlalchemy import and_, or_, desc, asc
-from database import SessionLocal
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import DateTime, and_, or_, desc, asc, func, literal
+from database import UnitOfWork, get_uow, on_primary, read_only
+from utils.cache import create_cache
+from service.last_accessed_buffer import last_accessed_buffer
+from service.sheet_purge_worker import sheet_purge_worker
+from utils.cursor import SortSpec, decode_cursor, encode_cursor, keyset_after
+from datetime import datetime
+
+# Sort keys accepted by the cursor mode of get_sheets_by_filter (sheet_id is always appended)
+CURSOR_SORT_FIELDS = ("created_at", "last_accessed_at", "is_favorite")
+MEMBER_ROLES = ("owner", "editor", "viewer")
+# Sheets never opened sort as if opened at the epoch, so the keyset never compares NULLs
+NEVER_ACCESSED = datetime(1970, 1, 1)
+# Column type of wrapped sheet keys, which bounds their size
+SHEET_KEY = UserSheet.__table__.c.encrypted_sheet_key.type
+
+# Sheet counts per (user_id, is_favorite, role) for cursor mode, where an approximate total is enough
+sheet_total_cache = create_cache("SHEET_TOTAL", default_maxsize=10000, default_ttl=30)
 
 
 class SheetService:
-    def __init__(self):
-        self.sheet_repository = SheetRepository()
-        self.user_sheet_repository = UserSheetRepository()
-        self.user_repository = UserRepository()
+    def __init__(self, uow: UnitOfWork = Depends(get_uow)):
+        self.uow = uow
+        self.sheet_repository = SheetRepository(uow)
+        self.user_sheet_repository = UserSheetRepository(uow)
+        self.user_repository = UserRepository(uow)
 
-    def create_sheet(self,
+    async def create_sheet(self,
                     link: str,
                     creator_id: str,
                     member_ids: list[str],
@@ -31,28 +54,33 @@ class SheetService:
                     encrypted_sheet_key: str
                     ) -> SheetResponse:
         """Create a new sheet and add users to it"""
-        # Create the sheet
-        sheet = self.sheet_repository.create_sheet(link=link, creator_id=creator_id)
-        
-        # Add creator as owner
-        self.user_sheet_repository.create_user_sheet(
-            user_id=creator_id,
-            sheet_id=sheet.sheet_id,
-            encrypted_sheet_key=encrypted_sheet_key,
-            role="owner"
-        )
+        # A spreadsheet is registered once, whatever URL variant is used
+        if await self.sheet_repository.exists_by_link(link):
+            raise AppException(ErrorCode.SHEET_ALREADY_EXISTS)
+
+        # Validate every member before writing anything
+        if not SHEET_KEY.fits(encrypted_sheet_key):
+            raise AppException(ErrorCode.INVALID_SHEET_MEMBERS)
+        members = await self._validate_members(
+            member_ids, encrypted_sheet_keys, ["viewer"] * len(member_ids), exclude={creator_id})
+
+        # Creator as owner and other members as viewers
+        owner = dict(user_id=creator_id, encrypted_sheet_key=encrypted_sheet_key, role="owner")
+        members = [owner] + members
+
+        # Create the sheet, with its member counters
+        try:
+            sheet = await self.sheet_repository.create_sheet(
+                link=link, creator_id=creator_id, roles=Counter(member["role"] for member in members))
+        except IntegrityError:
+            # Registered concurrently by someone else
+            raise AppException(ErrorCode.SHEET_ALREADY_EXISTS)
         
-        # Add other members as viewers
-        visited = set([creator_id])
-        for member_id, member_encrypted_key in zip(member_ids, encrypted_sheet_keys):
-            if member_id not in visited:
-                self.user_sheet_repository.create_user_sheet(
-                    user_id=member_id,
-                    sheet_id=sheet.sheet_id,
-                    encrypted_sheet_key=member_encrypted_key,
-                    role="viewer"
-                )
-                visited.add(member_id)
+        # All memberships in one multi-row INSERT
+        await self.user_sheet_repository.bulk_create_user_sheets(sheet.sheet_id, members)
+
+        # Sheet and all memberships are committed together
+        await self.uow.commit()
         
         return SheetResponse(
             sheet_id=sheet.sheet_id,
@@ -60,286 +88,402 @@ class SheetService:
             creator_id=sheet.creator_id,
             created_at=sheet.created_at,
             role="owner",
-            encrypted_sheet_key=encrypted_sheet_key
+            encrypted_sheet_key=encrypted_sheet_key,
+            member_count=sheet.member_count,
+            owner_count=sheet.owner_count,
+            editor_count=sheet.editor_count,
+            viewer_count=sheet.viewer_count
         )
 
-    def get_sheet_by_id(self, sheet_id: str, user_id: str) -> SheetResponse:
+    @read_only
+    async def get_sheet_by_id(self, sheet_id: str, user_id: str) -> SheetResponse:
         """Get sheet details for a specific user"""
-        # Check if user has access to the sheet
-        user_sheet = self.user_sheet_repository.get_user_sheet_by_user_id_and_sheet_id(user_id, sheet_id)
+        # Membership, sheet and creator come back from a single query
+        user_sheet = await self.user_sheet_repository.get_user_sheet_with_sheet(user_id, sheet_id)
         if not user_sheet:
             raise AppException(ErrorCode.SHEET_NOT_FOUND)
-        
-        # Get sheet link
-        sheet_link = self.sheet_repository.get_link_by_sheet_id(sheet_id)
-        if not sheet_link:
-            raise AppException(ErrorCode.SHEET_NOT_FOUND)
-
-        # Get creator info
-        with SessionLocal() as db:
-            sheet = db.query(Sheet).filter(Sheet.sheet_id == sheet_id).first()
-            if not sheet:
-                raise AppException(ErrorCode.SHEET_NOT_FOUND)
 
-            creator = self.user_repository.get_user_by_user_id(sheet.creator_id)
+        return SheetResponse.fromUserSheetModel(user_sheet)
 
-            return SheetResponse(
-                sheet_id=sheet_id,
-                link=sheet_link,
-                creator_id=sheet.creator_id,
-                created_at=sheet.created_at,
-                role=user_sheet.role,
-                encrypted_sheet_key=user_sheet.encrypted_sheet_key,
-                is_favorite=user_sheet.is_favorite,
-                last_accessed_at=user_sheet.last_accessed_at,
-                creator=UserResponse.fromUserModel(creator) if creator else None
-            )
-
-    def get_sheets_by_filter(self, request: FilterSheetRequest) -> BasePageResponse:
+    @read_only
+    async def get_sheets_by_filter(self, request: FilterSheetRequest) -> BasePageResponse:
         """Get filtered and paginated list of sheets for a user"""
         if not request.user_id:
             raise AppException(ErrorCode.USER_NOT_FOUND)
+
+        if request.pagination == "cursor" or request.cursor:
+            return await self._get_sheets_by_cursor(request)
         
-        with SessionLocal() as db:
-            # Base query joining UserSheet and Sheet
-            query = db.query(UserSheet, Sheet).join(
-                Sheet, UserSheet.sheet_id == Sheet.sheet_id
-            ).filter(UserSheet.user_id == request.user_id)
-            
-            # Apply filters
-            if request.is_favorite is not None:
-                query = query.filter(UserSheet.is_favorite == request.is_favorite)
-            
-            if request.role:
-                query = query.filter(UserSheet.role == request.role)
-            
-            # Apply sorting
-            if request.sorts_by and request.sorts_dir:
-                for sort_field, sort_dir in zip(request.sorts_by, request.sorts_dir):
-                    if sort_field == "created_at":
-                        order_field = Sheet.created_at
-                    elif sort_field == "last_accessed_at":
-                        order_field = UserSheet.last_accessed_at
-                    elif sort_field == "is_favorite":
-                        order_field = UserSheet.is_favorite
-                    else:
-                        continue
-                    
-                    if sort_dir.lower() == "desc":
-                        query = query.order_by(desc(order_field))
-                    else:
-                        query = query.order_by(asc(order_field))
-            else:
-                # Default sorting by created_at desc
-                query = query.order_by(desc(Sheet.created_at))
-            
-            # Count total items
-            total = query.count()
-            
-            # Apply pagination
-            offset = (request.page - 1) * request.page_size
-            items = query.offset(offset).limit(request.page_size).all()
-            
-            # Convert to response objects
-            sheet_responses = []
-            for user_sheet, sheet in items:
-                # Get creator info
-                creator = self.user_repository.get_user_by_user_id(sheet.creator_id)
+        # Apply sorting
+        order_by = []
+        if request.sorts_by and request.sorts_dir:
+            for sort_field, sort_dir in zip(request.sorts_by, request.sorts_dir):
+                if sort_field == "created_at":
+                    order_field = Sheet.created_at
+                elif sort_field == "last_accessed_at":
+                    order_field = UserSheet.last_accessed_at
+                elif sort_field == "is_favorite":
+                    order_field = UserSheet.is_favorite
+                else:
+                    continue
                 
-                sheet_responses.append(SheetResponse(
-                    sheet_id=sheet.sheet_id,
-                    link=sheet.link,
-                    creator_id=sheet.creator_id,
-                    created_at=sheet.created_at,
-                    role=user_sheet.role,
-                    encrypted_sheet_key=user_sheet.encrypted_sheet_key,
-                    is_favorite=user_sheet.is_favorite,
-                    last_accessed_at=user_sheet.last_accessed_at,
-                    creator=UserResponse.fromUserModel(creator) if creator else None
-                ))
-            
-            total_pages = (total + request.page_size - 1) // request.page_size
-            
-            return BasePageResponse(
-                items=sheet_responses,
-                total=total,
-                page=request.page,
-                page_size=request.page_size,
-                total_pages=total_pages
-            )
+                if sort_dir.lower() == "desc":
+                    order_by.append(desc(order_field))
+                else:
+                    order_by.append(asc(order_field))
+        else:
+            # Default sorting by created_at desc
+            order_by.append(desc(Sheet.created_at))
+        
+        # Count total items
+        total = None
+        if request.include_total is not False:
+            total = await self.user_sheet_repository.count_sheets_of_user(
+                request.user_id, request.is_favorite, request.role)
+        
+        # Apply pagination (sheets and creators are loaded by the same query)
+        offset = (request.page - 1) * request.page_size
+        items = await self.user_sheet_repository.filter_sheets_of_user(
+            request.user_id, request.is_favorite, request.role, order_by, offset, request.page_size,
+            with_keys=request.include_keys)
+        
+        # Convert to response objects
+        sheet_responses = [SheetResponse.fromDashboardRow(row) for row in items]
+        
+        total_pages = (total + request.page_size - 1) // request.page_size if total is not None else None
+        
+        return BasePageResponse(
+            items=sheet_responses,
+            total=total,
+            page=request.page,
+            page_size=request.page_size,
+            total_pages=total_pages
+        )
+
+    async def _get_sheets_by_cursor(self, request: FilterSheetRequest) -> BasePageResponse:
+        """Keyset pagination: each page starts right after the sort keys encoded in the cursor"""
+        sort = self._cursor_sort(request)
+        columns = [self._cursor_column(field) for field, _ in sort]
+        directions = [direction for _, direction in sort]
+
+        after = None
+        if request.cursor:
+            after = keyset_after(columns, directions, decode_cursor(request.cursor, sort))
+
+        order_by = [desc(column) if direction == "desc" else asc(column)
+                    for column, direction in zip(columns, directions)]
+        # One extra row tells whether there is a next page
+        items = await self.user_sheet_repository.filter_sheets_of_user(
+            request.user_id, request.is_favorite, request.role, order_by, 0, request.page_size + 1, after=after,
+            with_keys=request.include_keys)
+        has_more = len(items) > request.page_size
+        items = items[:request.page_size]
+
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(sort, [self._cursor_value(items[-1], field) for field, _ in sort])
+
+        total = None
+        if request.include_total:
+            total = await self._count_sheets_cached(request)
+
+        return BasePageResponse(
+            items=[SheetResponse.fromDashboardRow(row) for row in items],
+            total=total,
+            page_size=request.page_size,
+            total_pages=(total + request.page_size - 1) // request.page_size if total is not None else None,
+            next_cursor=next_cursor
+        )
 
-    def add_users_to_sheet(self, current_user_id: str, sheet_id: str, request: AddUserToSheetRequest) -> bool:
+    def _cursor_sort(self, request: FilterSheetRequest) -> SortSpec:
+        sort = []
+        for sort_field, sort_dir in zip(request.sorts_by or [], request.sorts_dir or []):
+            if sort_field in CURSOR_SORT_FIELDS and sort_field not in [field for field, _ in sort]:
+                sort.append((sort_field, "desc" if sort_dir.lower() == "desc" else "asc"))
+        if not sort:
+            # Default sorting by created_at desc
+            sort.append(("created_at", "desc"))
+        # Unique tie-breaker, so that rows sharing the sort keys are neither skipped nor repeated
+        sort.append(("sheet_id", "asc"))
+        return sort
+
+    def _cursor_column(self, field: str):
+        if field == "created_at":
+            return Sheet.created_at
+        if field == "last_accessed_at":
+            return func.coalesce(UserSheet.last_accessed_at, literal(NEVER_ACCESSED, DateTime))
+        if field == "is_favorite":
+            return UserSheet.is_favorite
+        return UserSheet.sheet_id
+
+    def _cursor_value(self, row, field: str):
+        if field == "created_at":
+            return row.created_at
+        if field == "last_accessed_at":
+            return row.last_accessed_at or NEVER_ACCESSED
+        if field == "is_favorite":
+            return row.is_favorite
+        return row.sheet_id
+
+    async def _count_sheets_cached(self, request: FilterSheetRequest) -> int:
+        key = (request.user_id, request.is_favorite, request.role)
+        total = sheet_total_cache.get(key)
+        if total is None:
+            # From the primary, like every cache fill: a lagging count would stay cached
+            with on_primary():
+                total = await self.user_sheet_repository.count_sheets_of_user(*key)
+            sheet_total_cache.set(key, total, tags=(request.user_id,))
+        return total
+
+    async def add_users_to_sheet(self, current_user_id: str, sheet_id: str, request: AddUserToSheetRequest) -> AddUsersToSheetResponse:
         """Add users to a sheet (requires owner or editor permission)"""
+        # Membership writes of a sheet are serialized on its row (member counters)
+        if not await self.sheet_repository.lock_sheet(sheet_id):
+            raise AppException(ErrorCode.EDIT_SHEET_NOT_PERMISSION)
+
         # Check if current user has permission
-        current_user_sheet = self.user_sheet_repository.get_user_sheet_by_user_id_and_sheet_id(current_user_id, sheet_id)
+        current_user_sheet = await self.user_sheet_repository.get_user_sheet_by_user_id_and_sheet_id(current_user_id, sheet_id)
         if not current_user_sheet or current_user_sheet.role not in ["owner", "editor"]:
             raise AppException(ErrorCode.EDIT_SHEET_NOT_PERMISSION)
         
-        # Validate input lengths
-        if len(request.user_ids) != len(request.encrypted_sheet_keys):
-            raise ValueError("user_ids and encrypted_sheet_keys must have the same length")
-        
         # Set default roles if not provided
         roles = request.roles if request.roles else ["viewer"] * len(request.user_ids)
         if len(roles) != len(request.user_ids):
             roles = ["viewer"] * len(request.user_ids)
+
+        # Validate every user and key before writing anything
+        members = await self._validate_members(request.user_ids, request.encrypted_sheet_keys, roles)
+
+        # Existing members are skipped (left unchanged)
+        existing = await self.user_sheet_repository.get_member_ids(sheet_id, [member["user_id"] for member in members])
+        new_members = [member for member in members if member["user_id"] not in existing]
+        if new_members:
+            await self.user_sheet_repository.bulk_create_user_sheets(sheet_id, new_members)
+            await self.sheet_repository.adjust_member_counts(
+                sheet_id, Counter(member["role"] for member in new_members))
+
+        # All new members are committed together
+        await self.uow.commit()
         
-        # Add users to sheet
-        for user_id, encrypted_key, role in zip(request.user_ids, request.encrypted_sheet_keys, roles):
-            if not self.user_sheet_repository.check_exist_by_user_id_and_sheet_id(user_id, sheet_id):
-                self.user_sheet_repository.create_user_sheet(
-                    user_id=user_id,
-                    sheet_id=sheet_id,
-                    encrypted_sheet_key=encrypted_key,
-                    role=role
-                )
-        
-        return True
+        return AddUsersToSheetResponse(
+            added_user_ids=[member["user_id"] for member in new_members],
+            skipped_user_ids=[member["user_id"] for member in members if member["user_id"] in existing]
+        )
+
+    async def _validate_members(
+            self,
+            user_ids: List[str],
+            encrypted_sheet_keys: List[str],
+            roles: List[str],
+            exclude: Optional[set] = None
+    ) -> List[dict]:
+        """
+        Check all members up front (one query for all users) and return them as
+        {user_id, encrypted_sheet_key, role} rows, without duplicates or excluded users.
+        """
+        if len(user_ids) != len(encrypted_sheet_keys):
+            raise AppException(ErrorCode.INVALID_SHEET_MEMBERS)
+
+        members, seen = [], set(exclude or ())
+        for user_id, encrypted_key, role in zip(user_ids, encrypted_sheet_keys, roles):
+            if user_id in seen:
+                continue
+            seen.add(user_id)
+            if not SHEET_KEY.fits(encrypted_key) or role not in MEMBER_ROLES:
+                raise AppException(ErrorCode.INVALID_SHEET_MEMBERS)
+            members.append(dict(user_id=user_id, encrypted_sheet_key=encrypted_key, role=role))
+
+        if members:
+            # Users must exist and have a public key the sheet key was encrypted with
+            ready = await self.user_repository.get_user_ids_with_key_setup([member["user_id"] for member in members])
+            if len(ready) != len(members):
+                raise AppException(ErrorCode.INVALID_SHEET_MEMBERS)
+        return members
 
-    def remove_users_from_sheet(self, current_user_id: str, sheet_id: str, request: RemoveUserFromSheetRequest) -> bool:
+    async def remove_users_from_sheet(self, current_user_id: str, sheet_id: str, request: RemoveUserFromSheetRequest) -> bool:
         """Remove users from a sheet (requires owner permission)"""
+        if not await self.sheet_repository.lock_sheet(sheet_id):
+            raise AppException(ErrorCode.EDIT_SHEET_NOT_PERMISSION)
+
         # Check if current user is owner
-        current_user_sheet = self.user_sheet_repository.get_user_sheet_by_user_id_and_sheet_id(current_user_id, sheet_id)
+        current_user_sheet = await self.user_sheet_repository.get_user_sheet_by_user_id_and_sheet_id(current_user_id, sheet_id)
         if not current_user_sheet or current_user_sheet.role != "owner":
             raise AppException(ErrorCode.EDIT_SHEET_NOT_PERMISSION)
         
         # Don't allow owner to remove themselves
         user_ids_to_remove = [uid for uid in request.user_ids if uid != current_user_id]
         
-        # Remove users
-        self.user_sheet_repository.delete_user_sheet_by_sheet_id_and_list_user_id(sheet_id, user_ids_to_remove)
+        # Remove users (only actual members count)
+        removed = await self.user_sheet_repository.get_member_roles(sheet_id, user_ids_to_remove)
+        if removed:
+            await self.user_sheet_repository.delete_user_sheet_by_sheet_id_and_list_user_id(sheet_id, list(removed))
+            await self.sheet_repository.adjust_member_counts(
+                sheet_id, {role: -count for role, count in Counter(removed.values()).items()})
+        await self.uow.commit()
         
         return True
 
-    def leave_sheet(self, user_id: str, sheet_id: str) -> bool:
+    async def leave_sheet(self, user_id: str, sheet_id: str) -> bool:
         """User leaves a sheet"""
+        sheet = await self.sheet_repository.lock_sheet(sheet_id)
+        if not sheet:
+            raise AppException(ErrorCode.SHEET_NOT_FOUND)
+
         # Check if user has access
-        user_sheet = self.user_sheet_repository.get_user_sheet_by_user_id_and_sheet_id(user_id, sheet_id)
+        user_sheet = await self.user_sheet_repository.get_user_sheet_by_user_id_and_sheet_id(user_id, sheet_id)
         if not user_sheet:
             raise AppException(ErrorCode.SHEET_NOT_FOUND)
         
         # If user is owner, they cannot leave unless they transfer ownership first
-        if user_sheet.role == "owner":
-            # Check if there are other users in the sheet
-            users_in_sheet = self.user_sheet_repository.get_user_in_sheet(sheet_id)
-            if len(users_in_sheet) > 1:
-                raise AppException(ErrorCode.EDIT_SHEET_NOT_PERMISSION)  # Owner must transfer ownership first
+        if user_sheet.role == "owner" and sheet.member_count > 1:
+            raise AppException(ErrorCode.EDIT_SHEET_NOT_PERMISSION)  # Owner must transfer ownership first
         
         # Remove user from sheet
-        self.user_sheet_repository.delete_user_sheet_by_user_id_and_sheet_id(user_id, sheet_id)
+        role = user_sheet.role
+        await self.user_sheet_repository.delete_user_sheet_by_user_id_and_sheet_id(user_id, sheet_id)
+        await self.sheet_repository.adjust_member_counts(sheet_id, {role: -1})
+        await self.uow.commit()
         
         return True
 
-    def delete_sheet(self, user_id: str, sheet_id: str) -> bool:
+    async def delete_sheet(self, user_id: str, sheet_id: str) -> SheetDeletionStatusResponse:
         """Delete a sheet (requires owner permission)"""
+        sheet = await self.sheet_repository.lock_sheet(sheet_id)
+        if not sheet:
+            raise AppException(ErrorCode.EDIT_SHEET_NOT_PERMISSION)
+
         # Check if user is owner
-        user_sheet = self.user_sheet_repository.get_user_sheet_by_user_id_and_sheet_id(user_id, sheet_id)
+        user_sheet = await self.user_sheet_repository.get_user_sheet_by_user_id_and_sheet_id(user_id, sheet_id)
         if not user_sheet or user_sheet.role != "owner":
             raise AppException(ErrorCode.EDIT_SHEET_NOT_PERMISSION)
         
-        # Delete all user-sheet relationships
-        self.user_sheet_repository.delete_user_sheet_by_sheet_id(sheet_id)
+        # Tombstone: every read treats the sheet as gone from this commit on.
+        # Memberships and the sheet row are removed in batches by the purge worker
+        await self.sheet_repository.tombstone_sheet(sheet, deleted_by=user_id)
+        forget_memberships(self.uow, sheet_id)
+        await self.uow.commit()
+        sheet_purge_worker.notify()
         
-        # Delete the sheet itself would require adding delete method to SheetRepository
-        # For now, we'll just remove all access
-        
-        return True
+        return SheetDeletionStatusResponse(
+            sheet_id=sheet_id,
+            status="deleting",
+            deleted_at=sheet.deleted_at,
+            remaining_members=sheet.member_count
+        )
+
+    async def get_deletion_status(self, user_id: str, sheet_id: str) -> SheetDeletionStatusResponse:
+        """Progress of the deletion of a sheet (for the user who deleted it)"""
+        sheet = await self.sheet_repository.get_deleted_sheet(sheet_id)
+        if sheet:
+            if sheet.deleted_by != user_id:
+                raise AppException(ErrorCode.SHEET_NOT_FOUND)
+            return SheetDeletionStatusResponse(
+                sheet_id=sheet_id,
+                status="deleting",
+                deleted_at=sheet.deleted_at,
+                remaining_members=sheet.member_count
+            )
 
-    def update_user_sheet_access(self, current_user_id: str, target_user_id: str, sheet_id: str, request: UpdateSheetAccessRequest) -> bool:
+        # Purged (the row is gone): only the record tells who deleted it
+        purge = await self.sheet_repository.get_sheet_purge(sheet_id)
+        if not purge or purge.deleted_by != user_id:
+            raise AppException(ErrorCode.SHEET_NOT_FOUND)
+        return SheetDeletionStatusResponse(sheet_id=sheet_id, status="deleted", deleted_at=purge.deleted_at)
+
+    async def update_user_sheet_access(self, current_user_id: str, target_user_id: str, sheet_id: str, request: UpdateSheetAccessRequest) -> bool:
         """Update user's access to a sheet (role, favorite status, encrypted key)"""
+        if request.encrypted_sheet_key and not SHEET_KEY.fits(request.encrypted_sheet_key):
+            raise AppException(ErrorCode.INVALID_KEY)
+        if request.role:
+            if request.role not in MEMBER_ROLES:
+                raise AppException(ErrorCode.INVALID_SHEET_MEMBERS)
+            # Role changes move member counters
+            if not await self.sheet_repository.lock_sheet(sheet_id):
+                raise AppException(ErrorCode.EDIT_SHEET_NOT_PERMISSION)
+
         # If updating another user's access, check permission
         if current_user_id != target_user_id:
-            current_user_sheet = self.user_sheet_repository.get_user_sheet_by_user_id_and_sheet_id(current_user_id, sheet_id)
+            current_user_sheet = await self.user_sheet_repository.get_user_sheet_by_user_id_and_sheet_id(current_user_id, sheet_id)
             if not current_user_sheet or current_user_sheet.role != "owner":
                 raise AppException(ErrorCode.EDIT_SHEET_NOT_PERMISSION)
         
         # Check if target user has access
-        if not self.user_sheet_repository.check_exist_by_user_id_and_sheet_id(target_user_id, sheet_id):
+        target_user_sheet = await self.user_sheet_repository.get_user_sheet_by_user_id_and_sheet_id(target_user_id, sheet_id)
+        if not target_user_sheet:
             raise AppException(ErrorCode.USER_NOT_FOUND)
         
         # Update role
-        if request.role:
-            self.user_sheet_repository.update_role(target_user_id, sheet_id, request.role)
+        if request.role and request.role != target_user_sheet.role:
+            old_role = target_user_sheet.role
+            await self.user_sheet_repository.update_role(target_user_id, sheet_id, request.role)
+            await self.sheet_repository.adjust_member_counts(sheet_id, {old_role: -1, request.role: 1})
         
         # Update favorite status (users can only update their own)
         if request.is_favorite is not None and current_user_id == target_user_id:
-            self.user_sheet_repository.mark_favorite(target_user_id, sheet_id, request.is_favorite)
+            await self.user_sheet_repository.mark_favorite(target_user_id, sheet_id, request.is_favorite)
         
         # Update encrypted key
         if request.encrypted_sheet_key:
-            self.user_sheet_repository.update_encrypted_key(target_user_id, sheet_id, request.encrypted_sheet_key)
+            await self.user_sheet_repository.update_encrypted_key(target_user_id, sheet_id, request.encrypted_sheet_key)
+
+        # Role, favorite and key changes are committed together
+        await self.uow.commit()
         
         return True
 
-    def get_users_in_sheet(self, current_user_id: str, sheet_id: str) -> List[UserResponse]:
+    @read_only
+    async def get_users_in_sheet(self, current_user_id: str, sheet_id: str) -> List[UserResponse]:
         """Get all users who have access to a sheet"""
         # Check if current user has access
-        if not self.user_sheet_repository.check_exist_by_user_id_and_sheet_id(current_user_id, sheet_id):
+        if not await self.user_sheet_repository.get_membership(current_user_id, sheet_id):
             raise AppException(ErrorCode.SHEET_NOT_FOUND)
         
-        users = self.user_sheet_repository.get_user_in_sheet(sheet_id)
+        users = await self.user_sheet_repository.get_user_in_sheet(sheet_id)
         return [UserResponse.fromUserModel(user) for user in users]
 
-    def get_encrypted_sheet_key(self, user_id: str, sheet_id: str) -> str:
+    @read_only
+    async def get_encrypted_sheet_key(self, user_id: str, sheet_id: str) -> str:
         """Get user's encrypted sheet key"""
-        user_sheet = self.user_sheet_repository.get_user_sheet_by_user_id_and_sheet_id(user_id, sheet_id)
-        if not user_sheet:
+        membership = await self.user_sheet_repository.get_membership(user_id, sheet_id)
+        if not membership:
             raise AppException(ErrorCode.SHEET_NOT_FOUND)
         
-        return user_sheet.encrypted_sheet_key
+        return membership.encrypted_sheet_key
 
-    def update_last_accessed(self, user_id: str, sheet_id: str) -> bool:
+    async def update_last_accessed(self, user_id: str, sheet_id: str) -> bool:
         """Update user's last accessed time for a sheet"""
-        from datetime import datetime
-        
-        user_sheet = self.user_sheet_repository.get_user_sheet_by_user_id_and_sheet_id(user_id, sheet_id)
-        if not user_sheet:
+        if not await self.user_sheet_repository.get_membership(user_id, sheet_id):
             return False
         
-        # Update last accessed time - would need to add this method to repository
-        # For now, return True as placeholder
+        # Written in bulk by the write-behind buffer, not on every call
+        last_accessed_buffer.record(user_id, sheet_id)
         return True
 
-    def get_user_role_in_sheet(self, user_id: str, sheet_id: str) -> Optional[str]:
+    @read_only
+    async def get_user_role_in_sheet(self, user_id: str, sheet_id: str) -> Optional[str]:
         """Get user's role in a specific sheet"""
-        user_sheet = self.user_sheet_repository.get_user_sheet_by_user_id_and_sheet_id(user_id, sheet_id)
-        return user_sheet.role if user_sheet else None
+        membership = await self.user_sheet_repository.get_membership(user_id, sheet_id)
+        return membership.role if membership else None
 
-    def check_user_permission(self, user_id: str, sheet_id: str, required_role: str = "viewer") -> bool:
+    @read_only
+    async def check_user_permission(self, user_id: str, sheet_id: str, required_role: str = "viewer") -> bool:
         """Check if user has required permission level for a sheet"""
-        user_sheet = self.user_sheet_repository.get_user_sheet_by_user_id_and_sheet_id(user_id, sheet_id)
-        if not user_sheet:
+        membership = await self.user_sheet_repository.get_membership(user_id, sheet_id)
+        if not membership:
             return False
         
         role_hierarchy = {"owner": 3, "editor": 2, "viewer": 1}
-        user_level = role_hierarchy.get(user_sheet.role, 0)
+        user_level = role_hierarchy.get(membership.role, 0)
         required_level = role_hierarchy.get(required_role, 0)
         
         return user_level >= required_level
 
-    def get_sheet_by_link(self, link: str, user_id: str) -> SheetResponse:
+    @read_only
+    async def get_sheet_by_link(self, link: str, user_id: str) -> SheetResponse:
         """Get sheet details by link for a specific user"""
-        # Find sheet by link
-        sheet = self.sheet_repository.get_sheet_by_link(link)
-        if not sheet:
-            raise AppException(ErrorCode.SHEET_NOT_FOUND)
-        
-        # Check if user has access to the sheet
-        user_sheet = self.user_sheet_repository.get_user_sheet_by_user_id_and_sheet_id(user_id, sheet.sheet_id)
+        # Sheet, membership and creator come back from a single query
+        user_sheet = await self.user_sheet_repository.get_user_sheet_by_link(user_id, link)
         if not user_sheet:
             raise AppException(ErrorCode.SHEET_NOT_FOUND)
 
-        # Get creator info
-        creator = self.user_repository.get_user_by_id(sheet.creator_id)
-
-        return SheetResponse(
-            sheet_id=sheet.sheet_id,
-            link=sheet.link,
-            creator_id=sheet.creator_id,
-            created_at=sheet.created_at,
-            role=user_sheet.role,
-            encrypted_sheet_key=user_sheet.encrypted_sheet_key,
-            is_favorite=user_sheet.is_favorite,
-            last_accessed_at=user_sheet.last_accessed_at,
-            creator=UserResponse.fromUserModel(creator) if creator else None
-        )
+        return SheetResponse.fromUserSheetModel(user_sheet)
@@ -0,0 +1,92 @@
+import asyncio
+from typing import Dict, Optional
+
+from config import app_config
+from database import UnitOfWork
+from repository.user_repository import UserRepository
+from utils.cache import publish_invalidation, remote_invalidation_handlers
+
+# Name of the token version table on the invalidation bus
+REMOTE_NAME = "TOKEN_VERSION"
+
+
+class TokenVersionTable:
+    """
+    In-memory copy of the per-user token versions, used as a revocation list.
+
+    Only users whose tokens were revoked at least once (token_version > 0) are
+    kept, so the table stays small. It is loaded on application startup and
+    reloaded by a background task, which keeps token validation itself pure CPU work.
+    Revocations are sent to the other workers on the invalidation bus, so that
+    they do not wait for their next reload.
+    """
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._versions: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        remote_invalidation_handlers[REMOTE_NAME] = self.apply_remote
+
+    def get(self, user_id: str) -> int:
+        """Return the minimum token version accepted for this user."""
+        return self._versions.get(user_id, 0)
+
+    async def revoke(self, user_id: str) -> int:
+        """Invalidate every token issued to the user so far and return the new version."""
+        async with UnitOfWork() as uow:
+            version = await UserRepository(uow).increment_token_version(user_id)
+            await uow.commit()
+        self.apply(user_id, version)
+        publish_invalidation(REMOTE_NAME, "revoke", [[user_id, version]])
+        return version
+
+    def apply(self, user_id: str, version: int) -> None:
+        # Only called from the event loop, so no lock is needed
+        if version > self._versions.get(user_id, 0):
+            self._versions = {**self._versions, user_id: version}
+
+    def apply_remote(self, operation: str, values: list) -> None:
+        """Apply the revocations ((user_id, version) pairs) published by another worker."""
+        if operation == "revoke":
+            for user_id, version in values:
+                self.apply(user_id, version)
+
+    async def reload(self) -> None:
+        async with UnitOfWork() as uow:
+            versions = await UserRepository(uow).get_revoked_token_versions()
+        # Keep local revocations that the reload may have raced with
+        for user_id, version in self._versions.items():
+            if version > versions.get(user_id, 0):
+                versions[user_id] = version
+        self._versions = versions
+
+    async def start(self) -> None:
+        """Load the table and start the refresh task (called from the app lifespan)."""
+        if self._task is not None:
+            return
+        # First load happens before serving so that no revoked token slips through on startup
+        await self.reload()
+        self._task = asyncio.create_task(self._refresh_loop(), name="token-version-refresh")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.reload()
+            except Exception as e:
+                print(f"Error reloading token versions: {e}")
+
+
+token_versions = TokenVersionTable(
+    refresh_interval=float(app_config["AUTHENTICATION"].get("TOKEN_VERSION_REFRESH_SECONDS", 30))
+)
@@ -1,62 +1,139 @@
+from fastapi import Depends
+from database import UnitOfWork, get_uow, read_only, recent_writers, replicas
+from model.user import User
 from repository.user_repository import UserRepository
 from dto.response.user_response import UserResponse
 from dto.response.user_full_response import UserFullResponse
+from dto.response.auth_principal import AuthPrincipal
+from dto.response.user_public_key_response import UserPublicKeyResponse
 from exception.app_exception import AppException
 from exception.error_code import ErrorCode
-from passlib.context import CryptContext
-from typing import Union
+from typing import List, Optional, Union
+from utils.cache import create_cache
+from utils.password_hasher import password_hasher
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Authenticated principals by email, tagged with user_id for invalidation
+principal_cache = create_cache("PRINCIPAL", default_maxsize=10000, default_ttl=60)
+# Public key directory entries by user_id and by ("email", email), tagged with user_id
+public_key_cache = create_cache("PUBLIC_KEY", default_maxsize=100000, default_ttl=300)
+
+# Column types of the key pair, which bound the size of the keys
+PUBLIC_KEY = User.__table__.c.public_key.type
+ENCRYPTED_PRIVATE_KEY = User.__table__.c.encrypted_private_key.type
 
 
 class UserService():
-    def __init__(self):
-        self.user_repository = UserRepository()
+    def __init__(self, uow: UnitOfWork = Depends(get_uow)):
+        self.uow = uow
+        self.user_repository = UserRepository(uow)
 
-    def check_user_exist_by_email(self, email: str, only_verified=True):
-        return self.user_repository.check_user_exist_by_email(
+    async def check_user_exist_by_email(self, email: str, only_verified=True):
+        return await self.user_repository.check_user_exist_by_email(
             email=email)
 
     
-    def create_user_google(self, email, first_name, last_name, avatar_url) -> UserResponse:
-        user = self.user_repository.create_user_google(
+    async def create_user_google(self, email, first_name, last_name, avatar_url) -> UserResponse:
+        user = await self.user_repository.create_user_google(
             email=email,
             first_name=first_name,
             last_name=last_name,
             avatar_url=avatar_url)
+        await self.uow.commit()
 
         return UserResponse(
             user_id=user.user_id,
             email=user.email,
             first_name=user.first_name,
             last_name=user.last_name,
-            avatar_url=user.avatar_url,
-            public_key=user.public_key
+            avatar_url=user.avatar_url
         )
 
-    def get_user(self, user_id: str) -> UserFullResponse:
-        user = self.user_repository.get_user_by_id(user_id)
+    async def upsert_user_google(self, email, first_name, last_name, avatar_url) -> UserFullResponse:
+        user = await self.user_repository.upsert_user_google(
+            email=email,
+            first_name=first_name,
+            last_name=last_name,
+            avatar_url=avatar_url)
+        await self.uow.commit()
+        # Login is not authenticated yet: the requests that follow it must see the new user
+        if replicas.engines:
+            recent_writers.add(user.user_id)
+        # Profile fields may have been refreshed
+        self.invalidate_principal(user.user_id)
+        return UserFullResponse.fromUserModel(user)
+
+    @read_only
+    async def get_user(self, user_id: str) -> UserFullResponse:
+        user = await self.user_repository.get_user_by_id(user_id)
         if not user:
             return None
         return UserFullResponse.fromUserModel(user)
 
 
-    def get_user_by_email(
+    @read_only
+    async def get_user_by_email(
             self,
             email: str) -> UserFullResponse:
-        user = self.user_repository.get_user_by_email(
+        user = await self.user_repository.get_user_by_email(
             email=email)
         if not user:
             return None
         return UserFullResponse.fromUserModel(user)
 
-    def create_pin(self, user_id: str, pin: str, public_key: str, encrypted_private_key: str):
-        pin_hashed = pwd_context.hash(pin)
-        return self.user_repository.create_pin(user_id, pin_hashed, public_key, encrypted_private_key)
+    async def get_principal_by_email(self, email: str) -> Optional[AuthPrincipal]:
+        """
+        The authenticated user (without key material), served from the principal cache when
+        possible. Misses are read from the primary: a replica could return a user who signed up
+        moments ago as missing, or a key setup just completed as not done, and it would stay cached.
+        """
+        user = principal_cache.get(email)
+        if user is None:
+            row = await self.user_repository.get_principal_by_email(email)
+            user = AuthPrincipal.model_validate(row) if row else None
+            if user is not None:
+                principal_cache.set(email, user, tags=(user.user_id,))
+        return user
+
+    def invalidate_principal(self, user_id: str):
+        principal_cache.invalidate_tag(user_id)
+
+    async def get_public_keys(self, user_ids: List[str], emails: List[str]) -> List[UserPublicKeyResponse]:
+        """
+        Public keys of the users (by id or email) that completed their key setup, in
+        request order, served from the public key cache when possible. Read from the
+        primary: a key replaced moments ago must not come back from a lagging replica.
+        """
+        lookups = list(dict.fromkeys(user_ids)) + [("email", email) for email in dict.fromkeys(emails)]
+        found = {lookup: public_key_cache.get(lookup) for lookup in lookups}
+        missing = [lookup for lookup, entry in found.items() if entry is None]
+        if missing:
+            rows = await self.user_repository.get_public_keys(
+                [lookup for lookup in missing if isinstance(lookup, str)],
+                [lookup[1] for lookup in missing if isinstance(lookup, tuple)])
+            for row in rows:
+                entry = UserPublicKeyResponse.fromRow(row)
+                for lookup in (entry.user_id, ("email", entry.email)):
+                    public_key_cache.set(lookup, entry, tags=(entry.user_id,))
+                    if lookup in found:
+                        found[lookup] = entry
+        # A user asked for by both id and email is returned once
+        entries = {entry.user_id: entry for entry in found.values() if entry is not None}
+        return list(entries.values())
+
+    async def create_pin(self, user_id: str, pin: str, public_key: str, encrypted_private_key: str):
+        if not PUBLIC_KEY.fits(public_key) or not ENCRYPTED_PRIVATE_KEY.fits(encrypted_private_key):
+            raise AppException(ErrorCode.INVALID_KEY)
+        pin_hashed = await password_hasher.hash(pin)
+        result = await self.user_repository.create_pin(user_id, pin_hashed, public_key, encrypted_private_key)
+        await self.uow.commit()
+        # Cached principals still carry the old key setup flag, and the directory the old key
+        self.invalidate_principal(user_id)
+        public_key_cache.invalidate_tag(user_id)
+        return result
     
-    def restore_priave_key(self, user_id: str, pin: str):
-        user_db = self.user_repository.get_user_by_id(user_id)
-        if user_db.pin is not None and pwd_context.verify(pin, user_db.pin):
+    async def restore_priave_key(self, user_id: str, pin: str):
+        user_db = await self.user_repository.get_pin_and_keys(user_id)
+        if user_db and user_db.pin is not None and await password_hasher.verify(pin, user_db.pin):
             return {
                 "public_key": user_db.public_key,
                 "encrypted_private_key": user_db.encrypted_private_key
@@ -0,0 +1,57 @@
+import os
+import time
+import uuid
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects.mysql import BINARY
+from sqlalchemy.types import TypeDecorator
+
+
+def uuid7() -> str:
+    """
+    New time-ordered UUID (version 7, RFC 9562): 48-bit Unix time in ms, then
+    random bits. Keys created one after another land next to each other in
+    the primary key index instead of at random pages.
+    """
+    value = (int(time.time() * 1000) & ((1 << 48) - 1)) << 80
+    value |= int.from_bytes(os.urandom(10), "big") & ((1 << 80) - 1)
+    value &= ~(0xF << 76)
+    value |= 0x7 << 76          # version
+    value &= ~(0x3 << 62)
+    value |= 0x2 << 62          # variant
+    return str(uuid.UUID(int=value))
+
+
+class BinaryUUID(TypeDecorator):
+    """
+    UUID stored as BINARY(16) (half the size of CHAR(36), cheaper comparisons),
+    exchanged with the application as the usual text form.
+
+    Binds accept the text form, uuid.UUID or the 16 raw bytes. A string that is
+    not a UUID (an invalid id in a request) binds to an empty value, which
+    matches no row, so lookups behave as "not found".
+    """
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "mysql":
+            return dialect.type_descriptor(BINARY(16))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, uuid.UUID):
+            return value.bytes
+        if isinstance(value, (bytes, bytearray)) and len(value) == 16:
+            return bytes(value)
+        try:
+            return uuid.UUID(str(value)).bytes
+        except ValueError:
+            return b""
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return str(uuid.UUID(bytes=bytes(value)))
@@ -0,0 +1,147 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set
+
+from cachetools import TTLCache
+from config import app_config
+
+# All caches created through StatsCache, by name (used for stats reporting)
+cache_registry: Dict[str, "StatsCache"] = {}
+
+# Called with (cache name, operation, values) for every invalidation, so that the
+# other workers drop the same entries (see utils.invalidation_bus)
+invalidation_publishers: List[Callable[[str, str, list], None]] = []
+
+# Name -> callable(operation, values) applying an invalidation received from another
+# worker: every cache, and other per-worker state such as the token version table
+remote_invalidation_handlers: Dict[str, Callable[[str, list], None]] = {}
+
+_MISSING = object()
+
+
+def publish_invalidation(name: str, operation: str, values: list) -> None:
+    """Send an invalidation to the other workers (a no-op without an invalidation bus)."""
+    for publish in invalidation_publishers:
+        publish(name, operation, values)
+
+
+def get_cache_config(name: str) -> dict:
+    """Return the CACHE.<name> section of settings.yaml (empty if not configured)."""
+    return (app_config.get("CACHE") or {}).get(name) or {}
+
+
+class StatsCache:
+    """
+    Thread-safe bounded TTL cache with hit/miss counters.
+
+    Entries can be tagged (e.g. with a user_id) so that every entry belonging
+    to the same owner can be dropped with a single invalidate_tag call.
+    Invalidations are also published to the other workers; apply_remote
+    replays theirs without publishing again.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        cache_registry[name] = self
+        remote_invalidation_handlers[name] = self.apply_remote
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._cache.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[Hashable] = ()) -> None:
+        with self._lock:
+            self._cache[key] = value
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            if len(self._tags) > 2 * self._cache.maxsize:
+                self._prune_tags()
+
+    def invalidate(self, key: Hashable) -> None:
+        self.invalidate_many([key])
+
+    def invalidate_many(self, keys: Iterable[Hashable]) -> None:
+        keys = list(keys)
+        self._drop_keys(keys)
+        self._publish("keys", keys)
+
+    def invalidate_tag(self, tag: Hashable) -> None:
+        self._drop_tag(tag)
+        self._publish("tag", [tag])
+
+    def clear(self) -> None:
+        self._clear()
+        self._publish("clear", [])
+
+    def apply_remote(self, operation: str, values: list) -> None:
+        """Apply an invalidation published by another worker."""
+        if operation == "keys":
+            self._drop_keys(values)
+        elif operation == "tag":
+            for tag in values:
+                self._drop_tag(tag)
+        elif operation == "clear":
+            self._clear()
+
+    def _drop_keys(self, keys: list) -> None:
+        with self._lock:
+            for key in keys:
+                self._cache.pop(key, None)
+            self.invalidations += 1
+
+    def _drop_tag(self, tag: Hashable) -> None:
+        with self._lock:
+            for key in self._tags.pop(tag, ()):
+                self._cache.pop(key, None)
+            self.invalidations += 1
+
+    def _clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._tags.clear()
+            self.invalidations += 1
+
+    def _publish(self, operation: str, values: list) -> None:
+        publish_invalidation(self.name, operation, values)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "ttl": self._cache.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "invalidations": self.invalidations,
+            }
+
+    def _prune_tags(self) -> None:
+        # Drop tag entries whose keys have already expired or been evicted
+        for tag in list(self._tags):
+            live = {key for key in self._tags[tag] if key in self._cache}
+            if live:
+                self._tags[tag] = live
+            else:
+                del self._tags[tag]
+
+
+def create_cache(name: str, default_maxsize: int, default_ttl: float, config: Optional[dict] = None) -> StatsCache:
+    """Build a StatsCache sized from CACHE.<name>.MAX_SIZE / TTL_SECONDS in settings.yaml."""
+    config = config if config is not None else get_cache_config(name)
+    return StatsCache(
+        name=name.lower(),
+        maxsize=int(config.get("MAX_SIZE", default_maxsize)),
+        ttl=float(config.get("TTL_SECONDS", default_ttl)),
+    )
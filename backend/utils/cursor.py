@@ -0,0 +1,60 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Tuple
+
+from sqlalchemy import and_, literal, or_
+
+from exception.app_exception import AppException
+from exception.error_code import ErrorCode
+
+# [(field name, "asc" | "desc"), ...], the last entry being the unique tie-breaker
+SortSpec = List[Tuple[str, str]]
+
+
+def _encode_value(value: Any):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(sort: SortSpec, values: List[Any]) -> str:
+    """Opaque cursor pointing right after the row whose sort keys are ``values``."""
+    payload = {"s": sort, "v": [_encode_value(value) for value in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: SortSpec) -> List[Any]:
+    """Return the sort key values of the cursor, which must have been issued for the same sort."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [_decode_value(value) for value in payload["v"]]
+        cursor_sort = [tuple(item) for item in payload["s"]]
+    except (ValueError, KeyError, TypeError):
+        raise AppException(ErrorCode.INVALID_CURSOR)
+    if cursor_sort != [tuple(item) for item in sort] or len(values) != len(sort):
+        raise AppException(ErrorCode.INVALID_CURSOR)
+    return values
+
+
+def keyset_after(columns: list, directions: List[str], values: List[Any]):
+    """
+    WHERE clause selecting the rows that come after ``values`` in the given order:
+    (c1 > v1) OR (c1 = v1 AND c2 > v2) OR ... with ">" flipped to "<" for desc columns.
+    """
+    # Bound literals, so that booleans are compared like any other value
+    values = [literal(value, column.type) for column, value in zip(columns, values)]
+    clauses = []
+    for i, (column, direction, value) in enumerate(zip(columns, directions, values)):
+        after = column < value if direction == "desc" else column > value
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal_prefix, after))
+    return or_(*clauses)
@@ -0,0 +1,149 @@
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from google.auth import jwt as google_jwt
+from config import app_config
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class GoogleCertStore:
+    """
+    Process-wide cache of Google's id_token signing certificates.
+
+    Certificates are kept for the max-age announced in Cache-Control and are
+    refreshed by a background thread shortly before they expire, so id_token
+    verification on the login path is a local signature check without any
+    outbound request. Expired certificates keep being served while the
+    refresher retries; verification only fetches when none were ever loaded
+    or after a key rotation, so callers on the event loop run it in a thread.
+    The certificate URL can point to a local fake endpoint.
+    """
+
+    def __init__(self,
+                 url: str = GOOGLE_CERTS_URL,
+                 refresh_margin: float = 300,
+                 min_refresh_interval: float = 60,
+                 default_max_age: float = 3600,
+                 timeout: float = 5):
+        self.url = url
+        self.refresh_margin = refresh_margin
+        self.min_refresh_interval = min_refresh_interval
+        self.default_max_age = default_max_age
+        self.timeout = timeout
+        self.fetch_count = 0
+        self._session = requests.Session()
+        self._certs: Dict[str, str] = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Load the certificates and start the background refresher."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        try:
+            self.refresh()
+        except Exception as e:
+            # Not fatal: the first verification will fetch them again
+            print(f"Error prefetching Google certs: {e}")
+        self._thread = threading.Thread(target=self._refresh_loop, name="google-cert-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+        self._session.close()
+
+    def get_certs(self) -> Dict[str, str]:
+        if self._needs_fetch():
+            with self._lock:
+                # Another thread may have refreshed while we waited for the lock
+                if self._needs_fetch():
+                    self._fetch()
+        return self._certs
+
+    def _needs_fetch(self) -> bool:
+        # Expired certificates are still served while the background refresher retries
+        if self._thread is not None and self._certs:
+            return False
+        return time.monotonic() >= self._expires_at
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._fetch()
+
+    def verify_id_token(self, token: str, audience: str) -> dict:
+        """
+        Verify an id_token signature, audience, expiry and issuer locally.
+        Raises ValueError if the token is invalid.
+        """
+        try:
+            claims = google_jwt.decode(token, certs=self.get_certs(), audience=audience)
+        except ValueError as e:
+            # Unknown key id: Google may have rotated keys before our copy expired
+            if "Certificate for key id" not in str(e) or not self._refresh_after_rotation():
+                raise
+            claims = google_jwt.decode(token, certs=self.get_certs(), audience=audience)
+
+        if claims.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError("Wrong issuer. 'iss' should be one of the following: {}".format(GOOGLE_ISSUERS))
+        return claims
+
+    def _refresh_after_rotation(self) -> bool:
+        with self._lock:
+            if time.monotonic() - self._fetched_at < self.min_refresh_interval:
+                return False
+            self._fetch()
+            return True
+
+    def _fetch(self) -> None:
+        response = self._session.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        self.fetch_count += 1
+        now = time.monotonic()
+        self._certs = response.json()
+        self._fetched_at = now
+        self._expires_at = now + self._max_age(response)
+
+    def _max_age(self, response: requests.Response) -> float:
+        match = _MAX_AGE_RE.search(response.headers.get("Cache-Control", ""))
+        max_age = float(match.group(1)) if match else self.default_max_age
+        age = response.headers.get("Age")
+        if age and age.isdigit():
+            max_age -= float(age)
+        return max(max_age, 0.0)
+
+    def _refresh_loop(self) -> None:
+        retry_delay = 1.0
+        while not self._stop.is_set():
+            wait = self._expires_at - self.refresh_margin - time.monotonic()
+            if wait > 0:
+                self._stop.wait(wait)
+                continue
+            try:
+                self.refresh()
+                retry_delay = 1.0
+            except Exception as e:
+                # Keep serving the current certificates and retry with backoff
+                print(f"Error refreshing Google certs: {e}")
+                self._stop.wait(retry_delay)
+                retry_delay = min(retry_delay * 2, self.refresh_margin)
+            else:
+                # Expired-on-arrival responses must not make the loop spin
+                if self._expires_at - self.refresh_margin <= time.monotonic():
+                    self._stop.wait(self.min_refresh_interval)
+
+
+google_cert_store = GoogleCertStore(
+    url=app_config["GOOGLE_AUTHENTICATION"].get("CERTS_URL") or GOOGLE_CERTS_URL
+)
@@ -0,0 +1,71 @@
+import asyncio
+import random
+from typing import Optional
+
+import httpx
+from config import app_config
+
+RETRY_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+
+
+class AsyncHttpClient:
+    """
+    Shared async HTTP client: pooled keep-alive connections, explicit timeouts
+    and retry with exponential backoff for transport errors and retryable
+    status codes. Only meant for idempotent requests.
+    """
+
+    def __init__(self,
+                 timeout: float = 5,
+                 connect_timeout: float = 2,
+                 max_connections: int = 100,
+                 max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30,
+                 retries: int = 2,
+                 backoff: float = 0.2):
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.retries = retries
+        self.backoff = backoff
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                response = await self.client.get(url, **kwargs)
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.retries:
+                    return response
+            except httpx.TransportError:
+                if attempt >= self.retries:
+                    raise
+            attempt += 1
+            # Exponential backoff with jitter
+            await asyncio.sleep(self.backoff * (2 ** (attempt - 1)) * (0.5 + random.random()))
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_config = app_config.get("HTTP_CLIENT") or {}
+
+http_client = AsyncHttpClient(
+    timeout=float(_config.get("TIMEOUT_SECONDS", 5)),
+    connect_timeout=float(_config.get("CONNECT_TIMEOUT_SECONDS", 2)),
+    max_connections=int(_config.get("MAX_CONNECTIONS", 100)),
+    max_keepalive_connections=int(_config.get("MAX_KEEPALIVE_CONNECTIONS", 20)),
+    retries=int(_config.get("RETRIES", 2)),
+    backoff=float(_config.get("BACKOFF_SECONDS", 0.2)),
+)
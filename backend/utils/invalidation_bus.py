@@ -0,0 +1,196 @@
+import asyncio
+import importlib
+import json
+import os
+import socket
+import uuid
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from config import app_config
+from utils.cache import invalidation_publishers, remote_invalidation_handlers
+
+# Keys per message, so that a message stays well under the datagram size limit
+MAX_KEYS_PER_MESSAGE = 500
+
+
+def _to_hashable(value):
+    # JSON turns the tuple keys (e.g. (user_id, sheet_id)) into lists
+    if isinstance(value, list):
+        return tuple(_to_hashable(item) for item in value)
+    return value
+
+
+class InvalidationBus(ABC):
+    """
+    Broadcast of cache invalidations between the workers of a deployment.
+
+    While started, every invalidation of a registered cache (utils.cache) or
+    token revocation is published; invalidations received from the other
+    workers are applied to the cache (or table) of the same name. Messages
+    are small JSON documents.
+
+    Transports implement send() (deliver one message to every other worker,
+    without blocking) and call receive() for every message that arrives;
+    start() / stop() set them up and tear them down. To plug in an external
+    broker, subclass this and set INVALIDATION_BUS.BACKEND to "module:Class"
+    (the class gets the INVALIDATION_BUS settings as keyword arguments).
+    """
+
+    def __init__(self, **settings):
+        self.sender = None
+        self.published = 0
+        self.received = 0
+        self.dropped = 0
+
+    async def start(self) -> None:
+        # Set per process: workers may be forked after this module was imported
+        self.sender = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        invalidation_publishers.append(self.publish)
+
+    async def stop(self) -> None:
+        if self.publish in invalidation_publishers:
+            invalidation_publishers.remove(self.publish)
+
+    @abstractmethod
+    def send(self, message: bytes) -> None:
+        ...
+
+    def publish(self, cache: str, operation: str, values: list) -> None:
+        chunks = [values[i:i + MAX_KEYS_PER_MESSAGE] for i in range(0, len(values), MAX_KEYS_PER_MESSAGE)] or [[]]
+        for chunk in chunks:
+            message = {"s": self.sender, "c": cache, "o": operation, "v": chunk}
+            try:
+                self.send(json.dumps(message, separators=(",", ":")).encode())
+                self.published += 1
+            except Exception as e:
+                # Entries still expire with their TTL
+                self.dropped += 1
+                print(f"Error publishing cache invalidation: {e}")
+
+    def receive(self, message: bytes) -> None:
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            return
+        # Brokers may echo our own messages back
+        if payload.get("s") == self.sender:
+            return
+        apply_remote = remote_invalidation_handlers.get(payload.get("c"))
+        if apply_remote is None:
+            return
+        self.received += 1
+        apply_remote(payload.get("o"), [_to_hashable(value) for value in payload.get("v", [])])
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self).__name__,
+            "published": self.published,
+            "received": self.received,
+            "dropped": self.dropped,
+        }
+
+
+class NullInvalidationBus(InvalidationBus):
+    """Single worker: nothing to tell."""
+
+    async def start(self) -> None:
+        pass
+
+    def send(self, message: bytes) -> None:
+        pass
+
+
+class UnixSocketInvalidationBus(InvalidationBus):
+    """
+    Workers of one host, each bound to a Unix datagram socket in a shared
+    directory (one per deployment). A message is sent to every other socket
+    of the directory; sockets left behind by dead workers are removed.
+    Delivery takes one event loop iteration on the receiving side.
+    """
+
+    def __init__(self, SOCKET_DIR: str = "/tmp/e2ee-sheets-invalidation", **settings):
+        super().__init__(**settings)
+        self.socket_dir = SOCKET_DIR
+        self.path: Optional[str] = None
+        self._socket: Optional[socket.socket] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        if self._socket is not None:
+            return
+        os.makedirs(self.socket_dir, mode=0o700, exist_ok=True)
+        self.path = os.path.join(self.socket_dir, f"{os.getpid()}.sock")
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        sock.bind(self.path)
+        self._socket = sock
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(sock.fileno(), self._on_readable)
+        await super().start()
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._socket is None:
+            return
+        self._loop.remove_reader(self._socket.fileno())
+        self._socket.close()
+        self._socket = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def send(self, message: bytes) -> None:
+        if self._socket is None:
+            return
+        for name in os.listdir(self.socket_dir):
+            path = os.path.join(self.socket_dir, name)
+            if path == self.path or not name.endswith(".sock"):
+                continue
+            try:
+                self._socket.sendto(message, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Nobody listening any more
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            except BlockingIOError:
+                # That worker is not keeping up; its entries expire with their TTL
+                self.dropped += 1
+
+    def stats(self) -> dict:
+        peers = 0
+        if self._socket is not None:
+            peers = sum(1 for name in os.listdir(self.socket_dir) if name.endswith(".sock")) - 1
+        return {**super().stats(), "socket_dir": self.socket_dir, "peers": peers}
+
+    def _on_readable(self) -> None:
+        while self._socket is not None:
+            try:
+                message = self._socket.recv(262144)
+            except BlockingIOError:
+                return
+            self.receive(message)
+
+
+BACKENDS = {
+    "unix": UnixSocketInvalidationBus,
+    "none": NullInvalidationBus,
+}
+
+
+def create_invalidation_bus(config: dict) -> InvalidationBus:
+    """Build the bus named by BACKEND: "unix" (default), "none" or "module:Class"."""
+    settings = {key: value for key, value in config.items() if key != "BACKEND"}
+    backend = config.get("BACKEND", "unix")
+    if backend in BACKENDS:
+        return BACKENDS[backend](**settings)
+    module, _, name = backend.partition(":")
+    return getattr(importlib.import_module(module), name)(**settings)
+
+
+invalidation_bus = create_invalidation_bus(app_config.get("INVALIDATION_BUS") or {})
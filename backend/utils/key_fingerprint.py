@@ -0,0 +1,23 @@
+import base64
+import binascii
+import hashlib
+import re
+
+_PEM_ARMOR = re.compile(r"-----(BEGIN|END) [A-Z ]+-----")
+
+
+def key_fingerprint(public_key: str) -> str:
+    """
+    SHA-256 fingerprint of a public key, "SHA256:<unpadded base64>" like OpenSSH.
+
+    Computed over the DER bytes, so a key sent as plain base64 (the extension)
+    and the same key sent as PEM have the same fingerprint.
+    """
+    body = "".join(_PEM_ARMOR.sub("", public_key).split())
+    try:
+        der = base64.b64decode(body, validate=True)
+    except (binascii.Error, ValueError):
+        # Not base64 at all: fingerprint the text itself
+        der = public_key.encode("utf-8")
+    digest = base64.b64encode(hashlib.sha256(der).digest()).decode("ascii")
+    return "SHA256:" + digest.rstrip("=")
@@ -0,0 +1,118 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from passlib.context import CryptContext
+from config import app_config
+from exception.app_exception import AppException
+from exception.error_code import ErrorCode
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+# Executed in the worker processes: return the result and the time spent hashing
+def _hash(secret: str):
+    start = time.perf_counter()
+    hashed = pwd_context.hash(secret)
+    return hashed, time.perf_counter() - start
+
+
+def _verify(secret: str, hashed: str):
+    start = time.perf_counter()
+    ok = pwd_context.verify(secret, hashed)
+    return ok, time.perf_counter() - start
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing/verification in a dedicated process pool so it never
+    holds the event loop.
+
+    At most ``max_concurrency`` operations are in flight; callers wait up to
+    ``queue_timeout`` seconds for a slot and then fail fast with
+    PASSWORD_HASHER_BUSY instead of piling up behind the pool.
+    """
+
+    def __init__(self, max_workers: int, max_concurrency: int, queue_timeout: float):
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._metrics = {
+            "completed": 0,
+            "rejected": 0,
+            "in_flight": 0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0,
+            "hash_time_total": 0.0,
+            "hash_time_max": 0.0,
+        }
+
+    async def hash(self, secret: str) -> str:
+        return await self._run(_hash, secret)
+
+    async def verify(self, secret: str, hashed: str) -> bool:
+        return await self._run(_verify, secret, hashed)
+
+    def stats(self) -> dict:
+        metrics = dict(self._metrics)
+        completed = metrics["completed"]
+        metrics["queue_wait_avg"] = metrics["queue_wait_total"] / completed if completed else None
+        metrics["hash_time_avg"] = metrics["hash_time_total"] / completed if completed else None
+        metrics.update(max_workers=self.max_workers, max_concurrency=self.max_concurrency,
+                       queue_timeout=self.queue_timeout)
+        return metrics
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, fn, *args):
+        queued_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._metrics["rejected"] += 1
+            raise AppException(ErrorCode.PASSWORD_HASHER_BUSY)
+
+        queue_wait = time.perf_counter() - queued_at
+        self._metrics["in_flight"] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result, hash_time = await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._metrics["in_flight"] -= 1
+            self._semaphore.release()
+
+        self._metrics["completed"] += 1
+        self._metrics["queue_wait_total"] += queue_wait
+        self._metrics["queue_wait_max"] = max(self._metrics["queue_wait_max"], queue_wait)
+        self._metrics["hash_time_total"] += hash_time
+        self._metrics["hash_time_max"] = max(self._metrics["hash_time_max"], hash_time)
+        return result
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: never fork a process that already runs background threads
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._executor
+
+
+_config = app_config.get("PASSWORD_HASHER") or {}
+
+password_hasher = PasswordHasher(
+    max_workers=int(_config.get("MAX_WORKERS", 2)),
+    max_concurrency=int(_config.get("MAX_CONCURRENCY", 4)),
+    queue_timeout=float(_config.get("QUEUE_TIMEOUT_SECONDS", 2)),
+)
@@ -0,0 +1,47 @@
+import time
+from typing import Dict, Optional
+
+from utils.cache import publish_invalidation, remote_invalidation_handlers
+
+# Name of the table on the invalidation bus
+REMOTE_NAME = "RECENT_WRITERS"
+
+
+class RecentWriters:
+    """
+    Users who committed a write in the last ``window`` seconds, on every worker.
+
+    Their reads stay on the primary during the window, so that the request
+    following a write (GET /me after setting the PIN, by-link after creating a
+    sheet) sees it even if the replica has not caught up yet, whichever worker
+    serves it. Writes are announced to the other workers on the invalidation bus.
+    """
+
+    def __init__(self, window: float, maxsize: int = 100000):
+        self.window = window
+        self.maxsize = maxsize
+        self._until: Dict[str, float] = {}
+        remote_invalidation_handlers[REMOTE_NAME] = self.apply_remote
+
+    def add(self, user_id: Optional[str]) -> None:
+        if not user_id or self.window <= 0:
+            return
+        self._mark(user_id)
+        publish_invalidation(REMOTE_NAME, "write", [user_id])
+
+    def __contains__(self, user_id: Optional[str]) -> bool:
+        until = self._until.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    def apply_remote(self, operation: str, values: list) -> None:
+        """Apply the writes announced by another worker."""
+        if operation == "write":
+            for user_id in values:
+                self._mark(user_id)
+
+    def _mark(self, user_id: str) -> None:
+        # Only called from the event loop, so no lock is needed
+        now = time.monotonic()
+        if len(self._until) >= self.maxsize:
+            self._until = {key: until for key, until in self._until.items() if until > now}
+        self._until[user_id] = now + self.window
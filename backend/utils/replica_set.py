@@ -0,0 +1,99 @@
+import asyncio
+import itertools
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+def describe(engine: AsyncEngine) -> str:
+    return engine.url.render_as_string(hide_password=True)
+
+
+class ReplicaSet:
+    """
+    Read replicas chosen round-robin among the healthy ones.
+
+    A background task checks every replica periodically: it must answer
+    ``SELECT 1`` within the timeout and, when ``max_lag`` is set, must not lag
+    behind its source by more than ``max_lag`` seconds. Unhealthy replicas are
+    skipped until a later check succeeds; with none left, reads go to the primary.
+    """
+
+    def __init__(self, engines: List[AsyncEngine], check_interval: float, max_lag: Optional[float],
+                 timeout: float = 2.0):
+        self.engines = engines
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self.timeout = timeout
+        self._healthy: List[AsyncEngine] = list(engines)
+        self._counter = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    def choose(self) -> Optional[AsyncEngine]:
+        """Next healthy replica, or None when reads must go to the primary."""
+        healthy = self._healthy
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    async def check(self) -> None:
+        results = await asyncio.gather(*(self._is_healthy(engine) for engine in self.engines))
+        healthy = [engine for engine, ok in zip(self.engines, results) if ok]
+        for engine in self.engines:
+            if (engine in healthy) != (engine in self._healthy):
+                print(f"Read replica {describe(engine)} is {'up' if engine in healthy else 'down'}")
+        self._healthy = healthy
+
+    async def start(self) -> None:
+        """Check the replicas and start the health check task (called from the app lifespan)."""
+        if self._task is not None or not self.engines:
+            return
+        await self.check()
+        self._task = asyncio.create_task(self._check_loop(), name="replica-health-check")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for engine in self.engines:
+            await engine.dispose()
+
+    def stats(self) -> List[dict]:
+        return [
+            {"host": engine.url.host, "port": engine.url.port, "database": engine.url.database,
+             "healthy": engine in self._healthy}
+            for engine in self.engines
+        ]
+
+    async def _is_healthy(self, engine: AsyncEngine) -> bool:
+        try:
+            return await asyncio.wait_for(self._probe(engine), timeout=self.timeout)
+        except Exception as e:
+            print(f"Read replica {describe(engine)} check failed: {e}")
+            return False
+
+    async def _probe(self, engine: AsyncEngine) -> bool:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            if self.max_lag is None or engine.dialect.name != "mysql":
+                return True
+            row = (await conn.execute(text("SHOW REPLICA STATUS"))).mappings().first()
+        if row is None:
+            # Not replicating (e.g. a second local instance used for testing)
+            return True
+        lag = row.get("Seconds_Behind_Source")
+        # NULL while replication is stopped or broken
+        return lag is not None and lag <= self.max_lag
+
+    async def _check_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self.check()
+            except Exception as e:
+                print(f"Error checking read replicas: {e}")
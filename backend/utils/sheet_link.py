@@ -0,0 +1,31 @@
+import hashlib
+import re
+from urllib.parse import parse_qs, urlsplit
+
+# https://docs.google.com/spreadsheets/d/<id>/edit#gid=0, /spreadsheets/u/1/d/<id>, ...
+# (published copies, /d/e/<id>, keep their "e/" prefix: it is a different ID space)
+GOOGLE_SPREADSHEET_PATH = re.compile(r"/spreadsheets/(?:u/\d+/)?d/((?:e/)?[a-zA-Z0-9_-]+)")
+# Legacy https://docs.google.com/spreadsheet/ccc?key=<id>
+GOOGLE_SPREADSHEET_KEY_PARAM = re.compile(r"^[a-zA-Z0-9_-]+$")
+
+
+def spreadsheet_key(link: str) -> str:
+    """
+    Canonical key of the spreadsheet a link points to.
+
+    Every URL variant of a Google spreadsheet (/edit, /view, #gid=..., query
+    strings, /u/<n>/ segments) maps to its spreadsheet ID. Other links map to
+    "sha256:" + the digest of the link without query string and fragment.
+    """
+    link = link.strip()
+    match = GOOGLE_SPREADSHEET_PATH.search(link)
+    if match:
+        return match.group(1)
+
+    parts = urlsplit(link)
+    key = parse_qs(parts.query).get("key", [None])[0]
+    if "/spreadsheet/" in parts.path and key and GOOGLE_SPREADSHEET_KEY_PARAM.match(key):
+        return key
+
+    canonical = f"{parts.netloc.lower()}{parts.path.rstrip('/')}" if parts.netloc else link
+    return "sha256:" + hashlib.sha256(canonical.encode()).hexdigest()
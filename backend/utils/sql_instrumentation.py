@@ -0,0 +1,109 @@
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import app_config
+from exception.app_exception import AppException
+from exception.error_code import ErrorCode
+
+_IN_LIST = re.compile(r"\(\s*(?:%s|\?|:\w+)(?:\s*,\s*(?:%s|\?|:\w+))*\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Normalize a statement so that the same query with other parameters maps to the same string."""
+    statement = _LITERAL.sub("?", statement)
+    statement = _IN_LIST.sub("(...)", statement)
+    return _SPACES.sub(" ", statement).strip()
+
+
+class QueryStats:
+    """Statements issued while serving one request."""
+
+    def __init__(self, route: str, budget: Optional[int] = None):
+        self.route = route
+        self.budget = budget
+        self.count = 0
+        self.total_time = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Fingerprints issued at least ``threshold`` times (likely N+1 patterns)."""
+        return [(fp, n) for fp, n in self.fingerprints.most_common() if n >= threshold]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+class SqlInstrumentation:
+    """
+    Counts statements, DB time and repeated statement fingerprints per request.
+
+    Cursor events of the engine are recorded into the QueryStats of the current
+    request (held in a context variable set by QueryStatsMiddleware). In strict
+    mode a request fails with QUERY_BUDGET_EXCEEDED as soon as it issues more
+    statements than its budget, which is meant for tests and local runs.
+    """
+
+    def __init__(self, enabled: bool, query_budget: int, route_budgets: Dict[str, int],
+                 n_plus_one_threshold: int, strict: bool, headers: bool):
+        self.enabled = enabled
+        self.query_budget = query_budget
+        self.route_budgets = route_budgets
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.strict = strict
+        self.headers = headers
+
+    def instrument(self, engine: Engine) -> None:
+        if not self.enabled:
+            return
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def budget_for(self, route: str) -> int:
+        return self.route_budgets.get(route, self.query_budget)
+
+    def begin(self, route: str) -> Tuple[QueryStats, object]:
+        stats = QueryStats(route, self.budget_for(route))
+        return stats, _current_stats.set(stats)
+
+    def end(self, stats: QueryStats, token) -> None:
+        _current_stats.reset(token)
+        if stats.budget and stats.count > stats.budget:
+            print(f"[sql] {stats.route}: {stats.count} statements exceed the budget of {stats.budget}")
+        for statement, count in stats.repeated(self.n_plus_one_threshold):
+            print(f"[sql] {stats.route}: possible N+1, {count}x {statement}")
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stats = _current_stats.get()
+        if stats is None:
+            return
+        stats.count += 1
+        stats.fingerprints[fingerprint(statement)] += 1
+        if self.strict and stats.budget and stats.count > stats.budget:
+            raise AppException(ErrorCode.QUERY_BUDGET_EXCEEDED)
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stats = _current_stats.get()
+        starts = conn.info.get("query_start")
+        if stats is None or not starts:
+            return
+        stats.total_time += time.perf_counter() - starts.pop()
+
+
+_config = app_config.get("SQL_INSTRUMENTATION", {})
+sql_instrumentation = SqlInstrumentation(
+    enabled=_config.get("ENABLED", True),
+    query_budget=int(_config.get("QUERY_BUDGET", 20)),
+    route_budgets={route: int(budget) for route, budget in (_config.get("ROUTE_BUDGETS") or {}).items()},
+    n_plus_one_threshold=int(_config.get("N_PLUS_ONE_THRESHOLD", 5)),
+    strict=_config.get("STRICT", False),
+    headers=_config.get("HEADERS", True),
+)
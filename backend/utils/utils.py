@@ -1,5 +1,5 @@
 from typing import List, Optional
-from fastapi import HTTPException, Request, status
+from fastapi import HTTPException, Request, Response, status
 from model.user import User
 
 async def get_current_user(request: Request) -> User:
@@ -8,6 +8,15 @@ async def get_current_user(request: Request) -> User:
     return request.state.user
 
 
+def set_access_token_cookie(response: Response, access_token: str):
+    response.set_cookie(
+        key="access_token",
+        value=f"{access_token}",
+        httponly=True,
+        secure=True,
+        samesite='lax')
+
+
 def pagging_query(page: int,
                   page_size: int,
                   sorts_by: Optional[List[str]],